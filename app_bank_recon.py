@@ -1,5 +1,7 @@
 # app.py
 
+import logging
+import click
 from flask import Flask
 from routes.main_routes import main_bp
 from routes.upload_routes import upload_bp
@@ -7,11 +9,16 @@ from routes.bank_fin_reconcile_routes import bank_fin_reconcile_bp
 from routes.bank_fin_tally_reconcile_routes import bank_fin_tally_reconcile_bp
 from routes.bank_tally_reconcile_routes import bank_tally_bp
 from routes.reports_routes import reports_bp
-from routes.data_management_routes import data_management_bp
+from routes.data_management_routes import data_management_bp, backfill_match_keys
+from routes.vendor_alias_routes import vendor_alias_bp
+from parsers.reader_benchmark import SAMPLE_PARSERS, benchmark_readers
 
 app = Flask(__name__)
 app.secret_key = 'a_random_secret'
 
+# Matcher stats are logged at INFO under each run_tag
+logging.basicConfig(level=logging.INFO)
+
 # Register Blueprints
 app.register_blueprint(main_bp)
 app.register_blueprint(upload_bp)
@@ -20,6 +27,30 @@ app.register_blueprint(bank_fin_tally_reconcile_bp)
 app.register_blueprint(bank_tally_bp)
 app.register_blueprint(reports_bp)
 app.register_blueprint(data_management_bp)
+app.register_blueprint(vendor_alias_bp)
+
+
+@app.cli.command('backfill-match-keys')
+@click.option('--table', 'tables', multiple=True, type=click.Choice(['bank_data', 'fin_data', 'tally_data']),
+              help='Table to backfill (repeatable); all three by default.')
+@click.option('--recompute', is_flag=True, help='Recompute keys for every row, not only missing ones.')
+def backfill_match_keys_command(tables, recompute):
+    """Populate stored match keys (cheque_ref, ven_norm, ...) for existing rows."""
+    for table, count in backfill_match_keys(list(tables) or None, recompute=recompute).items():
+        click.echo(f"{table}: {count} rows updated")
+
+
+@app.cli.command('bench-readers')
+@click.argument('layout', type=click.Choice(sorted(SAMPLE_PARSERS), case_sensitive=False))
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--sheet', 'sheet_name', default=None, help='Sheet to parse (required for TALLY).')
+@click.option('--repeat', default=3, show_default=True, help='Parses per backend; the fastest is reported.')
+def bench_readers_command(layout, paths, sheet_name, repeat):
+    """Time every installed Excel reader backend on sample statements of one layout."""
+    for r in benchmark_readers(layout.upper(), paths, sheet_name=sheet_name, repeat=repeat):
+        timing = f"{r['seconds']:8.2f}s {r['rows']:>8} rows" if r['rows'] is not None else " " * 23
+        click.echo(f"{r['layout']:5} {r['backend']:9} {timing}  {r['difference'] or 'same'}  {r['path']}")
+
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,96 @@
+-- Upgrades for databases created from an older db_query.sql.
+-- Run each block once, in order. Fresh installs only need db_query.sql.
+USE bank_recon_db;
+
+-- 1. Integer paisa amount columns (exact matching keys)
+ALTER TABLE bank_data
+    ADD COLUMN B_Withdrawal_paisa BIGINT AFTER B_Balance,
+    ADD COLUMN B_Deposit_paisa BIGINT AFTER B_Withdrawal_paisa;
+ALTER TABLE fin_data
+    ADD COLUMN F_Credit_Amount_paisa BIGINT AFTER F_Credit_Amount;
+ALTER TABLE tally_data
+    ADD COLUMN T_Debit_paisa BIGINT AFTER T_Credit,
+    ADD COLUMN T_Credit_paisa BIGINT AFTER T_Debit_paisa;
+ALTER TABLE bf_matched
+    ADD COLUMN B_Withdrawal_paisa BIGINT AFTER B_Balance,
+    ADD COLUMN B_Deposit_paisa BIGINT AFTER B_Withdrawal_paisa,
+    ADD COLUMN F_Credit_Amount_paisa BIGINT AFTER F_Credit_Amount;
+ALTER TABLE bft_matched
+    ADD COLUMN B_Withdrawal_paisa BIGINT AFTER B_Balance,
+    ADD COLUMN B_Deposit_paisa BIGINT AFTER B_Withdrawal_paisa,
+    ADD COLUMN F_Credit_Amount_paisa BIGINT AFTER F_Credit_Amount,
+    ADD COLUMN T_Debit_paisa BIGINT AFTER T_Credit,
+    ADD COLUMN T_Credit_paisa BIGINT AFTER T_Debit_paisa;
+ALTER TABLE bt_matched
+    ADD COLUMN B_Withdrawal_paisa BIGINT AFTER B_Balance,
+    ADD COLUMN B_Deposit_paisa BIGINT AFTER B_Withdrawal_paisa,
+    ADD COLUMN T_Debit_paisa BIGINT AFTER T_Credit,
+    ADD COLUMN T_Credit_paisa BIGINT AFTER T_Debit_paisa;
+
+UPDATE bank_data SET B_Withdrawal_paisa = ROUND(B_Withdrawal * 100), B_Deposit_paisa = ROUND(B_Deposit * 100);
+UPDATE fin_data SET F_Credit_Amount_paisa = ROUND(F_Credit_Amount * 100);
+UPDATE tally_data SET T_Debit_paisa = ROUND(T_Debit * 100), T_Credit_paisa = ROUND(T_Credit * 100);
+
+-- 2. Vendor alias registry (replaces the hard-coded vendor_alias_dicts)
+CREATE TABLE IF NOT EXISTS vendor_alias (
+    alias_id INT AUTO_INCREMENT PRIMARY KEY,
+    bank_code VARCHAR(4) NOT NULL,                          -- Short code for the bank
+    bank_vendor VARCHAR(255) NOT NULL,                      -- Vendor name as it appears on the bank side (upper-case)
+    fin_vendor VARCHAR(255) NOT NULL,                       -- Vendor name to match on the finance side (upper-case)
+    updated_at DATETIME DEFAULT NULL,                       -- When the alias was last written
+
+    UNIQUE KEY uq_vendor_alias (bank_code, bank_vendor)
+);
+
+CREATE TABLE IF NOT EXISTS vendor_alias_version (
+    id TINYINT PRIMARY KEY,                                 -- Always 1
+    version INT NOT NULL DEFAULT 0,                         -- Bumped on every vendor_alias write
+    updated_at DATETIME DEFAULT NULL
+);
+
+INSERT IGNORE INTO vendor_alias (bank_code, bank_vendor, fin_vendor, updated_at) VALUES
+    ('MDB', 'JOYNALANDSONS', 'JOYNALSONS', NOW()),
+    ('MDB', 'TALIANDCO', 'TALICO', NOW()),
+    ('MTB', 'BANKVENDOR', 'FINVENDORALIAS', NOW());
+INSERT IGNORE INTO vendor_alias_version (id, version, updated_at) VALUES (1, 1, NOW());
+
+-- 3. Match keys stored at upload (see logics/match_keys.py)
+ALTER TABLE bank_data
+    ADD COLUMN cheque_ref VARCHAR(100) AFTER bank_ven,
+    ADD COLUMN ven_norm VARCHAR(100) AFTER cheque_ref,
+    ADD COLUMN ven_fuzzy VARCHAR(100) AFTER ven_norm,
+    ADD INDEX idx_bank_cheque_ref (cheque_ref),
+    ADD INDEX idx_bank_ven_norm (ven_norm);
+ALTER TABLE fin_data
+    ADD COLUMN ven_norm VARCHAR(100) AFTER fin_ven,
+    ADD COLUMN ven_fuzzy VARCHAR(100) AFTER ven_norm,
+    ADD COLUMN vch_digits VARCHAR(255) AFTER ven_fuzzy,
+    ADD INDEX idx_fin_ven_norm (ven_norm),
+    ADD INDEX idx_fin_vch_digits (vch_digits);
+ALTER TABLE tally_data
+    ADD COLUMN cheque_ref VARCHAR(100) AFTER tally_ven,
+    ADD COLUMN vch_digits VARCHAR(255) AFTER cheque_ref,
+    ADD INDEX idx_tally_cheque_ref (cheque_ref),
+    ADD INDEX idx_tally_vch_digits (vch_digits);
+ALTER TABLE bf_matched
+    ADD COLUMN cheque_ref VARCHAR(100) AFTER fin_ven,
+    ADD COLUMN ven_norm VARCHAR(100) AFTER cheque_ref,
+    ADD COLUMN ven_fuzzy VARCHAR(100) AFTER ven_norm,
+    ADD COLUMN vch_digits VARCHAR(255) AFTER ven_fuzzy;
+ALTER TABLE bft_matched
+    ADD COLUMN cheque_ref VARCHAR(100) AFTER tally_ven,
+    ADD COLUMN ven_norm VARCHAR(100) AFTER cheque_ref,
+    ADD COLUMN ven_fuzzy VARCHAR(100) AFTER ven_norm,
+    ADD COLUMN vch_digits VARCHAR(255) AFTER ven_fuzzy;
+ALTER TABLE bt_matched
+    ADD COLUMN ven_norm VARCHAR(100) AFTER unit_name,
+    ADD COLUMN ven_fuzzy VARCHAR(100) AFTER ven_norm,
+    ADD COLUMN vch_digits VARCHAR(255) AFTER ven_fuzzy;
+
+-- Then fill existing rows: `flask --app app_bank_recon backfill-match-keys`
+-- (or POST /backfill_match_keys). Rows left NULL are computed at match time.
+
+-- 4. Bank-tally match type (rule-extracted cheque ref vs. token fallback)
+ALTER TABLE bt_matched
+    ADD COLUMN bt_match_type VARCHAR(32) AFTER bt_source;
+UPDATE bt_matched SET bt_match_type = 'cheque ref' WHERE bt_match_type IS NULL;
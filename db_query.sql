@@ -18,8 +18,13 @@ CREATE TABLE IF NOT EXISTS bank_data (
     B_Withdrawal DECIMAL(18,2),                            -- Withdrawal amount
     B_Deposit DECIMAL(18,2),                               -- Deposit amount
     B_Balance DECIMAL(18,2),                               -- Balance
+    B_Withdrawal_paisa BIGINT,                             -- Withdrawal amount in paisa (exact, for matching)
+    B_Deposit_paisa BIGINT,                                -- Deposit amount in paisa (exact, for matching)
 
     bank_ven VARCHAR(100),                                 -- Vendor/party name from bank
+    cheque_ref VARCHAR(100),                               -- Cheque ref extracted at upload ('' = none found)
+    ven_norm VARCHAR(100),                                 -- bank_ven upper-cased and stripped (match key)
+    ven_fuzzy VARCHAR(100),                                -- bank_ven with punctuation collapsed (fuzzy match key)
 
     input_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,        -- When the row was inserted
 
@@ -31,7 +36,10 @@ CREATE TABLE IF NOT EXISTS bank_data (
     bft_date_matched DATETIME DEFAULT NULL,                -- Date/time of Bank-Finance-Tally match
 
     bt_is_matched TINYINT DEFAULT 0,                       -- Matched in Bank-Tally stage
-    bt_date_matched DATETIME DEFAULT NULL                  -- Date/time of Bank-Tally match
+    bt_date_matched DATETIME DEFAULT NULL,                 -- Date/time of Bank-Tally match
+
+    INDEX idx_bank_cheque_ref (cheque_ref),
+    INDEX idx_bank_ven_norm (ven_norm)
 );
 
 -- 2. FINANCE DATA
@@ -48,6 +56,7 @@ CREATE TABLE IF NOT EXISTS fin_data (
     F_Routing_No VARCHAR(50),                               -- Routing number (for inter-bank)
     F_Receiving_AC_No VARCHAR(50),                          -- Receiving account number
     F_Credit_Amount DECIMAL(18,2),                          -- Credit amount (should match bank deposit)
+    F_Credit_Amount_paisa BIGINT,                           -- Credit amount in paisa (exact, for matching)
     F_Receiver_Name VARCHAR(255),                           -- Name of payment receiver
     F_Bank_Name VARCHAR(255),                               -- Receiver's bank name
     F_Branch_Name VARCHAR(255),                             -- Receiver's bank branch name
@@ -70,6 +79,9 @@ CREATE TABLE IF NOT EXISTS fin_data (
     F_Concern VARCHAR(255),                                 -- Concern
 
     fin_ven VARCHAR(100),                                   -- Vendor/party name in finance
+    ven_norm VARCHAR(100),                                  -- fin_ven upper-cased and stripped (match key)
+    ven_fuzzy VARCHAR(100),                                 -- fin_ven with punctuation collapsed (fuzzy match key)
+    vch_digits VARCHAR(255),                                -- Digits of F_Voucher_No (match key)
 
     input_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,          -- When the row was inserted
 
@@ -78,7 +90,10 @@ CREATE TABLE IF NOT EXISTS fin_data (
     bf_date_matched DATETIME DEFAULT NULL,                  -- Date/time of Bank-Finance match
 
     bft_is_matched TINYINT DEFAULT 0,                       -- Matched in Bank-Finance-Tally stage
-    bft_date_matched DATETIME DEFAULT NULL                  -- Date/time of Bank-Finance-Tally match
+    bft_date_matched DATETIME DEFAULT NULL,                 -- Date/time of Bank-Finance-Tally match
+
+    INDEX idx_fin_ven_norm (ven_norm),
+    INDEX idx_fin_vch_digits (vch_digits)
 );
 
 -- 3. TALLY DATA
@@ -101,8 +116,12 @@ CREATE TABLE IF NOT EXISTS tally_data (
     T_Vch_No VARCHAR(255),                                  -- Voucher number
     T_Debit DECIMAL(18,2),                                  -- Debit amount
     T_Credit DECIMAL(18,2),                                 -- Credit amount
+    T_Debit_paisa BIGINT,                                   -- Debit amount in paisa (exact, for matching)
+    T_Credit_paisa BIGINT,                                  -- Credit amount in paisa (exact, for matching)
 
     tally_ven TEXT,                                         -- Tally ledger vendor/party
+    cheque_ref VARCHAR(100),                                -- Cheque ref extracted at upload ('' = none found)
+    vch_digits VARCHAR(255),                                -- Digits of T_Vch_No (match key)
 
     input_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,          -- When the row was inserted
 
@@ -111,7 +130,10 @@ CREATE TABLE IF NOT EXISTS tally_data (
     bft_date_matched DATETIME DEFAULT NULL,                 -- Date/time of Bank-Finance-Tally match
 
     bt_is_matched TINYINT DEFAULT 0,                        -- Matched in Bank-Tally stage
-    bt_date_matched DATETIME DEFAULT NULL                   -- Date/time of Bank-Tally match
+    bt_date_matched DATETIME DEFAULT NULL,                  -- Date/time of Bank-Tally match
+
+    INDEX idx_tally_cheque_ref (cheque_ref),
+    INDEX idx_tally_vch_digits (vch_digits)
 );
 
 -- 4. BANK-FIN MATCHED DATA
@@ -139,6 +161,8 @@ CREATE TABLE IF NOT EXISTS bf_matched (
     B_Withdrawal DECIMAL(18,2),
     B_Deposit DECIMAL(18,2),
     B_Balance DECIMAL(18,2),
+    B_Withdrawal_paisa BIGINT,
+    B_Deposit_paisa BIGINT,
     bank_ven VARCHAR(100),
 
     -- Finance columns (mirrored from fin_data)
@@ -147,6 +171,7 @@ CREATE TABLE IF NOT EXISTS bf_matched (
     F_Routing_No VARCHAR(50),
     F_Receiving_AC_No VARCHAR(50),
     F_Credit_Amount DECIMAL(18,2),
+    F_Credit_Amount_paisa BIGINT,
     F_Receiver_Name VARCHAR(255),
     F_Bank_Name VARCHAR(255),
     F_Branch_Name VARCHAR(255),
@@ -169,6 +194,12 @@ CREATE TABLE IF NOT EXISTS bf_matched (
     F_Concern VARCHAR(255),
     fin_ven VARCHAR(100),
 
+    -- Stored match keys (mirrored from the source tables)
+    cheque_ref VARCHAR(100),
+    ven_norm VARCHAR(100),
+    ven_fuzzy VARCHAR(100),
+    vch_digits VARCHAR(255),
+
     input_date DATETIME DEFAULT NULL,                        -- When the row was inserted (carried from source)
 
     -- Bank-Fin-Tally match flags (for further BFT reconciliation)
@@ -213,6 +244,8 @@ CREATE TABLE IF NOT EXISTS bft_matched (
     B_Withdrawal DECIMAL(18,2),
     B_Deposit DECIMAL(18,2),
     B_Balance DECIMAL(18,2),
+    B_Withdrawal_paisa BIGINT,
+    B_Deposit_paisa BIGINT,
     bank_ven VARCHAR(100),
 
     -- Finance columns (mirrored from fin_data)
@@ -221,6 +254,7 @@ CREATE TABLE IF NOT EXISTS bft_matched (
     F_Routing_No VARCHAR(50),
     F_Receiving_AC_No VARCHAR(50),
     F_Credit_Amount DECIMAL(18,2),
+    F_Credit_Amount_paisa BIGINT,
     F_Receiver_Name VARCHAR(255),
     F_Bank_Name VARCHAR(255),
     F_Branch_Name VARCHAR(255),
@@ -254,8 +288,16 @@ CREATE TABLE IF NOT EXISTS bft_matched (
     T_Vch_No VARCHAR(255),
     T_Debit DECIMAL(18,2),
     T_Credit DECIMAL(18,2),
+    T_Debit_paisa BIGINT,
+    T_Credit_paisa BIGINT,
     tally_ven TEXT,
 
+    -- Stored match keys (mirrored from the source tables)
+    cheque_ref VARCHAR(100),
+    ven_norm VARCHAR(100),
+    ven_fuzzy VARCHAR(100),
+    vch_digits VARCHAR(255),
+
     input_date DATETIME DEFAULT NULL,                        -- When the row was inserted (carried from source)
 
     bf_is_matched TINYINT DEFAULT 0,                        -- Matched in Bank-Finance stage
@@ -274,6 +316,7 @@ CREATE TABLE IF NOT EXISTS bt_matched (
 
     bt_match_id VARCHAR(50),                                -- Unique match group ID for Bank-Tally match
     bt_source VARCHAR(50),                                  -- Source: 'Bank' or 'Tally'
+    bt_match_type VARCHAR(32),                              -- Match type ('cheque ref' or 'cheque ref (token)')
     cheque_ref VARCHAR(50),                                 -- Cheque/reference number used for match
 
     -- Bank columns (mirrored from bank_data)
@@ -292,6 +335,8 @@ CREATE TABLE IF NOT EXISTS bt_matched (
     B_Withdrawal DECIMAL(18,2),
     B_Deposit DECIMAL(18,2),
     B_Balance DECIMAL(18,2),
+    B_Withdrawal_paisa BIGINT,
+    B_Deposit_paisa BIGINT,
     bank_ven VARCHAR(100),
 
     -- Tally columns (mirrored from tally_data)
@@ -304,9 +349,16 @@ CREATE TABLE IF NOT EXISTS bt_matched (
     T_Vch_No VARCHAR(255),
     T_Debit DECIMAL(18,2),
     T_Credit DECIMAL(18,2),
+    T_Debit_paisa BIGINT,
+    T_Credit_paisa BIGINT,
     tally_ven TEXT,
     unit_name VARCHAR(255),
 
+    -- Stored match keys (mirrored from the source tables)
+    ven_norm VARCHAR(100),
+    ven_fuzzy VARCHAR(100),
+    vch_digits VARCHAR(255),
+
     input_date DATETIME DEFAULT NULL,                        -- When the row was inserted (carried from source)
 
     bf_is_matched TINYINT DEFAULT 0,                        -- Matched in Bank-Finance stage
@@ -318,3 +370,40 @@ CREATE TABLE IF NOT EXISTS bt_matched (
     bt_is_matched TINYINT DEFAULT 0,                        -- Matched in Bank-Tally stage
     bt_date_matched DATETIME DEFAULT NULL                   -- Date/time of Bank-Tally match
 );
+
+-- 7. BANK-FIN INCREMENTAL WATERMARKS
+CREATE TABLE IF NOT EXISTS bf_watermark (
+    bank_code VARCHAR(4) NOT NULL,                          -- Short code for the bank
+    acct_no VARCHAR(20) NOT NULL,                           -- Bank account number
+
+    last_bank_id INT DEFAULT 0,                             -- Highest bank_data.bank_id seen by the last run
+    last_fin_id INT DEFAULT 0,                              -- Highest fin_data.fin_id seen by the last run
+    last_input_date DATETIME DEFAULT NULL,                  -- Latest input_date seen by the last run
+    last_run_tag VARCHAR(50),                               -- run_tag of the last run
+    updated_at DATETIME DEFAULT NULL,                       -- When the watermark last moved
+
+    PRIMARY KEY (bank_code, acct_no)
+);
+
+-- 8. VENDOR ALIAS REGISTRY
+CREATE TABLE IF NOT EXISTS vendor_alias (
+    alias_id INT AUTO_INCREMENT PRIMARY KEY,
+    bank_code VARCHAR(4) NOT NULL,                          -- Short code for the bank
+    bank_vendor VARCHAR(255) NOT NULL,                      -- Vendor name as it appears on the bank side (upper-case)
+    fin_vendor VARCHAR(255) NOT NULL,                       -- Vendor name to match on the finance side (upper-case)
+    updated_at DATETIME DEFAULT NULL,                       -- When the alias was last written
+
+    UNIQUE KEY uq_vendor_alias (bank_code, bank_vendor)
+);
+
+CREATE TABLE IF NOT EXISTS vendor_alias_version (
+    id TINYINT PRIMARY KEY,                                 -- Always 1
+    version INT NOT NULL DEFAULT 0,                         -- Bumped on every vendor_alias write
+    updated_at DATETIME DEFAULT NULL
+);
+
+INSERT IGNORE INTO vendor_alias (bank_code, bank_vendor, fin_vendor, updated_at) VALUES
+    ('MDB', 'JOYNALANDSONS', 'JOYNALSONS', NOW()),
+    ('MDB', 'TALIANDCO', 'TALICO', NOW()),
+    ('MTB', 'BANKVENDOR', 'FINVENDORALIAS', NOW());
+INSERT IGNORE INTO vendor_alias_version (id, version, updated_at) VALUES (1, 1, NOW());
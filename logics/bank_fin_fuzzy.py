@@ -0,0 +1,78 @@
+# logics/bank_fin_fuzzy.py
+
+import pandas as pd
+from logics.bank_fin_hash_join import probe_days
+
+FUZZY_THRESHOLD = 0.7  # Suggested minimum trigram Dice similarity when the fuzzy stage is turned on
+
+
+def trigrams(key):
+    if not key:
+        return frozenset()
+    return frozenset(key[i:i + 3] for i in range(len(key) - 2))
+
+
+def build_trigram_index(finance_df, vendor_col='_vendor_fuzzy', amt_col='_norm_paisa', day_col='_norm_day'):
+    """
+    Inverted trigram index blocked by amount and day: (amount, day, trigram) -> finance labels
+    in finance_df order. Also returns label -> trigram count for scoring.
+    """
+    index = {}
+    sizes = {}
+    for label, key, amt, day in zip(finance_df.index, finance_df[vendor_col], finance_df[amt_col], finance_df[day_col]):
+        grams = trigrams(key)
+        if not grams or pd.isna(amt) or pd.isna(day):
+            continue
+        sizes[label] = len(grams)
+        for gram in grams:
+            index.setdefault((amt, day, gram), []).append(label)
+    return index, sizes
+
+
+def fuzzy_match_one_to_one(bank_df, finance_df, available, threshold=FUZZY_THRESHOLD, vendor_col='_vendor_fuzzy',
+                           amt_col='_norm_paisa', day_col='_norm_day', fresh_bank=None, fresh_fin=None,
+                           stats=None):
+    """
+    1-to-1 match on amount and probe day where the vendor names are only similar.
+
+    Only finance rows with the bank row's exact amount on one of its probe days are
+    scored; the score is the Dice coefficient of the vendor trigram sets. The best
+    available candidate at or above `threshold` wins, ties going to the earliest
+    finance row. `available` is updated in place. Candidate counts go to `stats` if given.
+
+    Returns (pairs, unmatched_bank_labels) where pairs is a list of (bank_label, finance_label, score).
+    """
+    index, sizes = build_trigram_index(finance_df, vendor_col, amt_col, day_col)
+    fin_pos = {label: pos for pos, label in enumerate(finance_df.index)}
+    incremental = fresh_bank is not None and fresh_fin is not None
+
+    pairs = []
+    unmatched = []
+    for b_label, key, amt, days in zip(bank_df.index, bank_df[vendor_col], bank_df[amt_col], probe_days(bank_df, day_col)):
+        grams = trigrams(key)
+        shared = {}
+        if grams and not pd.isna(amt):
+            for day in days:
+                for gram in grams:
+                    for f_label in index.get((amt, day, gram), ()):
+                        shared[f_label] = shared.get(f_label, 0) + 1
+        if stats is not None:
+            stats.add_candidates(len(shared))
+
+        best = None
+        best_score = 0.0
+        for f_label, count in shared.items():
+            if f_label not in available:
+                continue
+            if incremental and b_label not in fresh_bank and f_label not in fresh_fin:
+                continue
+            score = 2.0 * count / (len(grams) + sizes[f_label])
+            if score > best_score or (score == best_score and best is not None and fin_pos[f_label] < fin_pos[best]):
+                best, best_score = f_label, score
+
+        if best is None or best_score < threshold:
+            unmatched.append(b_label)
+            continue
+        available.remove(best)
+        pairs.append((b_label, best, best_score))
+    return pairs, unmatched
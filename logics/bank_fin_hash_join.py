@@ -0,0 +1,148 @@
+# logics/bank_fin_hash_join.py
+
+from collections import deque
+import pandas as pd
+from logics.date_window import build_window_index, nearest_in_window
+
+
+def probe_days(bank_df, day_col='_norm_day', prev_day_col='_norm_prev_day'):
+    """
+    Per bank row, the finance days it may match: its own day and, for a posting
+    right after a weekend/holiday, the last business day before the gap.
+    """
+    days = []
+    for day, prev_day in zip(bank_df[day_col], bank_df[prev_day_col]):
+        if pd.isna(day):
+            days.append(())
+        elif pd.isna(prev_day):
+            days.append((day,))
+        else:
+            days.append((day, prev_day))
+    return days
+
+
+def build_finance_index(finance_df, vendor_col, amt_col='_norm_paisa', day_col='_norm_day'):
+    """
+    Hash index over the finance pool: (vendor key, amount, day) -> deque of index labels.
+    Labels are appended in finance_df order so the head of each bucket is the
+    row the old nested loop would have found first.
+    """
+    index = {}
+    for label, ven, amt, day in zip(finance_df.index, finance_df[vendor_col], finance_df[amt_col], finance_df[day_col]):
+        if pd.isna(ven) or pd.isna(amt) or pd.isna(day):
+            continue
+        index.setdefault((ven, amt, day), deque()).append(label)
+    return index
+
+
+def _bucket_head(bucket, available):
+    # Drop labels already consumed by an earlier stage or match
+    while bucket and bucket[0] not in available:
+        bucket.popleft()
+    return bucket[0] if bucket else None
+
+
+def hash_match_one_to_one(bank_df, finance_df, vendor_col, available, amt_col='_norm_paisa', day_col='_norm_day',
+                          fresh_bank=None, fresh_fin=None, stats=None):
+    """
+    1-to-1 match of bank rows against the finance pool with a single index probe per bank row.
+
+    A bank row matches a finance row with the same vendor key and amount on one
+    of its probe_days() (see logics/match_calendar.add_date_keys).
+    Bank rows are served in order and each takes the earliest (in finance_df order)
+    finance row still in `available`, which is updated in place.
+
+    For incremental runs, `fresh_bank` / `fresh_fin` are the labels of rows uploaded
+    since the last run: a bank row outside `fresh_bank` only probes fresh finance rows.
+    Bucket sizes seen per bank row are added to `stats` (a StageStats) if given.
+
+    Returns (pairs, unmatched_bank_labels) where pairs is a list of (bank_label, finance_label).
+    """
+    index = build_finance_index(finance_df, vendor_col, amt_col, day_col)
+    fresh_index = index
+    if fresh_bank is not None and fresh_fin is not None:
+        fresh_index = build_finance_index(
+            finance_df[finance_df.index.isin(fresh_fin)], vendor_col, amt_col, day_col)
+    fin_pos = {label: pos for pos, label in enumerate(finance_df.index)}
+
+    pairs = []
+    unmatched = []
+    for b_label, ven, amt, days in zip(bank_df.index, bank_df[vendor_col], bank_df[amt_col], probe_days(bank_df, day_col)):
+        best = None
+        probe_index = index if fresh_bank is None or b_label in fresh_bank else fresh_index
+        if not (pd.isna(ven) or pd.isna(amt)):
+            seen = 0
+            for day in days:
+                bucket = probe_index.get((ven, amt, day))
+                if not bucket:
+                    continue
+                head = _bucket_head(bucket, available)
+                seen += len(bucket)
+                if head is not None and (best is None or fin_pos[head] < fin_pos[best]):
+                    best = head
+            if stats is not None:
+                stats.add_candidates(seen)
+
+        if best is None:
+            unmatched.append(b_label)
+            continue
+        available.remove(best)
+        pairs.append((b_label, best))
+    return pairs, unmatched
+
+
+def build_candidate_index(finance_df, vendor_col, day_col='_norm_day'):
+    """(vendor key, day) -> finance index labels in finance_df order, for the 1-to-N stages."""
+    index = {}
+    for label, ven, day in zip(finance_df.index, finance_df[vendor_col], finance_df[day_col]):
+        if pd.isna(ven) or pd.isna(day):
+            continue
+        index.setdefault((ven, day), []).append(label)
+    return index
+
+
+def candidate_labels(index, ven, days, available, fin_pos):
+    """Still-available finance labels sharing the vendor key on any of `days`, in finance_df order."""
+    if pd.isna(ven):
+        return []
+    labels = []
+    for day in days:
+        labels += index.get((ven, day), [])
+    if len(days) > 1:
+        labels.sort(key=fin_pos.__getitem__)
+    return [label for label in labels if label in available]
+
+
+def window_match_one_to_one(bank_df, finance_df, vendor_col, available, window, amt_col='_norm_paisa',
+                            day_col='_norm_day', fresh_bank=None, fresh_fin=None, stats=None):
+    """
+    1-to-1 match on vendor key and amount with the finance day up to `window` days
+    either side of the bank day. Finance rows are bucketed by (vendor key, amount)
+    with their days sorted; each bank row takes the available row closest in date
+    (earliest in finance_df order on a tie). `available` is updated in place.
+
+    Returns (pairs, unmatched_bank_labels) like hash_match_one_to_one.
+    """
+    keys = [
+        None if pd.isna(ven) or pd.isna(amt) else (ven, amt)
+        for ven, amt in zip(finance_df[vendor_col], finance_df[amt_col])
+    ]
+    index = build_window_index(keys, finance_df[day_col], finance_df.index)
+    incremental = fresh_bank is not None and fresh_fin is not None
+
+    pairs = []
+    unmatched = []
+    for b_label, ven, amt, day in zip(bank_df.index, bank_df[vendor_col], bank_df[amt_col], bank_df[day_col]):
+        best = None
+        if not (pd.isna(ven) or pd.isna(amt)):
+            if incremental and b_label not in fresh_bank:
+                accept = lambda f_label: f_label in available and f_label in fresh_fin
+            else:
+                accept = available.__contains__
+            best = nearest_in_window(index.get((ven, amt)), day, window, accept, stats)
+        if best is None:
+            unmatched.append(b_label)
+            continue
+        available.remove(best)
+        pairs.append((b_label, best))
+    return pairs, unmatched
@@ -1,46 +1,142 @@
 # logics/bank_fin_match_logic.py
 
 import pandas as pd
-from itertools import combinations
+from logics.bank_fin_hash_join import (
+    hash_match_one_to_one, window_match_one_to_one, build_candidate_index, candidate_labels, probe_days
+)
+from logics.bank_fin_fuzzy import fuzzy_match_one_to_one
+from logics.match_keys import stored_key, vendor_norm, vendor_core, pad_vendor_key
+from logics.match_calendar import add_date_keys
+from logics.match_stats import maybe_stage
+from utils.money import paisa_of
+from utils.vendor_names import vendor_key
+from logics.subset_sum import find_subset_sum, DEFAULT_NODE_BUDGET, DEFAULT_TIME_BUDGET
 
 MAX_FINANCE_COMBO = 10  # Match 10 finance payment records against 1  bank transaction record
+COMBO_NODE_BUDGET = DEFAULT_NODE_BUDGET  # Subset-sum search nodes allowed per bank row
+COMBO_TIME_BUDGET = DEFAULT_TIME_BUDGET  # Subset-sum seconds allowed per bank row
 
-# Bank-specific vendor alias dictionaries: Map inexact bank and finance vendor names (e.g., "ABC & Co." to "ABC and Co.").
-vendor_alias_dicts = {
-    "MDB": {
-        "JOYNALANDSONS": "JOYNALSONS",
-        "TALIANDCO": "TALICO",
-    },
-    "MTB": {
-        "BANKVENDOR": "FINVENDORALIAS",
-    },
-}
-
-def get_vendor_alias(val, bank_type):
-    bank_alias_dict = vendor_alias_dicts.get(bank_type, {})
-    return bank_alias_dict.get(str(val).strip().upper(), str(val).strip().upper())
+BF_MATCH_ID_LEN = 50  # bf_matched.bf_match_id / bft_matched.bf_match_id are VARCHAR(50)
 
-def is_weekend_match(bank_date, fin_date):
-    try:
-        bd = pd.to_datetime(bank_date)
-        fd = pd.to_datetime(fin_date)
-        return bd.strftime('%A') == 'Sunday' and fd.strftime('%A') == 'Thursday'
-    except:
-        return False
+# Per-bank ±N-day tolerance between bank and finance dates for the date-window stage (0 = off)
+DATE_WINDOW_DAYS = {
+    "MDB": 0,
+    "MTB": 0,
+    "PBL": 0,
+}
 
-def normalize_for_match(df, vendor_col, amt_col, date_col, bank_type=None):
+def normalize_for_match(df, vendor_col, amt_col, date_col, aliases=None, holidays=None, letters_digits=False):
+    """
+    Add the matching keys. `aliases` maps normalized bank vendor names to finance
+    vendor names (see utils/vendor_aliases.get_alias_map); pass it for the bank side only.
+    With `letters_digits` the alias key keeps only letters and digits (utils/vendor_names.vendor_key).
+    """
     df = df.copy()  # <--- Add this line at the top to avoid modifying the original DataFrame
-    df['_vendor_first5'] = df[vendor_col].str.upper().str.strip().str[:5]
-    if bank_type is not None:
-        df['_ven_alias'] = df[vendor_col].apply(
-            lambda v: get_vendor_alias(v, bank_type))
+    # Vendor keys stored at upload (ven_norm, ven_fuzzy); computed for rows without them
+    vendors = stored_key(df, 'ven_norm', lambda rows: vendor_norm(rows[vendor_col]))
+    df['_vendor_first5'] = vendors.str[:5]
+    if aliases is not None:
+        aliased = vendors.map(aliases).fillna(vendors)
     else:
-        df['_ven_alias'] = df[vendor_col].str.upper().str.strip()
-    df['_norm_amt'] = pd.to_numeric(df[amt_col], errors='coerce').round(2)
-    df['_norm_date'] = df[date_col]
+        aliased = vendors
+    # Optionally letters and digits only, so 'TALI&CO' and 'TALICO' compare equal
+    df['_ven_alias'] = vendor_key(aliased) if letters_digits else aliased
+    df['_vendor_fuzzy'] = stored_key(
+        df, 'ven_fuzzy', lambda rows: rows[vendor_col].map(vendor_core)).map(pad_vendor_key)
+    df['_norm_paisa'] = paisa_of(df, amt_col)
+    add_date_keys(df, date_col, holidays)
     return df
 
-def bank_fin_match(bank_df, finance_df, config, bank_type, account_number=None, max_combo=MAX_FINANCE_COMBO):
+def _match_one_to_n(bank_df, finance_df, bank_idxs, key_col, available, max_combo, node_budget, time_budget,
+                    fresh_bank=None, fresh_fin=None, stats=None):
+    """
+    For each bank row, find the smallest group of 2..max_combo available finance rows
+    with the same key on one of the bank row's probe days whose amounts
+    add up to the bank amount. Matched finance labels are removed from `available`.
+    As in hash_match_one_to_one, a bank row outside `fresh_bank` only considers finance
+    rows in `fresh_fin`, so every group found touches a row uploaded since the last run.
+    """
+    index = build_candidate_index(finance_df, key_col)
+    fin_pos = {label: pos for pos, label in enumerate(finance_df.index)}
+    fin_paisa = finance_df['_norm_paisa']
+    bank_days = probe_days(bank_df.loc[bank_idxs])
+
+    groups = []
+    unmatched = []
+    for b_idx, days in zip(bank_idxs, bank_days):
+        target = bank_df.at[b_idx, '_norm_paisa']
+        candidates = [
+            f_idx for f_idx in candidate_labels(index, bank_df.at[b_idx, key_col], days, available, fin_pos)
+            if not pd.isna(fin_paisa[f_idx])
+        ]
+        if fresh_bank is not None and fresh_fin is not None and b_idx not in fresh_bank:
+            candidates = [f_idx for f_idx in candidates if f_idx in fresh_fin]
+        if stats is not None:
+            stats.add_candidates(len(candidates))
+        combo = None
+        if not pd.isna(target) and len(candidates) >= 2:
+            combo = find_subset_sum(
+                [int(fin_paisa[f_idx]) for f_idx in candidates], int(target),
+                max_r=max_combo, node_budget=node_budget, time_budget=time_budget, stats=stats)
+        if combo is None:
+            unmatched.append(b_idx)
+            continue
+        f_idxs = [candidates[pos] for pos in combo]
+        for f_idx in f_idxs:
+            available.remove(f_idx)
+        groups.append((b_idx, f_idxs))
+    return groups, unmatched
+
+# Prefixes of the helper columns normalize_for_match/add_date_keys add (_vendor_first5, _ven_alias, _norm_paisa, ...)
+HELPER_COLUMN_PREFIXES = ('_vendor_', '_ven_alias', '_norm_')
+
+def helper_columns(df):
+    """The matching helper columns present in df, to drop before writing it out."""
+    return [c for c in df.columns if str(c).startswith(HELPER_COLUMN_PREFIXES)]
+
+def _log_match(match_log, b_idx, f_idxs, match_type):
+    """Record one bank row and its finance rows under the next match number."""
+    last_id = match_log['bf_match_id'][-1] if match_log['bf_match_id'] else "0"
+    bf_match_id = f"{int(last_id) + 1:04}"
+    for source, label in [('Bank', b_idx)] + [('Finance', f_idx) for f_idx in f_idxs]:
+        match_log['bf_match_id'].append(bf_match_id)
+        match_log['source'].append(source)
+        match_log['match_type'].append(match_type)
+        match_log['label'].append(label)
+
+def _materialize_matches(match_log, bank_out, fin_out):
+    """Build the matched frame from the match log with one take per side, in log order."""
+    log = pd.DataFrame(match_log)
+    if log.empty:
+        return pd.DataFrame(columns=['bf_match_id', 'source', 'match_type'])
+    parts = []
+    for source, side in (('Bank', bank_out), ('Finance', fin_out)):
+        rows = log[log['source'] == source]
+        taken = side.take(side.index.get_indexer(rows['label'])).set_index(rows.index)
+        parts.append(pd.concat([rows[['bf_match_id', 'source', 'match_type']], taken], axis=1))
+    return pd.concat(parts).sort_index().reset_index(drop=True)
+
+def bank_fin_match(bank_df, finance_df, config, bank_type, account_number=None, max_combo=MAX_FINANCE_COMBO,
+                   combo_node_budget=COMBO_NODE_BUDGET, combo_time_budget=COMBO_TIME_BUDGET, holidays=None,
+                   bank_is_new=None, fin_is_new=None, stats=None):
+    """
+    Match bank withdrawals to finance payments: 1-to-1, then 1-to-N sums, on the
+    vendor first-5 key and then on the vendor alias key. When config['fuzzy_threshold']
+    is given (e.g. FUZZY_THRESHOLD), a last stage pairs 1-to-1 on amount and date with a
+    vendor trigram similarity of at least that much; it is off by default.
+    Before the fuzzy stage, a date-window stage pairs rows on vendor key and amount
+    up to config['date_window'] days apart (default DATE_WINDOW_DAYS[bank_type]).
+    The alias stages use config['vendor_aliases'] (normalized bank vendor -> finance vendor);
+    with config['alias_letters_digits'] their key also ignores everything but letters and
+    digits (off by default).
+
+    For an incremental run pass `bank_is_new` / `fin_is_new` (boolean Series aligned
+    with the inputs, True for rows uploaded since the last run); pairs and groups made
+    only of previously seen rows are then not evaluated again. A previously seen bank
+    row is only tried against new finance rows, in every stage.
+
+    Pass a MatchStats as `stats` to collect per-stage timings and candidate counts.
+    """
     # Filter finance_df by Sender Bank if the column exists
     if 'F_Sender_Bank' in finance_df.columns:
         finance_df = finance_df[finance_df['F_Sender_Bank'] == bank_type]
@@ -53,182 +149,126 @@ def bank_fin_match(bank_df, finance_df, config, bank_type, account_number=None,
     fin_amt_col = 'F_Credit_Amount' if 'F_Credit_Amount' in finance_df.columns else 'Amount'
     fin_date_col = 'F_Payment_Date' if 'F_Payment_Date' in finance_df.columns else 'Date'
     fin_vendor_col = 'fin_ven' if 'fin_ven' in finance_df.columns else 'Vendor'
-    bank_df = normalize_for_match(
-        bank_df, bank_vendor_col, bank_amt_col, bank_date_col, bank_type)
-    finance_df = normalize_for_match(
-        finance_df, fin_vendor_col, fin_amt_col, fin_date_col, None)
+    fuzzy_threshold = config.get('fuzzy_threshold')
+    date_window = config.get('date_window', DATE_WINDOW_DAYS.get(bank_type, 0))
+    letters_digits = config.get('alias_letters_digits', False)
+    with maybe_stage(stats, 'normalize', len(bank_df) + len(finance_df)) as st:
+        bank_df = normalize_for_match(
+            bank_df, bank_vendor_col, bank_amt_col, bank_date_col, config.get('vendor_aliases', {}), holidays,
+            letters_digits)
+        finance_df = normalize_for_match(
+            finance_df, fin_vendor_col, fin_amt_col, fin_date_col, None, holidays, letters_digits)
+        st.rows_out = st.rows_in
+
+    fresh_bank = fresh_fin = None
+    if bank_is_new is not None and fin_is_new is not None:
+        fresh_bank = set(bank_df.index[bank_is_new.reindex(bank_df.index, fill_value=True).to_numpy(dtype=bool)])
+        fresh_fin = set(finance_df.index[fin_is_new.reindex(finance_df.index, fill_value=True).to_numpy(dtype=bool)])
 
-    matched_rows = []
-    unmatched_bank_idxs = []
+    match_log = {'bf_match_id': [], 'source': [], 'match_type': [], 'label': []}
     unmatched_finance_idxs = set(finance_df.index)
-    match_id_counter = 1
-
-    # 1-to-1 direct match loop
-    for b_idx, b_row in bank_df.iterrows():
-        match_found = False
-        for f_idx, f_row in finance_df.iterrows():
-            if f_idx not in unmatched_finance_idxs:
-                continue
-            is_weekend = is_weekend_match(
-                b_row[bank_date_col], f_row[fin_date_col])
-            if (
-                b_row['_vendor_first5'] == f_row['_vendor_first5']
-                and b_row['_norm_amt'] == f_row['_norm_amt']
-                and (b_row['_norm_date'] == f_row['_norm_date'] or is_weekend)
-            ):
-                bf_match_id = f"{match_id_counter:04}"
-                matched_rows.append({
-                    'bf_match_id': bf_match_id, 'source': 'Bank', 'match_type': '1 to 1',
-                    **b_row.drop([c for c in b_row.index if c.startswith('_vendor_') or c.startswith('_ven_alias') or c.startswith('_norm_')]).to_dict()
-                })
-                matched_rows.append({
-                    'bf_match_id': bf_match_id, 'source': 'Finance', 'match_type': '1 to 1',
-                    **f_row.drop([c for c in f_row.index if c.startswith('_vendor_') or c.startswith('_ven_alias') or c.startswith('_norm_')]).to_dict()
-                })
-                unmatched_finance_idxs.remove(f_idx)
-                match_id_counter += 1
-                match_found = True
-                break
-        if not match_found:
-            unmatched_bank_idxs.append(b_idx)
-
-    # 1-to-N direct sum matching loop
-    unmatched_bank_idxs_1ton = []
-    for b_idx in unmatched_bank_idxs:
-        b_row = bank_df.loc[b_idx]
-        candidates = [
-            f_idx for f_idx in unmatched_finance_idxs
-            if (b_row['_vendor_first5'] == finance_df.loc[f_idx, '_vendor_first5'] and
-                (b_row['_norm_date'] == finance_df.loc[f_idx, '_norm_date'] or
-                 is_weekend_match(b_row[bank_date_col], finance_df.loc[f_idx, fin_date_col])))
-        ]
-        found_combo = False
-        for r in range(2, max_combo + 1):
-            for combo in combinations(candidates, r):
-                amt_sum = sum([finance_df.loc[f_idx, '_norm_amt']
-                              for f_idx in combo])
-                if pd.isna(amt_sum) or pd.isna(b_row['_norm_amt']):
-                    continue
-                if round(amt_sum, 2) == round(b_row['_norm_amt'], 2):
-                    bf_match_id = f"{match_id_counter:04}"
-                    matched_rows.append({
-                        'bf_match_id': bf_match_id, 'source': 'Bank', 'match_type': f'1 to {r}',
-                        **b_row.drop([c for c in b_row.index if c.startswith('_vendor_') or c.startswith('_ven_alias') or c.startswith('_norm_')]).to_dict()
-                    })
-                    for f_idx in combo:
-                        matched_rows.append({
-                            'bf_match_id': bf_match_id, 'source': 'Finance', 'match_type': f'1 to {r}',
-                            **finance_df.loc[f_idx].drop([c for c in finance_df.columns if c.startswith('_vendor_') or c.startswith('_ven_alias') or c.startswith('_norm_')]).to_dict()
-                        })
-                        unmatched_finance_idxs.remove(f_idx)
-                    match_id_counter += 1
-                    found_combo = True
-                    break
-            if found_combo:
-                break
-        if not found_combo:
-            unmatched_bank_idxs_1ton.append(b_idx)
-
-    # 1-to-1 vendor alias matching loop
-    still_unmatched_bank_idxs = []
-    for b_idx in unmatched_bank_idxs_1ton:
-        b_row = bank_df.loc[b_idx]
-        match_found = False
-        for f_idx in list(unmatched_finance_idxs):
-            f_row = finance_df.loc[f_idx]
-            is_weekend = is_weekend_match(
-                b_row[bank_date_col], f_row[fin_date_col])
-            if (
-                b_row['_ven_alias'] == f_row['_ven_alias']
-                and b_row['_norm_amt'] == f_row['_norm_amt']
-                and (b_row['_norm_date'] == f_row['_norm_date'] or is_weekend)
-            ):
-                bf_match_id = f"{match_id_counter:04}"
-                matched_rows.append({
-                    'bf_match_id': bf_match_id, 'source': 'Bank', 'match_type': '1 to 1 (alias)',
-                    **b_row.drop([c for c in b_row.index if c.startswith('_vendor_') or c.startswith('_ven_alias') or c.startswith('_norm_')]).to_dict()
-                })
-                matched_rows.append({
-                    'bf_match_id': bf_match_id, 'source': 'Finance', 'match_type': '1 to 1 (alias)',
-                    **f_row.drop([c for c in f_row.index if c.startswith('_vendor_') or c.startswith('_ven_alias') or c.startswith('_norm_')]).to_dict()
-                })
-                unmatched_finance_idxs.remove(f_idx)
-                match_id_counter += 1
-                match_found = True
-                break
-        if not match_found:
-            still_unmatched_bank_idxs.append(b_idx)
-
-    # 1-to-N vendor alias sum matching loop
-    unmatched_bank_idxs_alias_1ton = []
-    for b_idx in still_unmatched_bank_idxs:
-        b_row = bank_df.loc[b_idx]
-        candidates = [
-            f_idx for f_idx in unmatched_finance_idxs
-            if (b_row['_ven_alias'] == finance_df.loc[f_idx, '_ven_alias'] and
-                (b_row['_norm_date'] == finance_df.loc[f_idx, '_norm_date'] or
-                 is_weekend_match(b_row[bank_date_col], finance_df.loc[f_idx, fin_date_col])))
-        ]
-        found_combo = False
-        for r in range(2, max_combo + 1):
-            for combo in combinations(candidates, r):
-                amt_sum = sum([finance_df.loc[f_idx, '_norm_amt']
-                              for f_idx in combo])
-                if pd.isna(amt_sum) or pd.isna(b_row['_norm_amt']):
-                    continue
-                if round(amt_sum, 2) == round(b_row['_norm_amt'], 2):
-                    bf_match_id = f"{match_id_counter:04}"
-                    matched_rows.append({
-                        'bf_match_id': bf_match_id, 'source': 'Bank', 'match_type': f'1 to {r} (alias)',
-                        **b_row.drop([c for c in b_row.index if c.startswith('_vendor_') or c.startswith('_ven_alias') or c.startswith('_norm_')]).to_dict()
-                    })
-                    for f_idx in combo:
-                        matched_rows.append({
-                            'bf_match_id': bf_match_id, 'source': 'Finance', 'match_type': f'1 to {r} (alias)',
-                            **finance_df.loc[f_idx].drop([c for c in finance_df.columns if c.startswith('_vendor_') or c.startswith('_ven_alias') or c.startswith('_norm_')]).to_dict()
-                        })
-                        unmatched_finance_idxs.remove(f_idx)
-                    match_id_counter += 1
-                    found_combo = True
-                    break
-            if found_combo:
-                break
-        if not found_combo:
-            unmatched_bank_idxs_alias_1ton.append(b_idx)
-
-    unmatched_bank = [
-        bank_df.loc[idx].drop([c for c in bank_df.columns if c.startswith(
-            '_vendor_') or c.startswith('_ven_alias') or c.startswith('_norm_')]).to_dict()
-        for idx in unmatched_bank_idxs_alias_1ton
-    ]
-    unmatched_finance = [
-        finance_df.loc[idx].drop([c for c in finance_df.columns if c.startswith(
-            '_vendor_') or c.startswith('_ven_alias') or c.startswith('_norm_')]).to_dict()
-        for idx in unmatched_finance_idxs
-    ]
+
+    # 1-to-1 direct match: one hash-index probe per bank row
+    with maybe_stage(stats, '1 to 1', len(bank_df)) as st:
+        pairs, unmatched_bank_idxs = hash_match_one_to_one(
+            bank_df, finance_df, '_vendor_first5', unmatched_finance_idxs,
+            fresh_bank=fresh_bank, fresh_fin=fresh_fin, stats=st)
+        for b_idx, f_idx in pairs:
+            _log_match(match_log, b_idx, [f_idx], '1 to 1')
+        st.rows_out = len(pairs)
+
+    # 1-to-N direct sum matching: bounded subset-sum over same-vendor, same-day candidates
+    with maybe_stage(stats, '1 to N', len(unmatched_bank_idxs)) as st:
+        groups, unmatched_bank_idxs_1ton = _match_one_to_n(
+            bank_df, finance_df, unmatched_bank_idxs, '_vendor_first5', unmatched_finance_idxs,
+            max_combo, combo_node_budget, combo_time_budget, fresh_bank, fresh_fin, stats=st)
+        for b_idx, f_idxs in groups:
+            _log_match(match_log, b_idx, f_idxs, f'1 to {len(f_idxs)}')
+        st.rows_out = len(groups)
+
+    # 1-to-1 vendor alias match: same hash-index probe on the alias key
+    with maybe_stage(stats, '1 to 1 (alias)', len(unmatched_bank_idxs_1ton)) as st:
+        pairs, still_unmatched_bank_idxs = hash_match_one_to_one(
+            bank_df.loc[unmatched_bank_idxs_1ton], finance_df, '_ven_alias', unmatched_finance_idxs,
+            fresh_bank=fresh_bank, fresh_fin=fresh_fin, stats=st)
+        for b_idx, f_idx in pairs:
+            _log_match(match_log, b_idx, [f_idx], '1 to 1 (alias)')
+        st.rows_out = len(pairs)
+
+    # 1-to-N vendor alias sum matching
+    with maybe_stage(stats, '1 to N (alias)', len(still_unmatched_bank_idxs)) as st:
+        groups, unmatched_bank_idxs_alias_1ton = _match_one_to_n(
+            bank_df, finance_df, still_unmatched_bank_idxs, '_ven_alias', unmatched_finance_idxs,
+            max_combo, combo_node_budget, combo_time_budget, fresh_bank, fresh_fin, stats=st)
+        for b_idx, f_idxs in groups:
+            _log_match(match_log, b_idx, f_idxs, f'1 to {len(f_idxs)} (alias)')
+        st.rows_out = len(groups)
+
+    # 1-to-1 date-window match: closest finance date within ±date_window days, direct key then alias
+    if date_window:
+        for key_col, label in (('_vendor_first5', ''), ('_ven_alias', ' alias')):
+            stage_name = f'1 to 1 ({date_window}d window{label})'
+            with maybe_stage(stats, stage_name, len(unmatched_bank_idxs_alias_1ton)) as st:
+                pairs, unmatched_bank_idxs_alias_1ton = window_match_one_to_one(
+                    bank_df.loc[unmatched_bank_idxs_alias_1ton], finance_df, key_col, unmatched_finance_idxs,
+                    date_window, fresh_bank=fresh_bank, fresh_fin=fresh_fin, stats=st)
+                for b_idx, f_idx in pairs:
+                    _log_match(match_log, b_idx, [f_idx], stage_name)
+                st.rows_out = len(pairs)
+
+    # 1-to-1 fuzzy vendor match: blocked by amount and day, scored by trigram overlap
+    if fuzzy_threshold is not None:
+        with maybe_stage(stats, '1 to 1 (fuzzy)', len(unmatched_bank_idxs_alias_1ton)) as st:
+            pairs, unmatched_bank_idxs_alias_1ton = fuzzy_match_one_to_one(
+                bank_df.loc[unmatched_bank_idxs_alias_1ton], finance_df, unmatched_finance_idxs, fuzzy_threshold,
+                fresh_bank=fresh_bank, fresh_fin=fresh_fin, stats=st)
+            for b_idx, f_idx, _ in pairs:
+                _log_match(match_log, b_idx, [f_idx], '1 to 1 (fuzzy)')
+            st.rows_out = len(pairs)
+
+    # Drop helper columns once, then materialize every output with one take per side
+    with maybe_stage(stats, 'materialize', len(match_log['label'])) as st:
+        bank_out = bank_df.drop(columns=helper_columns(bank_df))
+        fin_out = finance_df.drop(columns=helper_columns(finance_df))
+        matched_rows = _materialize_matches(match_log, bank_out, fin_out)
+        unmatched_bank = bank_out.loc[unmatched_bank_idxs_alias_1ton].reset_index(drop=True)
+        unmatched_finance = fin_out[fin_out.index.isin(unmatched_finance_idxs)].reset_index(drop=True)
+        st.rows_out = len(matched_rows)
     return matched_rows, unmatched_bank, unmatched_finance
 
+def bf_match_ids(group_keys, run_tag):
+    """
+    BFM_<run_tag>_NNNN for each row, numbered from 1 in order of first appearance of its
+    group key. Raises ValueError when the ids would not fit in BF_MATCH_ID_LEN characters.
+    """
+    match_no = pd.factorize(pd.Series(group_keys), sort=False)[0] + 1
+    match_ids = pd.Series(match_no, index=pd.Series(group_keys).index).map(lambda n: f"BFM_{run_tag}_{n:04}")
+    if len(match_ids) and match_ids.str.len().max() > BF_MATCH_ID_LEN:
+        raise ValueError(
+            f"Match id {match_ids.iloc[-1]} is longer than the {BF_MATCH_ID_LEN} characters bf_match_id can hold.")
+    return match_ids
+
 def flatten_bf_matches(matched_rows, bank_cols, fin_cols, run_tag=""):
-    records = []
-    match_id_map = {}
-    next_counter = 1
-    for row in matched_rows:
-        orig = row.get("bf_match_id")
-        if orig not in match_id_map:
-            match_id_map[orig] = next_counter
-            next_counter += 1
-        row_match_id = f"BFM_{run_tag}_{match_id_map[orig]:04}" if run_tag else orig
-        record = {
-            "bf_match_id": row_match_id,
-            "bf_source": row.get("source"),
-            "bf_match_type": row.get("match_type", ""),
-        }
-        if row["source"] == "Bank":
-            for col in bank_cols:
-                record[col] = row.get(col, "")
-        elif row["source"] == "Finance":
-            for col in fin_cols:
-                record[col] = row.get(col, "")
-        
-        records.append(record)
-    return pd.DataFrame(records)
+    """
+    Shape bank_fin_match output into bf_matched rows: renumber match ids as
+    BFM_<run_tag>_NNNN in order of first appearance and keep bank columns on
+    Bank rows and finance columns on Finance rows.
+    """
+    if matched_rows.empty:
+        return pd.DataFrame()
+    if run_tag:
+        match_ids = bf_match_ids(matched_rows['bf_match_id'], run_tag)
+    else:
+        match_ids = matched_rows['bf_match_id']
+    meta = pd.DataFrame({
+        'bf_match_id': match_ids,
+        'bf_source': matched_rows['source'],
+        'bf_match_type': matched_rows['match_type'],
+    }, index=matched_rows.index)
+
+    is_bank = (matched_rows['source'] == 'Bank').to_numpy()
+    is_fin = (matched_rows['source'] == 'Finance').to_numpy()
+    bank_part = matched_rows.loc[is_bank].reindex(columns=bank_cols, fill_value="")
+    fin_part = matched_rows.loc[is_fin].reindex(columns=fin_cols, fill_value="")
+    records = pd.concat([bank_part, fin_part]).reindex(matched_rows.index)
+    return pd.concat([meta, records], axis=1).reset_index(drop=True)
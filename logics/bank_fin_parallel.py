@@ -0,0 +1,89 @@
+# logics/bank_fin_parallel.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+from logics.bank_fin_match_logic import bank_fin_match, flatten_bf_matches, bf_match_ids
+from logics.match_stats import MatchStats
+
+# Bank-finance matching never pairs rows across these keys (bank_code is filtered by the caller)
+PARTITION_KEYS = ['acct_no', 'statement_month', 'statement_year']
+
+
+def _partition_key(df, keys):
+    cols = [df[k].astype(str) for k in keys]
+    return cols[0].str.cat(cols[1:], sep='|') if len(cols) > 1 else cols[0]
+
+
+def partition_frames(bank_df, fin_df, keys=PARTITION_KEYS):
+    """
+    Split the unmatched pools into independent (acct_no, statement month) partitions.
+    Only partitions with at least one bank row are returned; finance rows of other
+    partitions cannot match anything in this run.
+    """
+    keys = [k for k in keys if k in bank_df.columns and k in fin_df.columns]
+    if not keys:
+        return [('', bank_df, fin_df)]
+    bank_key = _partition_key(bank_df, keys)
+    fin_key = _partition_key(fin_df, keys)
+    fin_groups = fin_key.groupby(fin_key, sort=False).groups
+    partitions = []
+    for key, idx in bank_key.groupby(bank_key, sort=True).groups.items():
+        partitions.append((key, bank_df.loc[idx], fin_df.loc[fin_groups.get(key, [])]))
+    return partitions
+
+
+def _match_partition(args):
+    """Worker: match one partition and flatten it, keeping the partition's own match numbers."""
+    part_no, bank_df, fin_df, config, bank_code, run_tag, bank_is_new, fin_is_new, with_stats = args
+    stats = MatchStats('bank_fin_match', f"{run_tag}_P{part_no}") if with_stats else None
+    matched_rows, unmatched_bank, unmatched_finance = bank_fin_match(
+        bank_df, fin_df, config, bank_code, bank_is_new=bank_is_new, fin_is_new=fin_is_new, stats=stats)
+    bf_matched_df = flatten_bf_matches(
+        matched_rows, list(bank_df.columns), list(fin_df.columns))
+    return bf_matched_df, len(matched_rows), len(unmatched_bank), len(unmatched_finance), stats
+
+
+def bank_fin_match_parallel(bank_df, fin_df, config, bank_code, run_tag, max_workers=None,
+                            bank_is_new=None, fin_is_new=None, stats=None):
+    """
+    Run bank_fin_match on every partition in a process pool.
+
+    Match ids are numbered once over the merged partitions, as the serial path does
+    (BFM_<run_tag>_NNNN, see bf_match_ids). Returns
+    (bf_matched_df, matched_count, unmatched_bank_count, unmatched_finance_count)
+    with the flattened partitions concatenated in partition order. Finance rows
+    outside every bank partition are not counted as unmatched.
+    Per-partition stage stats are summed into `stats` (stage seconds are worker time).
+    """
+    partitions = partition_frames(bank_df, fin_df)
+    incremental = bank_is_new is not None and fin_is_new is not None
+    jobs = [
+        (part_no, part_bank, part_fin, config, bank_code, run_tag,
+         bank_is_new.loc[part_bank.index] if incremental else None,
+         fin_is_new.loc[part_fin.index] if incremental else None, stats is not None)
+        for part_no, (_, part_bank, part_fin) in enumerate(partitions, 1)
+    ]
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs)) or 1
+    if workers == 1:
+        results = [_match_partition(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_match_partition, jobs))
+
+    frames = [r[0].assign(_part_no=part_no) for part_no, r in enumerate(results, 1) if not r[0].empty]
+    bf_matched_df = pd.DataFrame()
+    if frames:
+        bf_matched_df = pd.concat(frames, ignore_index=True)
+        # Partition-local numbers repeat across partitions; renumber over (partition, number)
+        group_keys = bf_matched_df['_part_no'].astype(str) + '|' + bf_matched_df['bf_match_id'].astype(str)
+        bf_matched_df['bf_match_id'] = bf_match_ids(group_keys, run_tag)
+        bf_matched_df = bf_matched_df.drop(columns='_part_no')
+    matched_count = sum(r[1] for r in results)
+    unmatched_bank_count = sum(r[2] for r in results)
+    unmatched_finance_count = sum(r[3] for r in results)
+    if stats is not None:
+        for r in results:
+            stats.merge(r[4])
+    return bf_matched_df, matched_count, unmatched_bank_count, unmatched_finance_count
@@ -1,92 +1,259 @@
 # logics/bank_fin_tally_match_logic.py
 
 import pandas as pd
-import re
+from collections import deque
 
-def _extract_numeric(val):
-    if pd.isnull(val):
-        return ''
-    return ''.join(re.findall(r'\d+', str(val)))
+from utils.money import paisa_of
+from logics.match_keys import stored_key, voucher_digits
+from logics.match_stats import maybe_stage
+
+def _voucher_keys(df, col):
+    """Voucher digits: vch_digits stored at upload, computed from `col` where missing."""
+    return stored_key(df, 'vch_digits', lambda rows: voucher_digits(rows[col]))
 
 def _get_bank_amount(bank_row):
     if 'B_Withdrawal' not in bank_row:
         raise ValueError("Missing 'B_Withdrawal' column in bank_row.")
-    return float(bank_row['B_Withdrawal'])
+    return bank_row['_paisa']
 
-def bank_fin_tally_match(bf_df, tally_df, bank_code, run_tag=""):
+def build_tally_index(tally_df):
+    """
+    (voucher digits, credit paisa) -> deque of tally_uids in tally_df order, built once per run.
+    Consumed uids are skipped lazily by _first_unused().
+    """
+    index = {}
+    vouchers = _voucher_keys(tally_df, 'T_Vch_No')
+    for uid, vch, amt in zip(tally_df['tally_uid'], vouchers, tally_df['_credit_paisa']):
+        if pd.isna(amt):
+            continue
+        index.setdefault((vch, amt), deque()).append(uid)
+    return index
 
-    tally_df['tally_uid'] = tally_df['tally_uid'].astype(str)
-    tally_df = tally_df.set_index('tally_uid', drop=False)
-    used_tally_uids = set()
+def _first_unused(bucket, used_tally_uids):
+    while bucket and bucket[0] in used_tally_uids:
+        bucket.popleft()
+    return bucket[0] if bucket else None
+
+def bank_fin_tally_match(bf_df, tally_df, bank_code, run_tag="", stats=None, mode='group'):
+    """
+    Match each bf_matched group (one bank row, its finance rows) to tally rows by
+    voucher number digits and credit amount. Pass a MatchStats as `stats` to
+    collect stage timings and candidate counts.
+
+    mode='group' walks the groups one by one; mode='set' resolves all groups with
+    merges and groupby aggregates (see _match_sets) and returns the same rows.
+    """
+    if mode == 'set':
+        return _match_sets(bf_df, tally_df, run_tag, stats)
+    if mode != 'group':
+        raise ValueError(f"Unknown bank_fin_tally_match mode: {mode}")
+
+    with maybe_stage(stats, 'prepare', len(bf_df) + len(tally_df)) as st:
+        tally_df = tally_df.copy()
+        tally_df['tally_uid'] = tally_df['tally_uid'].astype(str)
+        tally_df['_credit_paisa'] = paisa_of(tally_df, 'T_Credit')
+        tally_df = tally_df.set_index('tally_uid', drop=False)
+
+        # One int64 paisa amount per bf row: withdrawal for Bank rows, credit amount for Finance rows
+        bf_df = bf_df.copy()
+        is_bank = bf_df['bf_source'].str.lower() == 'bank'
+        bf_df['_paisa'] = paisa_of(bf_df, 'F_Credit_Amount').where(~is_bank, paisa_of(bf_df, 'B_Withdrawal'))
+        bf_df['_vch'] = _voucher_keys(bf_df, 'F_Voucher_No')
+        tally_index = build_tally_index(tally_df)
+        used_tally_uids = set()
+        st.rows_out = st.rows_in
 
     grouped = bf_df.groupby('bf_match_id')
-    bft_matched_rows = []
-    bft_id_counter = 1
+    with maybe_stage(stats, 'group match', grouped.ngroups) as st:
+        bft_matched_rows = []
+        bft_id_counter = 1
 
-    for _, group in grouped:
-        bank_rows = group[group['bf_source'].str.lower() == 'bank']
-        finance_rows = group[group['bf_source'].str.lower() == 'finance']
+        for _, group in grouped:
+            bank_rows = group[group['bf_source'].str.lower() == 'bank']
+            finance_rows = group[group['bf_source'].str.lower() == 'finance']
 
-        if bank_rows.shape[0] != 1 or finance_rows.shape[0] < 1:
-            continue
+            if bank_rows.shape[0] != 1 or finance_rows.shape[0] < 1:
+                continue
+
+            bank_row = bank_rows.iloc[0]
 
-        bank_row = bank_rows.iloc[0]
-        
-        
-        finance_vouchers = finance_rows['F_Voucher_No'].apply(_extract_numeric)
-        finance_amounts = finance_rows['F_Credit_Amount'].astype(float)
-        bank_amount = _get_bank_amount(bank_row)
-
-        matched_tally_uids = []
-        tally_candidates = tally_df[~tally_df.index.isin(used_tally_uids)].copy()
-        tally_candidates['vch_suffix'] = tally_candidates['T_Vch_No'].apply(_extract_numeric)
-        tally_candidates['T_Credit'] = tally_candidates['T_Credit'].astype(float)
-
-        for vch, amt in zip(finance_vouchers, finance_amounts):
-            tally_match = tally_candidates[
-                (tally_candidates['vch_suffix'] == vch) &
-                (tally_candidates['T_Credit'] == amt)
-            ]
-            if not tally_match.empty:
-                uid = str(tally_match['tally_uid'].iloc[0])
+            finance_vouchers = finance_rows['_vch']
+            finance_amounts = finance_rows['_paisa']
+            bank_amount = _get_bank_amount(bank_row)
+
+            # One dict probe per finance row: the earliest tally row not used by an earlier group
+            matched_tally_uids = []
+            for vch, amt in zip(finance_vouchers, finance_amounts):
+                if pd.isna(amt):
+                    break
+                bucket = tally_index.get((vch, amt))
+                uid = _first_unused(bucket, used_tally_uids) if bucket else None
+                st.add_candidates(len(bucket) if bucket else 0)
+                if uid is None:
+                    break
                 matched_tally_uids.append(uid)
-            else:
-                break
 
-        n_fin = len(finance_rows)
-        n_tally = len(matched_tally_uids)
-        group_sum_fin = finance_amounts.sum()
-        group_sum_tally = tally_df.loc[matched_tally_uids]['T_Credit'].sum() if matched_tally_uids else 0
+            n_fin = len(finance_rows)
+            n_tally = len(matched_tally_uids)
+            group_sum_fin = finance_amounts.sum()
+            group_sum_tally = tally_df.loc[matched_tally_uids]['_credit_paisa'].sum() if matched_tally_uids else 0
 
-        if n_fin == n_tally and abs(group_sum_fin - bank_amount) < 1e-4 and abs(group_sum_tally - bank_amount) < 1e-4:
-            used_tally_uids.update(matched_tally_uids)
-            bft_match_id = f"BFTM_{run_tag}_{bft_id_counter:04d}" if run_tag else f"BFTM_{bft_id_counter:04d}"
+            if n_fin == n_tally and pd.notna(bank_amount) and group_sum_fin == bank_amount and group_sum_tally == bank_amount:
+                used_tally_uids.update(matched_tally_uids)
+                bft_match_id = f"BFTM_{run_tag}_{bft_id_counter:04d}" if run_tag else f"BFTM_{bft_id_counter:04d}"
 
-            bft_match_type = f"1 to {n_fin} to {n_tally}"
+                bft_match_type = f"1 to {n_fin} to {n_tally}"
 
-            bank_out = bank_row.copy()
-            bank_out['bft_match_id'] = bft_match_id
-            bank_out['bft_match_type'] = bft_match_type
-            bank_out['bft_source'] = 'Bank'
-            bft_matched_rows.append(bank_out)
+                bank_out = bank_row.copy()
+                bank_out['bft_match_id'] = bft_match_id
+                bank_out['bft_match_type'] = bft_match_type
+                bank_out['bft_source'] = 'Bank'
+                bft_matched_rows.append(bank_out)
 
-            for _, fin_row in finance_rows.iterrows():
+                for _, fin_row in finance_rows.iterrows():
 
-                fin_out = fin_row.copy()
-                fin_out['bft_match_id'] = bft_match_id
-                fin_out['bft_match_type'] = bft_match_type
-                fin_out['bft_source'] = 'Finance'
-                bft_matched_rows.append(fin_out)
+                    fin_out = fin_row.copy()
+                    fin_out['bft_match_id'] = bft_match_id
+                    fin_out['bft_match_type'] = bft_match_type
+                    fin_out['bft_source'] = 'Finance'
+                    bft_matched_rows.append(fin_out)
 
-            for uid in matched_tally_uids:
-                tally_out = tally_df.loc[uid].copy()
+                for uid in matched_tally_uids:
+                    tally_out = tally_df.loc[uid].copy()
 
-                tally_out['bft_match_id'] = bft_match_id
-                tally_out['bft_match_type'] = bft_match_type
-                tally_out['bft_source'] = 'Tally'
-                bft_matched_rows.append(tally_out)
+                    tally_out['bft_match_id'] = bft_match_id
+                    tally_out['bft_match_type'] = bft_match_type
+                    tally_out['bft_source'] = 'Tally'
+                    bft_matched_rows.append(tally_out)
 
-            bft_id_counter += 1
+                bft_id_counter += 1
+                st.rows_out += 1
 
     bft_matched_df = pd.DataFrame(bft_matched_rows)
-    return bft_matched_df
+    return bft_matched_df.drop(columns=['_paisa', '_vch', '_credit_paisa'], errors='ignore')
+
+def _prepare_sets(bf_df, tally_df):
+    """Per-row keys for the set-based mode: (_vch, _paisa) on finance rows and tally rows."""
+    if 'B_Withdrawal' not in bf_df.columns:
+        raise ValueError("Missing 'B_Withdrawal' column in bank_row.")
+    tally_df = tally_df.copy()
+    tally_df['tally_uid'] = tally_df['tally_uid'].astype(str)
+    tally_df['_credit_paisa'] = paisa_of(tally_df, 'T_Credit')
+    tally_df = tally_df.set_index('tally_uid', drop=False)
+
+    bf_df = bf_df[bf_df['bf_match_id'].notna()].copy()
+    source = bf_df['bf_source'].str.lower()
+    is_bank = source == 'bank'
+    bf_df['_paisa'] = paisa_of(bf_df, 'F_Credit_Amount').where(~is_bank, paisa_of(bf_df, 'B_Withdrawal'))
+    bf_df['_vch'] = _voucher_keys(bf_df, 'F_Voucher_No')
+
+    tally_keys = pd.DataFrame({
+        'tally_uid': tally_df['tally_uid'].to_numpy(),
+        '_vch': _voucher_keys(tally_df, 'T_Vch_No').to_numpy(),
+        '_paisa': tally_df['_credit_paisa'].to_numpy(),
+    })
+    tally_keys = tally_keys[tally_keys['_paisa'].notna()]
+    # Slot k of a key is its k-th tally row in tally_df order
+    tally_keys['_slot'] = tally_keys.groupby(['_vch', '_paisa'], sort=False).cumcount()
+    return bf_df, tally_df, tally_keys, source
+
+def _match_sets(bf_df, tally_df, run_tag, stats):
+    """
+    Set-based BFT matching, equivalent to the group walk:
+
+    - a group is eligible with exactly one bank row, at least one finance row, no
+      missing finance amount and finance total == bank amount (groupby aggregate);
+    - each distinct (voucher digits, amount) key of a group needs one tally row.
+      Groups are taken in bf_match_id order and a group fails when an earlier
+      successful group has used up a key's tally rows. Only keys with more demand
+      than tally rows need that sequential check;
+    - the n-th successful group needing a key gets the key's n-th tally row.
+    """
+    with maybe_stage(stats, 'prepare', len(bf_df) + len(tally_df)) as st:
+        bf_df, tally_df, tally_keys, source = _prepare_sets(bf_df, tally_df)
+        bank = bf_df[source.loc[bf_df.index] == 'bank']
+        fin = bf_df[source.loc[bf_df.index] == 'finance']
+        st.rows_out = len(bank) + len(fin) + len(tally_keys)
+
+    with maybe_stage(stats, 'eligibility', bf_df['bf_match_id'].nunique()) as st:
+        groups = pd.DataFrame({
+            'n_bank': bank.groupby('bf_match_id').size(),
+            'bank_paisa': bank.groupby('bf_match_id')['_paisa'].first(),
+            'n_fin': fin.groupby('bf_match_id').size(),
+            'fin_na': fin['_paisa'].isna().groupby(fin['bf_match_id']).any(),
+            'fin_paisa': fin.groupby('bf_match_id')['_paisa'].sum(),
+        }).sort_index()
+        eligible = (
+            (groups['n_bank'] == 1) & (groups['n_fin'] >= 1) & ~groups['fin_na'].fillna(True).astype(bool)
+            & (groups['fin_paisa'] == groups['bank_paisa'])
+        ).fillna(False).astype(bool)
+        groups = groups[eligible]
+        st.rows_out = len(groups)
+
+    with maybe_stage(stats, 'merge', len(fin)) as st:
+        needs = (fin.loc[fin['bf_match_id'].isin(groups.index), ['bf_match_id', '_vch', '_paisa']]
+                 .drop_duplicates())
+        supply = tally_keys.groupby(['_vch', '_paisa'], sort=False).size().rename('_supply').reset_index()
+        needs = needs.merge(supply, on=['_vch', '_paisa'], how='left')
+        needs['_supply'] = needs['_supply'].fillna(0).astype(int)
+        needs['_demand'] = needs.groupby(['_vch', '_paisa'], sort=False)['bf_match_id'].transform('size')
+        for count in needs['_supply']:
+            st.add_candidates(int(count))
+
+        # Deterministic conflict resolution on over-subscribed keys, in bf_match_id order
+        failed = set()
+        contested_ids = needs.loc[needs['_demand'] > needs['_supply'], 'bf_match_id'].unique()
+        taken = {}
+        for gid, rows in needs[needs['bf_match_id'].isin(contested_ids)].groupby('bf_match_id', sort=True):
+            keys = list(zip(rows['_vch'], rows['_paisa'], rows['_supply']))
+            if all(taken.get((vch, amt), 0) < sup for vch, amt, sup in keys):
+                for vch, amt, _ in keys:
+                    taken[(vch, amt)] = taken.get((vch, amt), 0) + 1
+            else:
+                failed.add(gid)
+        matched_ids = [gid for gid in groups.index if gid not in failed]
+        st.rows_out = len(matched_ids)
+
+    with maybe_stage(stats, 'assemble', len(matched_ids)) as st:
+        if not matched_ids:
+            return pd.DataFrame()
+        group_no = pd.Series(range(len(matched_ids)), index=matched_ids)
+
+        # The n-th successful group needing a key takes that key's n-th tally row
+        needs = needs[needs['bf_match_id'].isin(group_no.index)].copy()
+        needs['_group_no'] = needs['bf_match_id'].map(group_no)
+        needs = needs.sort_values('_group_no', kind='stable')
+        needs['_slot'] = needs.groupby(['_vch', '_paisa'], sort=False).cumcount()
+        needs = needs.merge(tally_keys, on=['_vch', '_paisa', '_slot'], how='left')
+
+        fin_out = fin[fin['bf_match_id'].isin(group_no.index)]
+        fin_uids = fin_out[['bf_match_id', '_vch', '_paisa']].merge(
+            needs[['bf_match_id', '_vch', '_paisa', 'tally_uid']], on=['bf_match_id', '_vch', '_paisa'], how='left'
+        )['tally_uid'].to_numpy()
+        bank_out = bank[bank['bf_match_id'].isin(group_no.index)]
+        tally_out = tally_df.loc[fin_uids]
+
+        n_fin = groups['n_fin']
+        match_ids = pd.Series(
+            [f"BFTM_{run_tag}_{n + 1:04d}" if run_tag else f"BFTM_{n + 1:04d}" for n in range(len(matched_ids))],
+            index=matched_ids)
+        match_types = pd.Series(
+            [f"1 to {int(n_fin[gid])} to {int(n_fin[gid])}" for gid in matched_ids], index=matched_ids)
+
+        parts = []
+        for part_no, (frame, gids, label) in enumerate((
+                (bank_out, bank_out['bf_match_id'], 'Bank'),
+                (fin_out, fin_out['bf_match_id'], 'Finance'),
+                (tally_out, fin_out['bf_match_id'], 'Tally'))):
+            frame = frame.reset_index(drop=True)
+            gids = gids.to_numpy()
+            frame['bft_match_id'] = match_ids.loc[gids].to_numpy()
+            frame['bft_match_type'] = match_types.loc[gids].to_numpy()
+            frame['bft_source'] = label
+            frame['_order'] = list(zip(group_no.loc[gids], [part_no] * len(frame), range(len(frame))))
+            parts.append(frame)
+
+        bft_matched_df = pd.concat(parts, ignore_index=True)
+        bft_matched_df = bft_matched_df.sort_values('_order', kind='stable').reset_index(drop=True)
+        st.rows_out = len(bft_matched_df)
+    return bft_matched_df.drop(columns=['_order', '_paisa', '_vch', '_credit_paisa'], errors='ignore')
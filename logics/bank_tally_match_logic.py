@@ -0,0 +1,392 @@
+# logics/bank_tally_match_logic.py
+
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from utils.money import paisa_of
+from logics.cheque_ref_extract import extract_first_refs, rule_refs
+from logics.date_window import build_window_index, nearest_in_window, day_ordinals
+from logics.match_stats import maybe_stage
+from logics.match_keys import stored_key
+from logics.cheque_token_index import row_tokens, match_ref_tokens, TOKEN_MIN_IDF
+
+# --- Per-bank cheque matching specs ---
+# bank/tally: which column holds the reference and the extraction rules, tried in order
+#   ("prefix" rules, MDB slash-segment rules, MTB nth-number rules, or a regex "pattern").
+# normalize: applied to every extracted ref ("lstrip_zeros" or None).
+# withdrawal_amount: "exact" matches B_Withdrawal == T_Credit, "abs" uses abs(B_Withdrawal).
+# A new bank only needs an entry here.
+CHEQUE_SPECS = {
+    "MDB": {
+        "bank": {
+            "column": "B_Particulars",
+            "rules": [
+                {"prefix": "on-line cashca", "min_digits": 5},
+                {"prefix": "clg- inwardca", "min_digits": 5},
+                {"dynamic_prefix": "RTGS RTGS Outward",
+                 "extract_between_nth_and_mth_slash": [2, 3], "min_digits": 5},
+                {"dynamic_prefix": "RTGS RTGS INWARD",
+                 "extract_between_nth_and_mth_slash": [2, 3], "min_digits": 5},
+                {"dynamic_prefix": "CLG HV",
+                 "extract_between_nth_and_mth_slash": [3, 4], "min_digits": 5}
+            ]
+        },
+        "tally": {
+            "column": "T_Particulars",
+            "rules": [
+                {"prefix": "cq-", "min_digits": 5},
+                {"prefix": "Cheque No : C ", "min_digits": 5},
+                {"prefix": "A/C-", "min_digits": 5},
+                {"prefix": "CD-", "min_digits": 5},
+                {"prefix": "STD-", "min_digits": 5},
+                {"prefix": "OD#", "min_digits": 5},
+                {"prefix": "CQ-", "min_digits": 5},
+                {"prefix": "(Hypo)-", "min_digits": 5},
+                {"prefix": "SND-", "min_digits": 5}
+            ]
+        },
+        "normalize": None,
+        "withdrawal_amount": "exact",
+        "id_prefix": "BTM",
+    },
+    "MTB": {
+        "bank": {
+            "column": "B_Particulars",
+            "rules": [
+                {"prefix": "LC ISSUE CHARGE :", "min_digits": 5},
+                {
+                    "dynamic_prefix": "number to number",
+                    "extract_after_nth_number": 2,
+                    "min_digits": 5
+                },
+                {
+                    "dynamic_prefix": "USD",
+                    "extract_after_nth_number": 1,
+                    "min_digits": 5
+                },
+                {
+                    "dynamic_prefix": "ACCEPTANCE COMM",
+                    "extract_after_nth_slash": 3,
+                    "min_digits": 5
+                }
+            ]
+        },
+        "tally": {
+            "column": "T_Particulars",
+            "rules": [
+                {"prefix": "$", "min_digits": 5},
+                {"prefix": "cq-", "min_digits": 5},
+                {"prefix": "A/C-", "min_digits": 5},
+                {"prefix": "CD-", "min_digits": 5},
+                {"prefix": "STD-", "min_digits": 5},
+                {"prefix": "OD#", "min_digits": 5},
+                {"prefix": "CQ-", "min_digits": 5},
+                {"prefix": "(Hypo)-", "min_digits": 5},
+                {"prefix": "GULC#", "min_digits": 5}
+            ]
+        },
+        "normalize": "lstrip_zeros",
+        "withdrawal_amount": "exact",
+        "id_prefix": "BTM",
+    },
+    "PBL": {
+        # Long reference codes such as LD2503320442, FT25032KBLVY, PDLD2404274823
+        "bank": {
+            "column": "B_Ref_Cheque",
+            "rules": [{"pattern": r'\b([A-Z]{2,}[0-9]{6,}[A-Z0-9]*)\b'}]
+        },
+        "tally": {
+            "column": "T_Particulars",
+            "rules": [{"pattern": r'\b([A-Z]{2,}[0-9]{6,}[A-Z0-9]*)\b'}]
+        },
+        "normalize": None,
+        "withdrawal_amount": "abs",
+        "id_prefix": "PTM",
+    },
+}
+
+# Columns shared by every bank
+DEFAULT_SPEC = {
+    "withdrawal_column": "B_Withdrawal",
+    "deposit_column": "B_Deposit",
+    "bank_date_column": "B_Date",
+    "debit_column": "T_Debit",
+    "credit_column": "T_Credit",
+    "tally_date_column": "T_Date",
+    "date_window_days": None,   # ±N days between bank and tally dates; None = dates not checked
+    # Fallback for rows the rules left unmatched: a rare shared token in these columns + amount.
+    # Looser than the rules, so off unless a bank's spec or the request turns it on.
+    "token_fallback": False,
+    "token_columns": {"bank": ["B_Particulars", "B_Ref_Cheque"], "tally": ["T_Particulars"]},
+    "token_min_idf": TOKEN_MIN_IDF,
+}
+
+MATCH_TYPE_REF = 'cheque ref'
+MATCH_TYPE_TOKEN = 'cheque ref (token)'
+
+NORMALIZERS = {
+    None: None,
+    "lstrip_zeros": lambda ref: ref.lstrip('0') if isinstance(ref, str) else ref,
+}
+
+CHEQUE_REF_STRIP = r'[\s,-]'
+
+
+class CompiledChequeSpec:
+    """A bank's spec with defaults filled in and its extractors/normalizer resolved."""
+
+    def __init__(self, bank_code, spec):
+        self.bank_code = bank_code
+        self.spec = {**DEFAULT_SPEC, **spec}
+        if self.spec["normalize"] not in NORMALIZERS:
+            raise ValueError(f"Unknown cheque-ref normalizer for {bank_code}: {self.spec['normalize']}")
+        if self.spec["withdrawal_amount"] not in ("exact", "abs"):
+            raise ValueError(f"Unknown withdrawal_amount rule for {bank_code}: {self.spec['withdrawal_amount']}")
+        self.normalize = NORMALIZERS[self.spec["normalize"]]
+
+    def __getitem__(self, key):
+        return self.spec[key]
+
+    def extract(self, side, texts):
+        """Cheque refs for a column of bank or tally texts, normalized; None where nothing matched."""
+        refs = extract_first_refs(texts, self.spec[side]["rules"], CHEQUE_REF_STRIP, rule_refs)
+        if self.normalize:
+            refs = refs.map(self.normalize).astype(object)
+        return refs.where(refs.notna(), None)
+
+
+@lru_cache(maxsize=None)
+def compile_cheque_spec(bank_code):
+    """The compiled spec for a bank code (cached for the process); KeyError if unsupported."""
+    return CompiledChequeSpec(bank_code, CHEQUE_SPECS[bank_code])
+
+
+def supports_cheque_matching(bank_code):
+    return bank_code in CHEQUE_SPECS
+
+
+def _has_ref(refs):
+    return (refs.notna() & (refs != '')).to_numpy(dtype=bool)
+
+
+def _directional_keys(refs, has_ref, amounts):
+    """Rows that can match in one direction: position, ref and non-zero paisa amount."""
+    pos = np.flatnonzero(has_ref & (amounts != 0))
+    return pd.DataFrame({'pos': pos, 'ref': refs[pos], 'amt': amounts[pos]})
+
+
+def _rank_join(bank_keys, tally_keys):
+    """
+    One-to-one join on (ref, amt): the k-th bank row with a key takes the k-th tally row
+    with it, both in input order, so every tally row is used at most once.
+    """
+    if bank_keys.empty or tally_keys.empty:
+        return np.empty((0, 2), dtype='int64')
+    bank_keys = bank_keys.assign(rank=bank_keys.groupby(['ref', 'amt'], sort=False).cumcount())
+    tally_keys = tally_keys.assign(rank=tally_keys.groupby(['ref', 'amt'], sort=False).cumcount())
+    joined = bank_keys.merge(tally_keys, on=['ref', 'amt', 'rank'], suffixes=('_bank', '_tally'))
+    return joined[['pos_bank', 'pos_tally']].to_numpy(dtype='int64')
+
+
+def _with_keys(keys, key_set):
+    """Mask of `keys` rows whose (ref, amt) is in `key_set` (a deduplicated frame)."""
+    hits = keys[['ref', 'amt']].merge(key_set.assign(_hit=True), on=['ref', 'amt'], how='left')
+    return hits['_hit'].notna().to_numpy()
+
+
+def build_amount_index(tally_keys):
+    """(cheque_ref, paisa) -> deque of tally positions in tally order."""
+    index = {}
+    for pos, ref, amt in zip(tally_keys['pos'], tally_keys['ref'], tally_keys['amt']):
+        index.setdefault((ref, amt), deque()).append(pos)
+    return index
+
+
+def _first_unused(bucket, used):
+    if bucket is None:
+        return None
+    while bucket and bucket[0] in used:
+        bucket.popleft()
+    return bucket[0] if bucket else None
+
+
+def _match_exact(bank_refs, bank_has_ref, withdrawals, deposits,
+                 tally_refs, tally_has_ref, tally_credits, tally_debits, st):
+    """
+    Exact-amount pairs (bank position, tally position), same result as taking, for each
+    bank row in order, the earliest unused tally row with its ref and amount.
+
+    Withdrawal->credit and deposit->debit are each a rank join. Only keys linked across
+    directions, by a bank row with both a withdrawal and a deposit or a tally row with
+    both a credit and a debit, need the ordered walk, which runs over those rows alone.
+    """
+    bank_credit = _directional_keys(bank_refs, bank_has_ref, withdrawals)
+    bank_debit = _directional_keys(bank_refs, bank_has_ref, deposits)
+    tally_credit = _directional_keys(tally_refs, tally_has_ref, tally_credits)
+    tally_debit = _directional_keys(tally_refs, tally_has_ref, tally_debits)
+    both_bank = np.intersect1d(bank_credit['pos'], bank_debit['pos'])
+    both_tally = np.intersect1d(tally_credit['pos'], tally_debit['pos'])
+
+    pairs = []
+    walk = []
+    for bank_keys, tally_keys in ((bank_credit, tally_credit), (bank_debit, tally_debit)):
+        linked = pd.concat([
+            bank_keys.loc[bank_keys['pos'].isin(both_bank), ['ref', 'amt']],
+            tally_keys.loc[tally_keys['pos'].isin(both_tally), ['ref', 'amt']],
+        ]).drop_duplicates()
+        bank_hit = _with_keys(bank_keys, linked)
+        tally_hit = _with_keys(tally_keys, linked)
+        st.add_candidates(len(tally_keys))
+        pairs.append(_rank_join(bank_keys[~bank_hit], tally_keys[~tally_hit]))
+        walk.append((bank_keys[bank_hit], build_amount_index(tally_keys[tally_hit])))
+
+    # Ordered walk over the linked keys only
+    (credit_rows, credit_index), (debit_rows, debit_index) = walk
+    used_tally = set()
+    walked = []
+    for i in np.union1d(credit_rows['pos'], debit_rows['pos']):
+        ref = bank_refs[i]
+        credit_bucket = credit_index.get((ref, withdrawals[i])) if withdrawals[i] else None
+        debit_bucket = debit_index.get((ref, deposits[i])) if deposits[i] else None
+        found = [j for j in (_first_unused(credit_bucket, used_tally),
+                             _first_unused(debit_bucket, used_tally)) if j is not None]
+        if found:
+            j = min(found)
+            walked.append((i, j))
+            used_tally.add(j)
+    pairs.append(np.array(walked, dtype='int64').reshape(-1, 2))
+
+    pairs = np.concatenate(pairs)
+    return pairs[np.argsort(pairs[:, 0], kind='stable')]
+
+
+def _match_window(bank_refs, bank_has_ref, withdrawals, deposits, bank_days,
+                  tally_window_index, tally_credits, tally_debits, date_window, st):
+    """Pairs for the date-window mode: per bank row in order, the nearest accepted tally row."""
+    pairs = []
+    used_tally = set()
+    for i in np.flatnonzero(bank_has_ref):
+        withdrawal = int(withdrawals[i])
+        deposit = int(deposits[i])
+
+        def accept(j):
+            if j in used_tally:
+                return False
+            return bool((withdrawal and withdrawal == tally_credits[j])
+                        or (deposit and deposit == tally_debits[j]))
+        j = nearest_in_window(tally_window_index.get(bank_refs[i]), bank_days[i], date_window, accept, st)
+        if j is not None:
+            pairs.append((i, j))
+            used_tally.add(j)
+    return np.array(pairs, dtype='int64').reshape(-1, 2)
+
+
+def _pair_frame(bank_df, tally_df, pairs, id_prefix, run_tag, start_id, match_types):
+    """
+    bt_matched rows: for each pair its bank row then its tally row, sharing one
+    bt_match_id and its bt_match_type.
+    """
+    tag = f"{id_prefix}_{run_tag}_" if run_tag else f"{id_prefix}_"
+    match_ids = [f"{tag}{n:04d}" for n in range(start_id, start_id + len(pairs))]
+    bank_part = bank_df.iloc[pairs[:, 0]].assign(bt_match_id=match_ids, bt_source='Bank',
+                                                  bt_match_type=match_types)
+    tally_part = tally_df.iloc[pairs[:, 1]].assign(bt_match_id=match_ids, bt_source='Tally',
+                                                    bt_match_type=match_types)
+    frame = pd.concat([bank_part, tally_part], ignore_index=True)
+    order = np.empty(2 * len(pairs), dtype='int64')
+    order[0::2] = np.arange(len(pairs))
+    order[1::2] = np.arange(len(pairs)) + len(pairs)
+    return frame.iloc[order].reset_index(drop=True)
+
+
+def match_cheques(bank_code, bank_df, tally_df, start_id=1, run_tag="", date_window=None, stats=None,
+                  token_fallback=None):
+    """
+    Cheque matching for any bank in CHEQUE_SPECS, on unmatched rows only. Each bank row
+    with a reference takes the first unused tally row (in tally order) with the same
+    reference and an exact paisa amount following direction: withdrawal == T_Credit or
+    deposit == T_Debit. With a date window, the tally row closest in date within
+    ±date_window days is taken instead.
+    Rows still unmatched then go through the token fallback (see match_ref_tokens) on the
+    spec's token_columns, within the same date window if any, when the spec or
+    token_fallback (which overrides it) turns it on; it is off by default. Its pairs carry the shared token as cheque_ref.
+    Returns the bt_matched rows as a DataFrame, bank row then tally row per match,
+    rule matches first; stage stats go to `stats` (MatchStats) if given.
+    """
+    spec = compile_cheque_spec(bank_code)
+    bank_df = bank_df[bank_df['bf_is_matched'] == 0].copy()
+    tally_df = tally_df[tally_df['bft_is_matched'] == 0].copy()
+
+    with maybe_stage(stats, 'extract refs', len(bank_df) + len(tally_df)) as st:
+        # cheque_ref is stored at upload; only rows without it are extracted here
+        bank_df['cheque_ref'] = stored_key(
+            bank_df, 'cheque_ref', lambda rows: spec.extract('bank', rows[spec['bank']['column']]))
+        tally_df['cheque_ref'] = stored_key(
+            tally_df, 'cheque_ref', lambda rows: spec.extract('tally', rows[spec['tally']['column']]))
+        bank_has_ref = _has_ref(bank_df['cheque_ref'])
+        tally_has_ref = _has_ref(tally_df['cheque_ref'])
+        st.rows_out = int(bank_has_ref.sum() + tally_has_ref.sum())
+
+    with maybe_stage(stats, 'index', len(tally_df)) as st:
+        # Exact integer paisa amounts (missing -> 0)
+        withdrawals = paisa_of(bank_df, spec['withdrawal_column']).fillna(0).to_numpy(dtype='int64')
+        if spec['withdrawal_amount'] == 'abs':
+            withdrawals = np.abs(withdrawals)
+        deposits = paisa_of(bank_df, spec['deposit_column']).fillna(0).to_numpy(dtype='int64')
+        tally_credits = paisa_of(tally_df, spec['credit_column']).fillna(0).to_numpy(dtype='int64')
+        tally_debits = paisa_of(tally_df, spec['debit_column']).fillna(0).to_numpy(dtype='int64')
+        bank_refs = bank_df['cheque_ref'].to_numpy(dtype=object)
+        tally_refs = tally_df['cheque_ref'].to_numpy(dtype=object)
+
+        if date_window is None:
+            date_window = spec['date_window_days']
+        if date_window is not None:
+            bank_days = day_ordinals(bank_df[spec['bank_date_column']]).tolist()
+            tally_window_index = build_window_index(
+                np.where(tally_has_ref, tally_refs, None),
+                day_ordinals(tally_df[spec['tally_date_column']]), range(len(tally_df)))
+            st.rows_out = len(tally_window_index)
+
+    with maybe_stage(stats, 'match', len(bank_df)) as st:
+        if date_window is None:
+            pairs = _match_exact(bank_refs, bank_has_ref, withdrawals, deposits,
+                                 tally_refs, tally_has_ref, tally_credits, tally_debits, st)
+        else:
+            pairs = _match_window(bank_refs, bank_has_ref, withdrawals, deposits, bank_days,
+                                  tally_window_index, tally_credits, tally_debits, date_window, st)
+        st.rows_out = len(pairs)
+
+    if token_fallback is None:
+        token_fallback = spec['token_fallback']
+    token_pairs = np.empty((0, 2), dtype='int64')
+    shared_tokens = []
+    if token_fallback:
+        bank_left = np.setdiff1d(np.arange(len(bank_df)), pairs[:, 0])
+        tally_left = np.setdiff1d(np.arange(len(tally_df)), pairs[:, 1])
+        with maybe_stage(stats, 'token fallback', len(bank_left)) as st:
+            if date_window is not None:
+                tally_days = day_ordinals(tally_df[spec['tally_date_column']]).tolist()
+
+            def near(i, j):
+                return (not pd.isna(bank_days[i]) and not pd.isna(tally_days[j])
+                        and abs(bank_days[i] - tally_days[j]) <= date_window)
+            token_pairs, shared_tokens = match_ref_tokens(
+                row_tokens(bank_df, spec['token_columns']['bank']),
+                row_tokens(tally_df, spec['token_columns']['tally']),
+                bank_left, tally_left, withdrawals, deposits, tally_credits, tally_debits,
+                spec['token_min_idf'], near if date_window is not None else None, st)
+            st.rows_out = len(token_pairs)
+
+    with maybe_stage(stats, 'materialize', 2 * (len(pairs) + len(token_pairs))) as st:
+        matched = _pair_frame(bank_df, tally_df, pairs, spec['id_prefix'], run_tag, start_id,
+                              MATCH_TYPE_REF)
+        if len(token_pairs):
+            token_matched = _pair_frame(bank_df, tally_df, token_pairs, spec['id_prefix'], run_tag,
+                                        start_id + len(pairs), MATCH_TYPE_TOKEN)
+            token_matched['cheque_ref'] = np.repeat(np.array(shared_tokens, dtype=object), 2)
+            matched = pd.concat([matched, token_matched], ignore_index=True)
+        st.rows_out = len(matched)
+    return matched
@@ -0,0 +1,139 @@
+# logics/cheque_ref_extract.py
+
+import re
+from functools import lru_cache
+import pandas as pd
+
+
+@lru_cache(maxsize=None)
+def compile_prefix_rules(prefix_rules):
+    """
+    (scanner, rules) for a prefix list given as a tuple of (prefix, min_digits).
+    `scanner` is an alternation of the prefixes inside a lookahead, so one finditer
+    pass visits every position where any prefix starts, overlapping ones included.
+    `rules` holds one `prefix + "([\\d\\- ]{min,})"` regex per rule, tried only at those positions.
+    """
+    prefixes = sorted({prefix for prefix, _ in prefix_rules}, key=len, reverse=True)
+    scanner = re.compile("(?=" + "|".join(re.escape(prefix) for prefix in prefixes) + ")", re.IGNORECASE)
+    rules = [
+        re.compile(rf"{re.escape(prefix)}([\d\- ]{{{min_digits},}})", re.DOTALL | re.IGNORECASE)
+        for prefix, min_digits in prefix_rules
+    ]
+    return scanner, rules
+
+
+def prefix_rule_hits(texts, prefix_rules):
+    """
+    What `re.search(prefix + "([\\d\\- ]{min,})")` captures for every rule in every text,
+    as a DataFrame with one column r<i> per rule (None where the rule has no hit). Each
+    text is scanned once; a rule's hit is the first prefix position where it matches.
+
+    This stays a loop over the texts: one str.extractall over a combined pattern (an
+    optional lookahead per prefix) gives the same hits but measured about 2x slower on
+    60k narrations with the 9-rule MDB/MTB tally specs (1.0s vs 0.5s), and level with
+    this loop for the 1- and 2-rule bank specs.
+    """
+    scanner, rules = compile_prefix_rules(prefix_rules)
+    hits = [[None] * len(texts) for _ in rules]
+    for row, text in enumerate(texts):
+        pending = range(len(rules))
+        for start in scanner.finditer(text):
+            missed = []
+            for i in pending:
+                hit = rules[i].match(text, start.start())
+                if hit:
+                    hits[i][row] = hit.group(1)
+                else:
+                    missed.append(i)
+            pending = missed
+            if not pending:
+                break
+    return pd.DataFrame({f"r{i}": pd.Series(col, index=texts.index, dtype=object) for i, col in enumerate(hits)})
+
+
+def first_valid(columns):
+    """Row-wise first non-null value across candidate Series in priority order, else None."""
+    result = pd.Series(None, index=columns[0].index, dtype=object) if columns else None
+    for col in reversed(columns):
+        result = col.astype(object).where(col.notna(), result)
+    return result.where(result.notna(), None)
+
+
+def extract_first_refs(values, prefixes, strip_pattern, dynamic_refs=None):
+    """
+    Vectorized "first rule wins" cheque-ref extraction over a column of narrations.
+
+    'prefix' rules are all evaluated in one scan per narration (prefix_rule_hits); a
+    hit is cleaned with `strip_pattern` and wins even if nothing is left. Any other rule
+    is handed to `dynamic_refs(texts, rule)`, which returns a Series with None where the
+    rule does not apply, so the next rule is tried.
+    """
+    texts = pd.Series(values, dtype=object).map(str)
+    if texts.empty:
+        return pd.Series(dtype=object, index=texts.index)
+    prefix_rules = tuple((p['prefix'], p['min_digits']) for p in prefixes if 'prefix' in p)
+    found = prefix_rule_hits(texts, prefix_rules) if prefix_rules else None
+
+    columns = []
+    k = 0
+    for rule in prefixes:
+        if 'prefix' in rule:
+            columns.append(found[f"r{k}"].str.replace(strip_pattern, '', regex=True))
+            k += 1
+        elif dynamic_refs is not None:
+            columns.append(dynamic_refs(texts, rule))
+    if not columns:
+        return pd.Series(None, index=texts.index, dtype=object)
+    return first_valid(columns)
+
+
+def nth_segment(texts, n):
+    """The n-th (0-based) non-blank '/'-separated segment of each text, None when there are fewer."""
+    segments = []
+    for text in texts:
+        parts = [seg for seg in text.split("/") if seg.strip()]
+        segments.append(parts[n] if len(parts) > n else None)
+    return pd.Series(segments, index=texts.index, dtype=object)
+
+
+def slash_segment_refs(texts, rule, strip_pattern=r'[\s,-]'):
+    """
+    'extract_between_nth_and_mth_slash' rule: for narrations starting with the rule's
+    dynamic_prefix, the cleaned n-th '/' segment if it is at least min_digits long.
+    """
+    n, _m = rule["extract_between_nth_and_mth_slash"]
+    starts = texts.str.lower().str.startswith(rule["dynamic_prefix"].lower())
+    values = nth_segment(texts[starts], n).dropna().astype(str).str.replace(strip_pattern, '', regex=True)
+    values = values[values.str.len() >= rule['min_digits']]
+    return values.reindex(texts.index)
+
+
+def nth_number_refs(texts, rule, strip_pattern=r'[\s,-]'):
+    """
+    'extract_after_nth_number' / 'extract_after_nth_slash' rule: the nth run of at least
+    min_digits digits/commas, optionally looked for only in the nth '/' segment.
+    The rule's dynamic_prefix is descriptive only; it is not checked against the text.
+    """
+    if "extract_after_nth_slash" in rule:
+        texts = nth_segment(texts, rule["extract_after_nth_slash"])
+    min_digits = rule.get("min_digits", 5)
+    nth = rule.get("extract_after_nth_number", 1)
+    numbers = texts.dropna().str.findall(rf"[\d,]{{{min_digits},}}").str[nth - 1].dropna().astype(str)
+    values = numbers.str.replace(strip_pattern, '', regex=True)
+    return values[values.str.len() > 0].reindex(texts.index)
+
+
+def pattern_refs(texts, rule):
+    """'pattern' rule: the first capture group of a case-sensitive regex, uncleaned."""
+    return texts.str.extract(rule["pattern"], expand=False)
+
+
+def rule_refs(texts, rule):
+    """Dispatch a non-prefix extraction rule to its column extractor by the keys it carries."""
+    if "pattern" in rule:
+        return pattern_refs(texts, rule)
+    if "extract_between_nth_and_mth_slash" in rule:
+        return slash_segment_refs(texts, rule)
+    if "extract_after_nth_number" in rule or "extract_after_nth_slash" in rule:
+        return nth_number_refs(texts, rule)
+    raise ValueError(f"Unknown cheque-ref extraction rule: {rule}")
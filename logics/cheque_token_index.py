@@ -0,0 +1,139 @@
+# logics/cheque_token_index.py
+
+import math
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+TOKEN_MIN_LEN = 5
+TOKEN_MAX_LEN = 50              # width of bt_matched.cheque_ref
+TOKEN_MIN_IDF = math.log(51)    # ln(1 + N/df): ignore tokens on more than 1 in 50 rows
+TOKEN_ALWAYS_RARE = 2           # tokens on this few rows are kept even in small pools
+
+_WORD = re.compile(r'[A-Z0-9]+')
+_DIGITS = re.compile(r'\d+')
+
+
+def ref_tokens(text):
+    """
+    Reference-like tokens of one narration, as a frozenset:
+    - digit runs with leading zeros stripped, also inside words ('CQ0012345' -> '12345')
+    - upper-case alphanumeric words containing a digit ('LD2503320442')
+    Only tokens of TOKEN_MIN_LEN..TOKEN_MAX_LEN characters are kept.
+    """
+    if text is None or (not isinstance(text, str) and pd.isna(text)):
+        return frozenset()
+    tokens = set()
+    for word in _WORD.findall(str(text).upper()):
+        for run in _DIGITS.findall(word):
+            run = run.lstrip('0')
+            if TOKEN_MIN_LEN <= len(run) <= TOKEN_MAX_LEN:
+                tokens.add(run)
+        if not word.isdigit() and TOKEN_MIN_LEN <= len(word) <= TOKEN_MAX_LEN and _DIGITS.search(word):
+            tokens.add(word)
+    return frozenset(tokens)
+
+
+def row_tokens(df, columns):
+    """The union of ref_tokens() over `columns` (those present in df), one frozenset per row."""
+    values = [df[col].tolist() for col in columns if col in df.columns]
+    if not values:
+        return [frozenset()] * len(df)
+    return [frozenset().union(*map(ref_tokens, row)) for row in zip(*values)]
+
+
+def token_idf(token_rows, min_idf=TOKEN_MIN_IDF):
+    """
+    token -> idf, ln(1 + N/df) over a pool of token sets, for tokens rare enough to match
+    on: idf >= min_idf, or found on at most TOKEN_ALWAYS_RARE rows.
+    """
+    counts = Counter(token for tokens in token_rows for token in tokens)
+    n = len(token_rows)
+    idf = {}
+    for token, count in counts.items():
+        weight = math.log(1 + n / count)
+        if weight >= min_idf or count <= TOKEN_ALWAYS_RARE:
+            idf[token] = weight
+    return idf
+
+
+def build_token_index(token_rows, positions, idf):
+    """Inverted index over a pool: rare token -> positions holding it, in pool order."""
+    index = {}
+    for pos in positions:
+        for token in token_rows[pos]:
+            if token in idf:
+                index.setdefault(token, []).append(pos)
+    return index
+
+
+def _amount_texts(*amounts):
+    """Rupee and paisa digits of non-zero paisa amounts; such tokens are the amount, not a reference."""
+    texts = set()
+    for amt in amounts:
+        if amt:
+            texts.add(str(abs(int(amt)) // 100))
+            texts.add(str(abs(int(amt))))
+    return texts
+
+
+def match_ref_tokens(bank_tokens, tally_tokens, bank_rows, tally_rows, withdrawals, deposits,
+                     tally_credits, tally_debits, min_idf=TOKEN_MIN_IDF, near=None, stats=None):
+    """
+    Fallback 1-to-1 match on a shared rare reference token plus an exact paisa amount
+    (withdrawal == credit or deposit == debit), for bank/tally positions left unmatched.
+
+    Token rarity is judged on both unmatched pools, so a token common on either side
+    (an account number, a branch code) is never used. Tokens equal to the amount itself
+    are ignored. Bank rows go in order; each takes the unused tally row with the
+    highest summed idf of shared tokens, ties going to the earliest tally row.
+    `near(i, j)`, if given, must also accept the pair (e.g. a date window).
+    Candidate counts go to `stats` if given.
+
+    Returns (pairs, tokens): an (n, 2) array of (bank position, tally position) and
+    the highest-idf shared token of each pair.
+    """
+    tally_idf = token_idf([tally_tokens[j] for j in tally_rows], min_idf)
+    bank_idf = token_idf([bank_tokens[i] for i in bank_rows], min_idf)
+    idf = {token: weight for token, weight in tally_idf.items() if token in bank_idf}
+    index = build_token_index(tally_tokens, tally_rows, idf)
+
+    pairs = []
+    tokens = []
+    used_tally = set()
+    for i in bank_rows:
+        withdrawal = int(withdrawals[i])
+        deposit = int(deposits[i])
+        if not withdrawal and not deposit:
+            continue
+        amount_texts = _amount_texts(withdrawal, deposit)
+        scores = {}
+        # Sorted so float sums and the reported token do not depend on set order
+        for token in sorted(bank_tokens[i]):
+            if token not in index or token in amount_texts:
+                continue
+            for j in index[token]:
+                score, best_token = scores.get(j, (0.0, None))
+                if best_token is None or idf[token] > idf[best_token]:
+                    best_token = token
+                scores[j] = (score + idf[token], best_token)
+        if stats is not None:
+            stats.add_candidates(len(scores))
+
+        best = None
+        for j, (score, token) in scores.items():
+            if j in used_tally:
+                continue
+            if not ((withdrawal and withdrawal == tally_credits[j]) or (deposit and deposit == tally_debits[j])):
+                continue
+            if near is not None and not near(i, j):
+                continue
+            if best is None or score > best[1] or (score == best[1] and j < best[0]):
+                best = (j, score, token)
+        if best is not None:
+            pairs.append((i, best[0]))
+            tokens.append(best[2])
+            used_tally.add(best[0])
+    return np.array(pairs, dtype='int64').reshape(-1, 2), tokens
@@ -0,0 +1,70 @@
+# logics/date_window.py
+
+import numpy as np
+import pandas as pd
+
+
+def build_window_index(keys, days, labels):
+    """
+    Bucket rows by key with their day ordinals sorted: key -> (days, labels, ranks).
+    Rows whose key is None or whose day is missing are left out. Within a day, rows
+    keep their input order; the input position is the rank used for tie-breaking.
+    """
+    buckets = {}
+    for rank, (key, day, label) in enumerate(zip(keys, days, labels)):
+        if key is None or pd.isna(day):
+            continue
+        buckets.setdefault(key, []).append((int(day), rank, label))
+    index = {}
+    for key, rows in buckets.items():
+        rows.sort()
+        index[key] = (np.fromiter((r[0] for r in rows), dtype='int64', count=len(rows)),
+                      [r[2] for r in rows], [r[1] for r in rows])
+    return index
+
+
+def nearest_in_window(entry, day, window, accept, stats=None):
+    """
+    The accepted label in a bucket whose day is closest to `day`, at most `window` days
+    away; ties go to the lowest rank (earliest input row). Walks outward from the
+    searchsorted position, so only rows inside the window are looked at.
+    The window size is added to `stats` (a StageStats) as the candidate count if given.
+    """
+    if entry is None or pd.isna(day):
+        return None
+    days, labels, ranks = entry
+    day = int(day)
+    lo = int(np.searchsorted(days, day - window, side='left'))
+    hi = int(np.searchsorted(days, day + window, side='right'))
+    if stats is not None:
+        stats.add_candidates(hi - lo)
+    if lo >= hi:
+        return None
+    left = int(np.searchsorted(days, day, side='left')) - 1
+    right = left + 1
+    while left >= lo or right < hi:
+        dist_left = day - days[left] if left >= lo else window + 1
+        dist_right = days[right] - day if right < hi else window + 1
+        dist = min(dist_left, dist_right)
+        best = None
+        # Collect every accepted row at this distance on both sides, then keep the lowest rank
+        while left >= lo and day - days[left] == dist:
+            if (best is None or ranks[left] < ranks[best]) and accept(labels[left]):
+                best = left
+            left -= 1
+        while right < hi and days[right] - day == dist:
+            if (best is None or ranks[right] < ranks[best]) and accept(labels[right]):
+                best = right
+            right += 1
+        if best is not None:
+            return labels[best]
+    return None
+
+
+def day_ordinals(values):
+    """Dates -> Int64 day ordinals (days since epoch), <NA> where unparseable."""
+    dates = pd.to_datetime(pd.Series(values), errors='coerce').dt.normalize()
+    days = dates.values.astype('datetime64[D]')
+    missing = np.isnat(days)
+    ordinals = np.where(missing, np.datetime64('1970-01-01'), days).astype('int64')
+    return pd.Series(pd.arrays.IntegerArray(ordinals, missing), index=getattr(values, 'index', None))
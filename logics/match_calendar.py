@@ -0,0 +1,50 @@
+# logics/match_calendar.py
+
+import numpy as np
+import pandas as pd
+
+# Bangladesh banking week: Friday and Saturday are off
+WEEKMASK = "Sun Mon Tue Wed Thu"
+
+# Bank holidays (YYYY-MM-DD). A bank posting on the first business day after a
+# holiday may match a finance payment dated on the last business day before it.
+BANK_HOLIDAYS = [
+    # "2025-03-26",
+]
+
+
+def _holiday_array(holidays):
+    if holidays is None:
+        holidays = BANK_HOLIDAYS
+    return np.array(pd.to_datetime(list(holidays)).values, dtype='datetime64[D]')
+
+
+def add_date_keys(df, date_col, holidays=None):
+    """
+    Parse `date_col` once and add the day-level join keys used by the matchers:
+
+    - _norm_date:      parsed date (datetime64, NaT when unparseable)
+    - _norm_day:       day ordinal (days since epoch, <NA> when missing)
+    - _norm_weekday:   0 = Monday .. 6 = Sunday
+    - _norm_prev_day:  for a business day that follows a weekend/holiday, the
+                       ordinal of the last business day before the gap
+                       (Sunday -> Thursday); <NA> otherwise
+
+    A bank row on day D matches finance rows on _norm_day == D or _norm_day == _norm_prev_day.
+    """
+    dates = pd.to_datetime(df[date_col], errors='coerce').dt.normalize()
+    days = dates.values.astype('datetime64[D]')
+    hol = _holiday_array(holidays)
+
+    missing = np.isnat(days)
+    safe_days = np.where(missing, np.datetime64('1970-01-01'), days)
+    is_busday = np.is_busday(safe_days, weekmask=WEEKMASK, holidays=hol)
+    prev_cal = safe_days - np.timedelta64(1, 'D')
+    prev_bus = np.busday_offset(prev_cal, 0, roll='backward', weekmask=WEEKMASK, holidays=hol)
+    after_gap = is_busday & (prev_bus != prev_cal) & ~missing
+
+    df['_norm_date'] = dates
+    df['_norm_day'] = pd.arrays.IntegerArray(safe_days.astype('int64'), missing)
+    df['_norm_weekday'] = dates.dt.dayofweek.astype('Int64')
+    df['_norm_prev_day'] = pd.arrays.IntegerArray(prev_bus.astype('int64'), ~after_gap)
+    return df
@@ -0,0 +1,123 @@
+# logics/match_keys.py
+
+"""
+Match keys that depend only on a row's own columns, computed once at upload and stored
+next to the row. Matchers read them through stored_key(), which recomputes only rows
+stored before the column existed (NULL); '' means "computed, nothing found".
+
+- cheque_ref:  cheque reference per the bank's CHEQUE_SPECS (bank_data, tally_data)
+- ven_norm:    vendor upper-cased and stripped (bank_data, fin_data)
+- ven_fuzzy:   vendor with punctuation collapsed, for the fuzzy stage (bank_data, fin_data)
+- vch_digits:  digits of the voucher number (fin_data, tally_data)
+
+Date keys and vendor aliases are not stored: they depend on the holiday calendar and
+the alias registry, which can change after upload.
+"""
+
+import re
+
+import pandas as pd
+
+KEY_COLUMNS = {
+    'bank_data': ['cheque_ref', 'ven_norm', 'ven_fuzzy'],
+    'fin_data': ['ven_norm', 'ven_fuzzy', 'vch_digits'],
+    'tally_data': ['cheque_ref', 'vch_digits'],
+}
+
+ID_COLUMNS = {'bank_data': 'bank_id', 'fin_data': 'fin_id', 'tally_data': 'tally_id'}
+VENDOR_COLUMNS = {'bank_data': 'bank_ven', 'fin_data': 'fin_ven'}
+VOUCHER_COLUMNS = {'fin_data': 'F_Voucher_No', 'tally_data': 'T_Vch_No'}
+CHEQUE_SIDES = {'bank_data': 'bank', 'tally_data': 'tally'}
+
+
+def stored_key(df, col, compute):
+    """
+    The stored key column where present, with `compute(rows)` filling rows where it is
+    NULL (uploaded before the column existed). `compute` gets the missing rows only.
+    """
+    if col not in df.columns:
+        return compute(df)
+    stored = df[col].astype(object)
+    missing = stored.isna()
+    if missing.any():
+        stored = stored.where(~missing, compute(df[missing]))
+    return stored
+
+
+def vendor_norm(values):
+    """Vendor names upper-cased and stripped (the exact-match vendor key)."""
+    return pd.Series(values).str.upper().str.strip()
+
+
+def vendor_core(val):
+    """Upper-case vendor name with punctuation and repeated spaces collapsed; None when empty."""
+    if pd.isna(val):
+        return None
+    key = re.sub(r'[^A-Z0-9]+', ' ', str(val).upper()).strip()
+    return key or None
+
+
+def pad_vendor_key(core):
+    """Stored/collapsed vendor -> the padded key the trigram stage uses ('' or None -> None)."""
+    return f"  {core} " if isinstance(core, str) and core else None
+
+
+def voucher_digits(values):
+    """All digits of each voucher number run together; '' for missing values."""
+    values = pd.Series(values, dtype=object)
+    digits = values.map(str, na_action='ignore').str.replace(r'\D+', '', regex=True)
+    return digits.where(values.notna(), '').astype(object)
+
+
+def _cheque_refs(df, table):
+    """Stored cheque_ref: the bank's extracted ref, '' when none, NULL for banks without a spec."""
+    # Imported here: the cheque engine reads these keys back through stored_key()
+    from logics.bank_tally_match_logic import compile_cheque_spec, supports_cheque_matching
+    side = CHEQUE_SIDES[table]
+    refs = pd.Series(None, index=df.index, dtype=object)
+    if 'bank_code' not in df.columns:
+        return refs
+    for bank_code, rows in df.groupby('bank_code', sort=False):
+        if not supports_cheque_matching(bank_code):
+            continue
+        spec = compile_cheque_spec(bank_code)
+        column = spec[side]['column']
+        if column in rows.columns:
+            refs.loc[rows.index] = spec.extract(side, rows[column]).fillna('')
+    return refs
+
+
+def compute_match_keys(df, table):
+    """The KEY_COLUMNS of `table` for the rows of df, as a frame on df's index."""
+    keys = pd.DataFrame(index=df.index)
+    for col in KEY_COLUMNS.get(table, []):
+        if col == 'cheque_ref':
+            keys[col] = _cheque_refs(df, table)
+        elif col == 'ven_norm' and VENDOR_COLUMNS[table] in df.columns:
+            keys[col] = vendor_norm(df[VENDOR_COLUMNS[table]])
+        elif col == 'ven_fuzzy' and VENDOR_COLUMNS[table] in df.columns:
+            keys[col] = df[VENDOR_COLUMNS[table]].map(vendor_core).fillna('')
+        elif col == 'vch_digits' and VOUCHER_COLUMNS[table] in df.columns:
+            keys[col] = voucher_digits(df[VOUCHER_COLUMNS[table]])
+    return keys
+
+
+def add_match_keys(df, table):
+    """Add the stored match keys to a parsed upload frame (upload-time)."""
+    keys = compute_match_keys(df, table)
+    for col in keys.columns:
+        df[col] = keys[col]
+    return df
+
+
+def source_columns(table):
+    """Columns compute_match_keys() reads for a table."""
+    from logics.bank_tally_match_logic import CHEQUE_SPECS
+    cols = [ID_COLUMNS[table], 'bank_code']
+    if table in VENDOR_COLUMNS:
+        cols.append(VENDOR_COLUMNS[table])
+    if table in VOUCHER_COLUMNS:
+        cols.append(VOUCHER_COLUMNS[table])
+    if table in CHEQUE_SIDES:
+        cols += [spec[CHEQUE_SIDES[table]]['column'] for spec in CHEQUE_SPECS.values()]
+    return list(dict.fromkeys(cols))
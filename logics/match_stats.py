@@ -0,0 +1,105 @@
+# logics/match_stats.py
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class StageStats:
+    """Counters for one matcher stage; seconds is filled in when the stage ends."""
+
+    def __init__(self, name, rows_in=0):
+        self.name = name
+        self.seconds = 0.0
+        self.rows_in = rows_in
+        self.rows_out = 0
+        self.candidates = 0
+        self.peak_candidates = 0
+        self.combinations = 0
+
+    def add_candidates(self, count):
+        self.candidates += count
+        if count > self.peak_candidates:
+            self.peak_candidates = count
+
+    def add_combinations(self, count):
+        self.combinations += count
+
+    def merge(self, other):
+        self.seconds += other.seconds
+        self.rows_in += other.rows_in
+        self.rows_out += other.rows_out
+        self.candidates += other.candidates
+        self.peak_candidates = max(self.peak_candidates, other.peak_candidates)
+        self.combinations += other.combinations
+
+    def as_dict(self):
+        return {
+            'stage': self.name,
+            'seconds': round(self.seconds, 4),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'candidates': self.candidates,
+            'peak_candidates': self.peak_candidates,
+            'combinations': self.combinations,
+        }
+
+
+class MatchStats:
+    """
+    Per-stage wall time and counters for one reconcile run. Matchers take an optional
+    `stats` argument and wrap each stage in `with stats.stage(name, rows_in) as st:`;
+    routes return as_dict() in their JSON and log() it under the run_tag.
+    """
+
+    def __init__(self, matcher, run_tag=""):
+        self.matcher = matcher
+        self.run_tag = run_tag
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, rows_in=0):
+        st = StageStats(name, rows_in)
+        self.stages.append(st)
+        started = time.perf_counter()
+        try:
+            yield st
+        finally:
+            st.seconds += time.perf_counter() - started
+
+    def merge(self, other):
+        """Fold another run's stages in by name (used for parallel partitions)."""
+        by_name = {st.name: st for st in self.stages}
+        for st in other.stages:
+            if st.name in by_name:
+                by_name[st.name].merge(st)
+            else:
+                copy = StageStats(st.name)
+                copy.merge(st)
+                self.stages.append(copy)
+                by_name[st.name] = copy
+
+    def as_dict(self):
+        return {
+            'matcher': self.matcher,
+            'run_tag': self.run_tag,
+            'total_seconds': round(sum(st.seconds for st in self.stages), 4),
+            'peak_candidates': max((st.peak_candidates for st in self.stages), default=0),
+            'stages': [st.as_dict() for st in self.stages],
+        }
+
+    def log(self):
+        logger.info("match stats [%s] %s", self.run_tag, json.dumps(self.as_dict()))
+
+
+@contextmanager
+def maybe_stage(stats, name, rows_in=0):
+    """stats.stage(...) when stats is given, otherwise a throwaway StageStats."""
+    if stats is None:
+        yield StageStats(name, rows_in)
+    else:
+        with stats.stage(name, rows_in) as st:
+            yield st
@@ -0,0 +1,97 @@
+# logics/subset_sum.py
+
+import time
+from bisect import bisect_left, insort
+
+DEFAULT_NODE_BUDGET = 200000   # search nodes allowed per bank row
+DEFAULT_TIME_BUDGET = 2.0      # seconds allowed per bank row
+
+
+class SubsetSumBudgetExceeded(Exception):
+    pass
+
+
+def _suffix_bounds(amounts, max_r):
+    """
+    lo[i][k] / hi[i][k]: smallest / largest sum of k amounts picked from amounts[i:].
+    Both are monotone in i, which lets the search stop scanning a level early.
+    """
+    n = len(amounts)
+    lo = [None] * (n + 1)
+    hi = [None] * (n + 1)
+    lo[n] = [0]
+    hi[n] = [0]
+    suffix = []
+    for i in range(n - 1, -1, -1):
+        insort(suffix, amounts[i])
+        width = min(max_r, len(suffix))
+        lo_i, hi_i = [0], [0]
+        for k in range(1, width + 1):
+            lo_i.append(lo_i[-1] + suffix[k - 1])
+            hi_i.append(hi_i[-1] + suffix[-k])
+        lo[i] = lo_i
+        hi[i] = hi_i
+    return lo, hi
+
+
+def find_subset_sum(amounts, target, min_r=2, max_r=10,
+                    node_budget=DEFAULT_NODE_BUDGET, time_budget=DEFAULT_TIME_BUDGET, stats=None):
+    """
+    Find positions of `min_r`..`max_r` amounts (integer minor units) summing exactly to `target`.
+
+    Returns the same answer as trying itertools.combinations(range(n), r) for
+    r = min_r, min_r + 1, ... and taking the first hit: the smallest r, then the
+    lexicographically first combination of positions. Returns None when there is
+    no such subset or when the node/time budget runs out.
+    The number of partial combinations evaluated is added to `stats` (a StageStats) if given.
+    """
+    n = len(amounts)
+    max_r = min(max_r, n)
+    if n < min_r or target is None:
+        return None
+
+    lo, hi = _suffix_bounds(amounts, max_r)
+
+    # value -> ascending positions, for resolving the last pick with one bisect
+    positions = {}
+    for pos, amt in enumerate(amounts):
+        positions.setdefault(amt, []).append(pos)
+
+    deadline = time.monotonic() + time_budget if time_budget else None
+    nodes = [0]
+
+    def search(start, k, remaining, chosen):
+        if k == 1:
+            slots = positions.get(remaining)
+            if slots:
+                j = bisect_left(slots, start)
+                if j < len(slots):
+                    return chosen + [slots[j]]
+            return None
+        for i in range(start, n - k + 1):
+            # Bounds only tighten as i moves right, so the first miss ends this level
+            if remaining < lo[i][k] or remaining > hi[i][k]:
+                break
+            nodes[0] += 1
+            if node_budget and nodes[0] > node_budget:
+                raise SubsetSumBudgetExceeded()
+            if deadline and nodes[0] % 1024 == 0 and time.monotonic() > deadline:
+                raise SubsetSumBudgetExceeded()
+            found = search(i + 1, k - 1, remaining - amounts[i], chosen + [i])
+            if found:
+                return found
+        return None
+
+    try:
+        for r in range(min_r, max_r + 1):
+            if not lo[0][r] <= target <= hi[0][r]:
+                continue
+            found = search(0, r, target, [])
+            if found:
+                return found
+    except SubsetSumBudgetExceeded:
+        return None
+    finally:
+        if stats is not None:
+            stats.add_combinations(nodes[0])
+    return None
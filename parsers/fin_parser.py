@@ -1,19 +1,12 @@
 import pandas as pd
-import re
-import string
 
+from utils.money import add_paisa_columns
+from utils.uid import build_uids, date_hex, amount_hex, row_numbers
+from utils.excel_reader import read_raw_sheet, find_header_row, frame_from_header
+from utils.vendor_names import normalize_series
 
-def derive_vendor(name):
-    if not isinstance(name, str):
-        return ""
-    name = name.upper().strip()
-    name = re.sub(r"^(M[\s\.\/]*S[\s\.]*)", "", name)
-    name = re.sub(rf"[{re.escape(string.punctuation)}]", "", name)
-    name = name.replace(" ", "")
-    return name
 
-
-def parse_fin_statement(input_file, sheet_name=None, payment_month=None):
+def parse_fin_statement(input_file, sheet_name=None, payment_month=None, backend=None):
     expected_header = [
         "Routing No", "Receiving A/C No", "Credit Amount", "Receiver Name",
         "Bank Name", "Branch Name", "Sender Name", "Sender Account", "Sender Bank",
@@ -22,24 +15,13 @@ def parse_fin_statement(input_file, sheet_name=None, payment_month=None):
         "Remarks", "Mark", "Concern"
     ]
 
-    with pd.ExcelFile(input_file) as xl:
-        if sheet_name is None:
-            sheet_name = xl.sheet_names[0]
-
-        df_all = xl.parse(sheet_name, header=None, dtype=str)
-
-        header_row_idx = None
-        for idx, row in df_all.iterrows():
-            row_vals = [str(c).strip() for c in row.tolist()]
-            if all(col in row_vals for col in expected_header):
-                header_row_idx = idx
-                break
+    df_all = read_raw_sheet(input_file, sheet_name, backend)
 
-        if header_row_idx is None:
-            raise ValueError("Expected finance header row not found.")
+    header_row_idx = find_header_row(df_all, expected_header)
+    if header_row_idx is None:
+        raise ValueError("Expected finance header row not found.")
 
-        df = pd.read_excel(input_file, sheet_name=sheet_name,
-                           header=header_row_idx, dtype=str)
+    df = frame_from_header(df_all, header_row_idx)
 
     if payment_month and "Payment Month" in df.columns:
         df = df[df["Payment Month"] == payment_month]
@@ -58,28 +40,16 @@ def parse_fin_statement(input_file, sheet_name=None, payment_month=None):
                 df[dcol], errors="coerce").dt.strftime("%Y-%m-%d")
 
     if "Receiver Name" in df.columns:
-        df["fin_ven"] = df["Receiver Name"].apply(derive_vendor)
+        df["fin_ven"] = normalize_series(df["Receiver Name"], "fin")
 
-    fin_uids = []
     bank = df["Sender Bank"].iloc[0] if "Sender Bank" in df.columns else "UNKNOWN"
-    for idx, row in df.iterrows():
-        rownum = str(idx + 1).zfill(6)
-        payment_date_str = row.get("Payment Date", "")
-        try:
-            payment_dt = pd.to_datetime(payment_date_str)
-            yyyymmdd = payment_dt.strftime("%Y%m%d")
-            hexdate = format(int(yyyymmdd), "X")
-        except Exception:
-            hexdate = "UNKNOWN"
-        try:
-            amount = float(row.get("Credit Amount", 0))
-            amount_int = int(amount)
-            hexamount = format(amount_int, "X")
-        except Exception:
-            hexamount = "UNKNOWN"
-        uid = f"F_{bank}_{hexdate}_{hexamount}_{rownum}"
-        fin_uids.append(uid)
-
+    payment_dates = df["Payment Date"] if "Payment Date" in df.columns else pd.Series(index=df.index, dtype=object)
+    amounts = df["Credit Amount"] if "Credit Amount" in df.columns else pd.Series(0, index=df.index)
+    fin_uids = build_uids(
+        f"F_{bank}",
+        date_hex(payment_dates, upper=True, missing="UNKNOWN"),
+        amount_hex(amounts, rounding="trunc", upper=True, missing="UNKNOWN"),
+        row_numbers(df.index + 1))
     df.insert(0, "fin_uid", fin_uids)
 
     df = df.rename(columns={
@@ -144,4 +114,7 @@ def parse_fin_statement(input_file, sheet_name=None, payment_month=None):
 
         df["statement_year"] = year_part.apply(_convert_year)
 
+    # Exact integer amounts for matching
+    add_paisa_columns(df, ["F_Credit_Amount"])
+
     return df
@@ -4,6 +4,11 @@ import pandas as pd
 import re
 from calendar import month_name
 
+from utils.money import add_paisa_columns
+from utils.uid import build_uids, date_hex, amount_hex, row_numbers
+from utils.excel_reader import read_raw_sheet, frame_from_header, find_header_row
+from utils.vendor_names import normalize_series
+
 MDB_ACCOUNT_NUMBERS = {
     "0011-1050011026",
     "0011-1060000331",
@@ -11,17 +16,74 @@ MDB_ACCOUNT_NUMBERS = {
 }
 
 
-def parse_mdb_statement(input_file):
+# Narration prefixes whose vendor lies between the first slash and the n-th slash from the right
+VENDOR_BETWEEN_SLASHES = {
+    "rtgs rtgs outward": 6,
+    "rtgs rtgs inward": 5,
+    "charge rtgs charge": 6,
+    "clg hv": 4,
+}
+VENDOR_DROP_PHRASES = ["Number of Tran. exceeded TP.", "No. of Tran. exceeded TP."]
+
+
+def between_slashes(texts, end_from_right):
+    """Text between the first slash and the `end_from_right`-th slash from the right;
+    '' when there are fewer than end_from_right + 1 slashes."""
+    pattern = r'(?s)^[^/]*/(.*)(?:/[^/]*){%d}\Z' % end_from_right
+    return texts.str.extract(pattern, expand=False).fillna("").str.strip()
+
+
+def extract_bank_ven(particulars):
+    """
+    Vendor name of each narration, '' when the narration type carries none. Rows are
+    classified once by their lower-cased prefix and each class is cut on its own columns.
+    """
+    p = particulars.astype(object).map(str).str.strip()
+    lower = p.str.lower()
+    bank_ven = pd.Series("", index=p.index)
+    pending = pd.Series(True, index=p.index)
+
+    def assign(mask, vendor_of):
+        mask = mask & pending
+        if mask.any():
+            bank_ven[mask] = normalize_series(vendor_of(p[mask]), "mdb")
+        pending[mask] = False
+
+    for prefix, end_from_right in VENDOR_BETWEEN_SLASHES.items():
+        assign(lower.str.startswith(prefix), lambda s: between_slashes(s, end_from_right))
+
+    assign(lower.str.startswith("transfer beftn outward") & (p.str.count("/") >= 4),
+           lambda s: s.str.split("/").str[3].str.strip())
+
+    def clg_inward(s):
+        # The offset is found on the lower-cased text and applied to the original, as before
+        starts = lower[s.index].str.find("pay to :") + len("pay to :")
+        after_payto = pd.Series([text[start:] for text, start in zip(s, starts)], index=s.index)
+        return after_payto.str.strip().str.split("/").str[0].str.strip()
+
+    assign(p.str.match(r'CLG- InwardCA\d{7} RV', case=False) & lower.str.contains("pay to :", regex=False),
+           clg_inward)
+
+    def online_cashca(s):
+        portion = s.str.extract(r'(?i)^on-line cashca\d{7}([^/]*)', expand=False).str.strip()
+        for drop_phrase in VENDOR_DROP_PHRASES:
+            portion = portion.str.split(drop_phrase, n=1, regex=False).str[0].str.strip()
+        return portion
+
+    cashca = lower.str.startswith("on-line cashca")
+    assign(cashca & p.str.match(r'on-line cashca\d{7}', case=False), online_cashca)
+    pending[cashca] = False  # no account digits: no vendor
+
+    assign(lower.str.startswith("on-line cash"), lambda s: s.str[len("On-Line Cash"):].str.strip())
+    return bank_ven
+
+
+def parse_mdb_statement(input_file, backend=None):
     header_cols = ["Date", "Particular", "Withdrawal", "Deposit", "Balance"]
-    df_all = pd.read_excel(input_file, header=None, dtype=str)
+    df_all = read_raw_sheet(input_file, backend=backend)
 
     # Find header row
-    header_row_idx = None
-    for idx, row in df_all.iterrows():
-        vals = [str(x).strip().lower() for x in row.tolist()]
-        if all(col.lower() in vals for col in header_cols):
-            header_row_idx = idx
-            break
+    header_row_idx = find_header_row(df_all, header_cols, lower=True)
     if header_row_idx is None:
         raise Exception("Header row with expected columns not found.")
 
@@ -78,7 +140,7 @@ def parse_mdb_statement(input_file):
         statement_year = str(first_date.year)
 
     # Parse and clean transaction data
-    df_data = pd.read_excel(input_file, header=header_row_idx, dtype=str)
+    df_data = frame_from_header(df_all, header_row_idx)
     df_data = df_data[header_cols]
     df_data = df_data.dropna(how='all')
 
@@ -86,123 +148,33 @@ def parse_mdb_statement(input_file):
         df_data["Date"] = pd.to_datetime(
             df_data["Date"], errors="coerce").dt.strftime("%Y-%m-%d")
 
-    def is_duplicate_header(row):
-        date_val = str(row["Date"]).strip().lower()
-        if date_val not in ["", "nan", "nat"]:
-            return False
-        return sum(str(row[c]).strip().lower() == c.lower() for c in header_cols[1:]) >= 2
-
-    df_data = df_data[~df_data.apply(
-        is_duplicate_header, axis=1)].reset_index(drop=True)
+    # Repeated header rows: no date and at least two cells equal to their header
+    cells = {col: df_data[col].astype(object).map(str).str.strip().str.lower() for col in header_cols}
+    header_hits = sum((cells[c] == c.lower()).astype(int) for c in header_cols[1:])
+    is_duplicate_header = cells["Date"].isin(["", "nan", "nat"]) & (header_hits >= 2)
+    df_data = df_data[~is_duplicate_header].reset_index(drop=True)
     for col in header_cols:
         df_data = df_data[df_data[col].str.lower() != col.lower()]
     df_data = df_data.dropna(how="all").reset_index(drop=True)
-    df_data = df_data[~df_data.apply(lambda row: all(
-        str(x).strip() == "" for x in row), axis=1)].reset_index(drop=True)
+    is_blank = pd.concat(
+        [df_data[col].astype(object).map(str).str.strip() == "" for col in df_data.columns], axis=1).all(axis=1)
+    df_data = df_data[~is_blank].reset_index(drop=True)
     df_data = df_data[df_data["Particular"].str.strip().str.lower() != "balance b/f"].reset_index(drop=True)
     df_data = df_data[~df_data["Particular"].str.contains("total", case=False, na=False)].reset_index(drop=True)
 
 
     # Normalize numeric columns
     for col in ["Withdrawal", "Deposit", "Balance"]:
-        df_data[col] = df_data[col].replace({',': ''}, regex=True)
-        df_data[col] = df_data[col].apply(
-            lambda x: str(x).strip() if pd.notna(x) else "")
-        df_data[col] = pd.to_numeric(df_data[col], errors="coerce").round(2)
+        values = df_data[col].replace({',': ''}, regex=True).dropna()
+        values = values.astype(str).str.strip().reindex(df_data.index)
+        df_data[col] = pd.to_numeric(values, errors="coerce").round(2)
 
     # Vendor extraction
-    def normalize_vendor_name(name):
-        s = str(name)
-        s = s.strip()
-        s = re.sub(r'^M[\s./\\-]*S[\s./\\-]*', '', s, flags=re.IGNORECASE)
-        s = s.replace(".", "").replace(" ", "").replace("-", "")
-        return s.upper()
-
-    def extract_bank_ven(row):
-        p = str(row["Particular"]).strip()
-
-        def get_between_slashes(text, end_from_right):
-            slashes = [m.start() for m in re.finditer("/", text)]
-            if len(slashes) < (end_from_right + 1):
-                return ""
-            start = slashes[0] + 1
-            end = slashes[-end_from_right]
-            return text[start:end].strip()
-        if p.lower().startswith("rtgs rtgs outward"):
-            vendor_raw = get_between_slashes(p, 6)
-            return normalize_vendor_name(vendor_raw)
-        if p.lower().startswith("rtgs rtgs inward"):
-            vendor_raw = get_between_slashes(p, 5)
-            return normalize_vendor_name(vendor_raw)
-        if p.lower().startswith("charge rtgs charge"):
-            vendor_raw = get_between_slashes(p, 6)
-            return normalize_vendor_name(vendor_raw)
-        if p.lower().startswith("clg hv"):
-            vendor_raw = get_between_slashes(p, 4)
-            return normalize_vendor_name(vendor_raw)
-        sl = [m.start() for m in re.finditer("/", p)]
-        if p.lower().startswith("transfer beftn outward") and len(sl) >= 4:
-            start = sl[2] + 1
-            end = sl[3]
-            vendor_raw = p[start:end].strip()
-            return normalize_vendor_name(vendor_raw)
-        if re.match(r'^CLG- InwardCA\d{7} RV', p, re.IGNORECASE):
-            idx = p.lower().find("pay to :")
-            if idx != -1:
-                after_payto = p[idx + len("pay to :"):].strip()
-                vendor_part = after_payto.split("/")[0].strip()
-                return normalize_vendor_name(vendor_part)
-        if p.lower().startswith("on-line cashca"):
-            match = re.match(r'on-line cashca(\d{7})', p, re.IGNORECASE)
-            if match:
-                end_digits = match.end()
-                next_slash = p.find("/", end_digits)
-                if next_slash != -1:
-                    vendor_portion = p[end_digits:next_slash].strip()
-                else:
-                    vendor_portion = p[end_digits:].strip()
-                for drop_phrase in ["Number of Tran. exceeded TP.", "No. of Tran. exceeded TP."]:
-                    vendor_portion = vendor_portion.split(drop_phrase)[
-                        0].strip()
-                return normalize_vendor_name(vendor_portion)
-        elif p.lower().startswith("on-line cash"):
-            remainder = p[len("On-Line Cash"):].strip()
-            if "/" in remainder:
-                vendor_part = remainder.split("/")[0].strip()
-                return normalize_vendor_name(remainder)
-            else:
-                return normalize_vendor_name(remainder)
-        return ""
-
-    df_data["bank_ven"] = df_data.apply(extract_bank_ven, axis=1)
+    df_data["bank_ven"] = extract_bank_ven(df_data["Particular"])
 
     # UID logic
-    def to_hex_date(date_str):
-        try:
-            dt = pd.to_datetime(date_str, errors="coerce")
-            if pd.isna(dt):
-                return "0"
-            ymd = dt.strftime("%Y%m%d")
-            return format(int(ymd), "x")
-        except Exception:
-            return "0"
-
-    def to_hex_balance(balance):
-        try:
-            bal = float(balance)
-            bal_int = int(round(bal))
-            return format(bal_int, "x")
-        except Exception:
-            return "0"
-
-    uid_list = []
-    for idx, row in df_data.iterrows():
-        row_num = str(idx + 1).zfill(6)
-        hex_date = to_hex_date(row.get("Date", ""))
-        hex_balance = to_hex_balance(row.get("Balance", 0))
-        uid = f"B_MDB_{hex_date}_{hex_balance}_{row_num}"
-        uid_list.append(uid)
-    df_data.insert(0, "bank_uid", uid_list)
+    df_data.insert(0, "bank_uid", build_uids(
+        "B_MDB", date_hex(df_data["Date"]), amount_hex(df_data["Balance"]), row_numbers(df_data.index + 1)))
 
     # Insert account number statement_month and statement_year columns
     df_data["acct_no"] = account_number.replace("-", "") # Remove dashes from account number
@@ -221,4 +193,7 @@ def parse_mdb_statement(input_file):
         "Balance": "B_Balance"
     })
 
+    # Exact integer amounts for matching
+    add_paisa_columns(df_data, ["B_Withdrawal", "B_Deposit"])
+
     return df_data
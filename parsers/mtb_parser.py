@@ -4,6 +4,11 @@ import pandas as pd
 import re
 from calendar import month_name
 
+from utils.money import add_paisa_columns
+from utils.uid import build_uids, date_hex, amount_hex, row_numbers
+from utils.vendor_names import map_distinct, normalize_vendor
+from utils.excel_reader import read_excel
+
 MTB_ACCOUNT_NUMBERS = {
     "0020320004355",  # add more MTB account numbers if needed
 }
@@ -27,40 +32,11 @@ def extract_bank_vendor(detail):
         parts = [p.strip() for p in text.split('/') if p.strip()]
         if len(parts) >= 4:
             vendor = parts[3]
-    
-    # Clean unwanted patterns and spaces
-    vendor = re.sub(r"\bM[\.\s/\\]*S\b", "", vendor, flags=re.IGNORECASE)
-    vendor = vendor.replace(".", "").replace(" ", "")
-    
-    return vendor.upper().strip()
-
-# --- Helper Function 2: Convert Date to Hex ---
-def to_hex_date(date_str):
-    """
-    Converts a date string into a hexadecimal format (YYYYMMDD -> hex).
-    """
-    try:
-        dt = pd.to_datetime(date_str, errors="coerce")
-        if pd.isna(dt):
-            return "0"
-        ymd = dt.strftime("%Y%m%d")
-        return format(int(ymd), "x")
-    except Exception:
-        return "0"
 
-# --- Helper Function 3: Convert Balance to Hex ---
-def to_hex_balance(balance):
-    """
-    Converts a numeric balance into a hexadecimal format.
-    """
-    try:
-        bal = float(balance)
-        bal_int = int(round(bal))
-        return format(bal_int, "x")
-    except Exception:
-        return "0"
+    # Clean unwanted patterns and spaces
+    return normalize_vendor(vendor, "mtb")
 
-# --- Helper Function 4: Extract Account Number ---
+# --- Helper Function 2: Extract Account Number ---
 def extract_account_number(metadata):
     """
     Extracts the account number from the metadata.
@@ -78,7 +54,7 @@ def extract_account_number(metadata):
     
     return account_number
 
-# --- Helper Function 5: Extract Statement Period ---
+# --- Helper Function 3: Extract Statement Period ---
 def extract_statement_period(metadata):
     """
     Extracts the statement period from the metadata.
@@ -106,16 +82,12 @@ def extract_statement_period(metadata):
     return first_date, last_date
 
 # --- Main Parsing Function ---
-def parse_mtb_statement(file_path, sheet_name="AcStatementReport"):
+def parse_mtb_statement(file_path, sheet_name="AcStatementReport", backend=None):
     """
     Main function to parse the MTB statement and clean the data.
     """
-    # Read the Excel file (all sheets)
-    if file_path.lower().endswith(".xlsx"):
-        df = pd.read_excel(file_path, sheet_name=None, dtype=str)
-    else:
-        df = pd.read_excel(file_path, sheet_name=None,
-                           dtype=str, engine="xlrd")
+    # Read the Excel file (all sheets); pandas picks xlrd for .xls when calamine is not installed
+    df = read_excel(file_path, backend, sheet_name=None, dtype=str)
     
     # Find the relevant sheet
     if sheet_name not in df:
@@ -160,18 +132,11 @@ def parse_mtb_statement(file_path, sheet_name="AcStatementReport"):
             df_clean[col] = pd.to_numeric(df_clean[col], errors="coerce").round(2)
 
     # Extract vendor information from "Transaction Detail"
-    df_clean["bank_ven"] = df_clean["Transaction Detail"].apply(lambda x: extract_bank_vendor(x))
+    df_clean["bank_ven"] = map_distinct(df_clean["Transaction Detail"], extract_bank_vendor)
 
     # Generate unique IDs based on the transaction row and balance
-    uid_prefix = "B_MTB"
-    uid_list = []
-    for idx, row in df_clean.iterrows():
-        row_num = str(idx + 1).zfill(6)
-        hex_date = to_hex_date(row.get("Date", ""))
-        hex_balance = to_hex_balance(row.get("Balance", 0))
-        uid = f"{uid_prefix}_{hex_date}_{hex_balance}_{row_num}"
-        uid_list.append(uid)
-    df_clean.insert(0, "bank_uid", uid_list)
+    df_clean.insert(0, "bank_uid", build_uids(
+        "B_MTB", date_hex(df_clean["Date"]), amount_hex(df_clean["Balance"]), row_numbers(df_clean.index + 1)))
 
     # Extract account number from metadata
     account_number = extract_account_number(metadata)
@@ -212,5 +177,7 @@ def parse_mtb_statement(file_path, sheet_name="AcStatementReport"):
     # Add the 'bank_code' column (MTB for Mutual Trust Bank)
     df_clean['bank_code'] = 'MTB'  # You can change this if needed
 
-    
+    # Exact integer amounts for matching
+    add_paisa_columns(df_clean, ["B_Withdrawal", "B_Deposit"])
+
     return df_clean
@@ -4,32 +4,19 @@
 import pandas as pd
 import re
 
+from utils.money import add_paisa_columns
+from utils.uid import build_uids, date_hex, amount_hex, row_numbers
+from utils.excel_reader import read_raw_sheet, frame_from_header
+
 PBL_ACCOUNT_NUMBERS = {
     "2126117010855",
     # Add other valid PBL account numbers here
 }
 
-def to_hex_date(date_str):
-    try:
-        dt = pd.to_datetime(date_str, errors="coerce")
-        if pd.isna(dt):
-            return "0"
-        ymd = dt.strftime("%Y%m%d")
-        return format(int(ymd), "x")
-    except Exception:
-        return "0"
-
-def to_hex_balance(balance):
-    try:
-        bal = float(balance)
-        bal_int = int(round(bal))
-        return format(bal_int, "x")
-    except Exception:
-        return "0"
-
-def parse_pbl_statement(input_file):
-    # Read metadata (first 6 rows)
-    metadata_raw = pd.read_excel(input_file, header=None, nrows=6)
+def parse_pbl_statement(input_file, backend=None):
+    # Decode the sheet once: metadata is the first 6 rows, the header is row 5
+    df_all = read_raw_sheet(input_file, backend=backend)
+    metadata_raw = df_all.iloc[:6]
     
     # Extract account number (row 2, col 3)
     raw_acc = metadata_raw.iloc[2, 3]
@@ -59,8 +46,8 @@ def parse_pbl_statement(input_file):
         statement_month = ""
         statement_year = ""
     
-    # Read transaction data (header row at index 5)
-    df_data = pd.read_excel(input_file, header=5, dtype=str)
+    # Transaction data (header row at index 5)
+    df_data = frame_from_header(df_all, 5)
     
     # Select exact columns by name
     cols_required = ["Tran Date", "Transaction Ref.", "Description", "Debit", "Credit", "Balance"]
@@ -100,14 +87,8 @@ def parse_pbl_statement(input_file):
     })
     
     # Generate bank_uid for each row
-    uid_list = []
-    for idx, row in df_data.iterrows():
-        row_num = str(idx + 1).zfill(6)
-        hex_date = to_hex_date(row.get("B_Date", ""))
-        hex_balance = to_hex_balance(row.get("B_Balance", 0))
-        uid = f"PBL_{hex_date}_{hex_balance}_{row_num}"
-        uid_list.append(uid)
-    df_data.insert(0, "bank_uid", uid_list)
+    df_data.insert(0, "bank_uid", build_uids(
+        "PBL", date_hex(df_data["B_Date"]), amount_hex(df_data["B_Balance"]), row_numbers(df_data.index + 1)))
     
     # Add metadata columns
     df_data["acct_no"] = account_number
@@ -115,5 +96,8 @@ def parse_pbl_statement(input_file):
     df_data["statement_year"] = statement_year
     df_data["bank_code"] = "PBL"
     df_data["bank_ven"] = ""  # blank for now
-    
+
+    # Exact integer amounts for matching
+    add_paisa_columns(df_data, ["B_Withdrawal", "B_Deposit"])
+
     return df_data
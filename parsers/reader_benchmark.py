@@ -0,0 +1,79 @@
+# parsers/reader_benchmark.py
+
+"""
+Excel reader backend benchmark: parse sample statements with every installed backend
+(utils/excel_reader.available_backends), keep the fastest of a few runs, and check that
+each backend produces the same DataFrame as the openpyxl/xlrd fallback.
+"""
+
+import time
+
+import pandas as pd
+
+from utils.excel_reader import available_backends
+from parsers.fin_parser import parse_fin_statement
+from parsers.mdb_parser import parse_mdb_statement
+from parsers.mtb_parser import parse_mtb_statement
+from parsers.pbl_parser import parse_pbl_statement
+from parsers.tally_parser import parse_tally_file
+
+REFERENCE_BACKEND = "openpyxl"
+
+
+def _parse_mtb(path, sheet_name, backend):
+    if sheet_name:
+        return parse_mtb_statement(path, sheet_name=sheet_name, backend=backend)
+    return parse_mtb_statement(path, backend=backend)
+
+
+# layout -> parse(path, sheet_name, backend)
+SAMPLE_PARSERS = {
+    "FIN": lambda path, sheet_name, backend: parse_fin_statement(path, sheet_name=sheet_name, backend=backend),
+    "MDB": lambda path, sheet_name, backend: parse_mdb_statement(path, backend=backend),
+    "MTB": _parse_mtb,
+    "PBL": lambda path, sheet_name, backend: parse_pbl_statement(path, backend=backend),
+    "TALLY": lambda path, sheet_name, backend: parse_tally_file(path, sheet_name, backend=backend),
+}
+
+
+def frame_difference(expected, actual):
+    """None when the frames are equal, else the first line of pandas' explanation."""
+    try:
+        pd.testing.assert_frame_equal(expected, actual)
+    except AssertionError as e:
+        return " ".join(str(e).split())[:200]
+    return None
+
+
+def benchmark_readers(layout, paths, sheet_name=None, backends=None, repeat=3):
+    """
+    Parse each sample file of one layout (a SAMPLE_PARSERS key) with every backend.
+    Returns one dict per (path, backend): rows, seconds (best of `repeat`) and
+    difference: None when the frame equals the REFERENCE_BACKEND one, else what differs.
+    A backend that fails to parse gets its error as the difference.
+    """
+    parse = SAMPLE_PARSERS[layout]
+    backends = list(backends or available_backends())
+    # The fallback goes first so the others are compared with it
+    backends.sort(key=lambda b: b != REFERENCE_BACKEND)
+    results = []
+    for path in paths:
+        expected = None
+        for backend in backends:
+            result = {"layout": layout, "path": path, "backend": backend, "rows": None, "seconds": None}
+            try:
+                for _ in range(max(repeat, 1)):
+                    start = time.perf_counter()
+                    df = parse(path, sheet_name, backend)
+                    elapsed = time.perf_counter() - start
+                    result["seconds"] = elapsed if result["seconds"] is None else min(result["seconds"], elapsed)
+            except Exception as e:
+                result["difference"] = f"error: {e}"
+                results.append(result)
+                continue
+            result["rows"] = len(df)
+            if expected is None:
+                expected = df
+            result["difference"] = frame_difference(expected, df)
+            results.append(result)
+    return results
@@ -1,11 +1,20 @@
 # tally_parser.py
 
+import posixpath
 import re
-import string
+import zipfile
+from functools import lru_cache
+import xml.etree.ElementTree as ET
+import numpy as np
 import pandas as pd
-from openpyxl import load_workbook
+from openpyxl.utils.cell import range_boundaries
 from calendar import month_name
 
+from utils.money import add_paisa_columns
+from utils.uid import build_uids, date_hex, amount_hex, row_numbers
+from utils.vendor_names import normalize_series, normalize_vendor
+from utils.excel_reader import iter_sheet_rows
+
 
 def extract_account_number(metadata):
     acct_pattern = re.compile(r'(\d{8,}|\d{3,}-\d{7,}|\d{4,}-\d{7,})')
@@ -77,6 +86,21 @@ def deduplicate_row(row, dup_map):
     return res
 
 
+PARTICULARS_CACHE_SIZE = 65536  # distinct narrations remembered by the per-value helpers
+
+# Particulars patterns, compiled once
+_HEADER_DETAIL = re.compile(r'^([A-Za-z0-9\-/ ]+)[.:,-]\s*(.+)')
+_CARRIAGE_RETURN = re.compile(r'\r\n?')
+_LINE_GAP = re.compile(r'\s*\n\s*')
+_LINE_BREAK = re.compile(r'\r\n|[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]')  # str.splitlines() boundaries
+_VEN_CE_CODE = re.compile(r'\b([A-Za-z]+-CE-\d+-\d+-CI)\b')
+_VEN_PAYABLE = re.compile(r'Payable-([^-]+)-ID')
+_VEN_LTD = re.compile(r'([A-Za-z .&-]+(?:Ltd|Limited))', re.IGNORECASE)
+_VEN_TRAILING_DASHES = re.compile(r'[-\s]+\Z')
+_VEN_NON_ALNUM = re.compile(r'[^A-Z0-9]')
+
+
+@lru_cache(maxsize=PARTICULARS_CACHE_SIZE)
 def process_particulars(value):
     if pd.isna(value):
         return ""
@@ -88,7 +112,7 @@ def process_particulars(value):
     if len(lines) > 1:
         details = ' '.join(lines[1:]).strip()
         return f"{header}\n{details}"
-    match = re.match(r'^([A-Za-z0-9\-/ ]+)[.:,-]\s*(.+)', header)
+    match = _HEADER_DETAIL.match(header)
     if match:
         header_part = match.group(1).strip()
         detail_part = match.group(2).strip()
@@ -96,6 +120,7 @@ def process_particulars(value):
     return header
 
 
+@lru_cache(maxsize=PARTICULARS_CACHE_SIZE)
 def extract_vendor_updated(particulars):
     if pd.isna(particulars):
         return ""
@@ -103,54 +128,200 @@ def extract_vendor_updated(particulars):
     lines = [line.strip() for line in val_str.splitlines() if line.strip()]
     if lines and lines[0].lower().replace(" ", "") == "(asperdetails)" and len(lines) > 1:
         val = lines[1]
-        match = re.search(r'\b([A-Za-z]+-CE-\d+-\d+-CI)\b', val)
+        match = _VEN_CE_CODE.search(val)
         if match:
             return match.group(1).upper().replace(" ", "")
-        match2 = re.search(r'Payable-([^-]+)-ID', val)
+        match2 = _VEN_PAYABLE.search(val)
         if match2:
             return match2.group(1).strip().upper().replace(" ", "")
-        match3 = re.search(
-            r'([A-Za-z .&-]+(?:Ltd|Limited))', val, re.IGNORECASE)
+        match3 = _VEN_LTD.search(val)
         if match3:
             return match3.group(1).strip().upper().replace(" ", "")
         if 'Amount' in val:
             prefix = val.split('Amount')[0]
             chunks = [c.strip() for c in prefix.split('-') if c.strip()]
             if chunks:
-                return re.sub(r'[^A-Z0-9]', '', chunks[-1].upper())
+                return _VEN_NON_ALNUM.sub('', chunks[-1].upper())
         return val.upper().replace(" ", "")
     else:
-        val = lines[0] if lines else ""
-        val = re.sub(r'^(adv(?:ance)?|ap)[\s\-]*',
-                     '', val, flags=re.IGNORECASE)
-        val = re.sub(r'^(m[\s\-\/]*s)[\s\-]*', '', val, flags=re.IGNORECASE)
-        val = re.split(r'-ID:', val, flags=re.IGNORECASE)[0]
-        val = re.sub(r'\band\b', '', val, flags=re.IGNORECASE)
-        val = re.sub(f'[{re.escape(string.punctuation)}\s]+', '', val)
-        return val.upper()
-
-
-def parse_tally_file(file_path, sheet_name):
-    wb = load_workbook(file_path, data_only=True)
-    ws = wb[sheet_name]
-
-    # --------- Find header row ---------
-    header_keywords = {"Date", "Particulars",
-                       "Vch Type", "Vch No.", "Debit", "Credit"}
-    header_row_idx = next((i for i, r in enumerate(ws.iter_rows(values_only=True), 1)
-                           if header_keywords.issubset({clean(c) for c in r})), None)
-    if not header_row_idx:
-        wb.close()
-        raise ValueError("Header row not found.")
-
-    # --------- Extract metadata for iloc use ---------
-    # Build metadata as DataFrame for iloc reference
-    metadata_rows = []
-    for row in ws.iter_rows(min_row=1, max_row=header_row_idx-1, values_only=True):
-        metadata_rows.append([clean(c) for c in row])
-    metadata = pd.DataFrame(metadata_rows)
-
-    # --------- Robust metadata extraction ---------
+        return normalize_vendor(lines[0] if lines else "", "tally")
+
+
+def _map_distinct(values, fn):
+    """
+    fn (Series of str -> Series) run on the distinct non-null values of `values` as text,
+    mapped back to every row; null rows get ''.
+    """
+    values = pd.Series(values).astype(object)
+    notna = values.notna()
+    out = pd.Series("", index=values.index)
+    if notna.any():
+        codes, uniques = pd.factorize(values[notna].map(str))
+        result = fn(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+        out[notna] = result[codes]
+    return out
+
+
+def _normalize_particulars(texts):
+    text = texts.str.replace(_CARRIAGE_RETURN, '\n', regex=True).str.strip()
+    lines = text.str.partition('\n')
+    header, rest = lines[0].str.strip(), lines[2].str.strip()
+    out = header.copy()
+    multi = rest != ""
+    out[multi] = header[multi] + "\n" + rest[multi].str.replace(_LINE_GAP, ' ', regex=True)
+    single = header[~multi]
+    header_detail = single.str.extract(_HEADER_DETAIL).dropna()
+    out[header_detail.index] = header_detail[0].str.strip() + "\n" + header_detail[1].str.strip()
+    return out
+
+
+def _as_per_details_vendors(val):
+    out = val.str.upper().str.replace(" ", "", regex=False)
+    pending = pd.Series(True, index=val.index)
+    for pattern in (_VEN_CE_CODE, _VEN_PAYABLE, _VEN_LTD):
+        found = val.str.extract(pattern, expand=False)
+        hit = pending & found.notna()
+        out[hit] = found[hit].str.strip().str.upper().str.replace(" ", "", regex=False)
+        pending &= ~hit
+    prefix = val.str.split('Amount', n=1, regex=False).str[0].str.replace(_VEN_TRAILING_DASHES, '', regex=True)
+    hit = pending & val.str.contains('Amount', regex=False) & (prefix != "")
+    out[hit] = prefix[hit].str.rsplit('-', n=1).str[-1].str.upper().str.replace(_VEN_NON_ALNUM, '', regex=True)
+    return out
+
+
+def _split_first_line(texts):
+    """(first line, rest) of each stripped text, both stripped; lines as str.splitlines() cuts them."""
+    lines = texts.str.split(_LINE_BREAK, n=1, regex=True)
+    return lines.str[0].str.strip(), lines.str[1].fillna("").str.strip()
+
+
+def _extract_vendors(texts):
+    first, rest = _split_first_line(texts.str.strip())
+    as_per = (first.str.lower().str.replace(" ", "", regex=False) == "(asperdetails)") & (rest != "")
+    out = pd.Series("", index=texts.index, dtype=object)
+    if as_per.any():
+        second, _ = _split_first_line(rest[as_per])
+        out[as_per] = _as_per_details_vendors(second)
+    if (~as_per).any():
+        out[~as_per] = normalize_series(first[~as_per], "tally")
+    return out
+
+
+def normalize_particulars(values):
+    """process_particulars() over a column, as str operations on its distinct values."""
+    return _map_distinct(values, _normalize_particulars)
+
+
+def extract_vendors(particulars):
+    """extract_vendor_updated() over a column, as str operations on its distinct values."""
+    return _map_distinct(particulars, _extract_vendors)
+
+
+TALLY_CHUNK_ROWS = 20000  # ledger rows per DataFrame yielded by iter_tally_chunks
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def _sheet_xml_path(archive, sheet_name):
+    """Path of a sheet's XML part inside the xlsx archive."""
+    workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+    rel_id = next((s.get(f"{_NS_REL}id") for s in workbook.iter(f"{_NS_MAIN}sheet")
+                   if s.get("name") == sheet_name), None)
+    if rel_id is None:
+        raise KeyError(f"Worksheet {sheet_name} does not exist.")
+    rels = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    target = next(r.get("Target") for r in rels.iter(f"{_NS_PKG_REL}Relationship") if r.get("Id") == rel_id)
+    return target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+
+
+def read_merged_ranges(file_path, sheet_name):
+    """
+    Merged ranges of a sheet as (min_row, min_col, max_row, max_col), 1-based, read from
+    the sheet XML; read-only worksheets do not expose them. Rows are dropped as they are
+    parsed, so memory does not grow with the sheet.
+    """
+    ranges = []
+    with zipfile.ZipFile(file_path) as archive, archive.open(_sheet_xml_path(archive, sheet_name)) as src:
+        sheet_data = None
+        for event, elem in ET.iterparse(src, events=("start", "end")):
+            if event == "start":
+                if elem.tag == f"{_NS_MAIN}sheetData":
+                    sheet_data = elem
+            elif elem.tag == f"{_NS_MAIN}row" and sheet_data is not None:
+                sheet_data.clear()
+            elif elem.tag == f"{_NS_MAIN}mergeCell":
+                min_col, min_row, max_col, max_row = range_boundaries(elem.get("ref"))
+                ranges.append((min_row, min_col, max_row, max_col))
+    return ranges
+
+
+def fill_merged(rows, merged):
+    """
+    Yield (raw, filled) per row tuple: `filled` has every cell of a merged range set to
+    the range's top-left value, as unmerging a full-mode sheet does, without touching
+    the sheet. Only ranges covering the current row are held.
+    """
+    starts = {}
+    for rng in merged:
+        starts.setdefault(rng[0], []).append(rng)
+    active = []
+    for row_idx, row in enumerate(rows, 1):
+        filled = list(row)
+        for _, min_col, max_row, max_col in starts.pop(row_idx, ()):
+            anchor = filled[min_col - 1] if min_col <= len(filled) else None
+            active.append((max_row, min_col, max_col, anchor))
+        for _, min_col, max_col, anchor in active:
+            if len(filled) < max_col:
+                filled.extend([None] * (max_col - len(filled)))
+            filled[min_col - 1:max_col] = [anchor] * (max_col - min_col + 1)
+        active = [rng for rng in active if rng[0] > row_idx]
+        yield row, filled
+
+
+def collapse_continuations(rows, headers):
+    """
+    Yield ledger rows with continuation lines (no Date and no dr_cr, only Particulars)
+    appended to the Particulars of the row above.
+    """
+    date_idx = headers.index("Date") if "Date" in headers else None
+    drcr_idx = headers.index("dr_cr") if "dr_cr" in headers else None
+    part_idx = headers.index("Particulars") if "Particulars" in headers else None
+    current_row = None
+    for cleaned in rows:
+        if (
+            (not cleaned[date_idx] if date_idx is not None else True)
+            and (not cleaned[drcr_idx] if drcr_idx is not None else True)
+            and (cleaned[part_idx] if part_idx is not None else False)
+            and current_row is not None
+        ):
+            current_row[part_idx] = (current_row[part_idx] + "\n" + cleaned[part_idx]).strip()
+        else:
+            if current_row is not None:
+                yield current_row
+            current_row = cleaned
+    if current_row is not None:
+        yield current_row
+
+
+def _tally_headers(header_cells):
+    headers = [clean(c) if c else f"Unnamed_{i+1}" for i, c in enumerate(header_cells)]
+
+    # Rename "Particulars" column to "dr_cr"
+    headers = ["dr_cr" if h == "Particulars" and i == headers.index(
+        "Particulars") else h for i, h in enumerate(headers)]
+
+    # Rename the next column to 'Particulars'
+    # Get the index of the next column after "dr_cr"
+    particulars_index = headers.index("dr_cr") + 1
+    if particulars_index < len(headers):
+        headers[particulars_index] = "Particulars"
+    return headers
+
+
+def _tally_metadata(metadata):
+    """bank_code, acct_no, unit_name, statement month and year from the rows above the header."""
     acct_no, acct_row_val, acct_row = extract_account_number(metadata)
     bank_code, bank_row_val, bank_row = extract_bank_code(metadata)
     (period_start, period_end), period_val, period_row = extract_statement_period(metadata)
@@ -171,71 +342,30 @@ def parse_tally_file(file_path, sheet_name):
     unit_name, unit_val, unit_row = extract_unit_name(metadata)
 
     if not bank_code or not acct_no:
-        wb.close()
         raise ValueError(
             "Unmapped bank account detected or account cell missing. Update BANK_ACCT_MAP or check metadata."
         )
-
-    # --------- Unmerge all merged cells ---------
-    for rng in list(ws.merged_cells.ranges):
-        val = ws[rng.coord.split(":")[0]].value
-        ws.unmerge_cells(str(rng))
-        for row in ws[rng.coord]:
-            for cell in row:
-                cell.value = val
-
-    headers = [clean(
-        c.value) if c.value else f"Unnamed_{i+1}" for i, c in enumerate(ws[header_row_idx])]
-
-    # Rename "Particulars" column to "dr_cr"
-    headers = ["dr_cr" if h == "Particulars" and i == headers.index(
-        "Particulars") else h for i, h in enumerate(headers)]
-
-    # Rename the next column to 'Particulars'
-    # Get the index of the next column after "dr_cr"
-    particulars_index = headers.index("dr_cr") + 1
-    if particulars_index < len(headers):
-        headers[particulars_index] = "Particulars"
-
-    num_cols = len(headers)
-
-    collapsed_rows = []
-    current_row = None
-    for row in ws.iter_rows(min_row=header_row_idx + 1, values_only=True):
-        cleaned = [clean(c) for c in row][:num_cols] + \
-            [""] * (num_cols - len(row))
-        if (
-            (not cleaned[headers.index("Date")] if "Date" in headers else True)
-            and (not cleaned[headers.index("dr_cr")] if "dr_cr" in headers else True)
-            and (cleaned[headers.index("Particulars")] if "Particulars" in headers else False)
-            and current_row is not None
-        ):
-            idx = headers.index("Particulars")
-            current_row[idx] = (current_row[idx] + "\n" + cleaned[idx]).strip()
-        else:
-            if current_row is not None:
-                collapsed_rows.append(current_row)
-            current_row = cleaned
-    if current_row is not None:
-        collapsed_rows.append(current_row)
-
-    wb.close()
-    data_rows = collapsed_rows
-    dedup_map = {v: idxs for v, idxs in pd.Series(data_rows[0]).groupby(
-        lambda x: x).groups.items() if len(idxs) > 1}
-    data_rows = [deduplicate_row(row, dedup_map) for row in data_rows]
-
-    if all(clean(v).replace('.', '', 1).replace(',', '', 1).isdigit() or clean(v) == "" for v in data_rows[-1]):
-        data_rows.pop(-1)
-
-    df = pd.DataFrame(data_rows, columns=headers).dropna(axis=1, how='all')
-    df = df.loc[:, (df != '').any(axis=0)]
+    return {"bank_code": bank_code, "acct_no": acct_no, "unit_name": unit_name,
+            "statement_month": ledger_date, "statement_year": ledger_year}
+
+
+def _tally_frame(data_rows, headers, meta, rownum, keep_cols=None):
+    """
+    A DataFrame of collapsed, deduplicated ledger rows in the tally_data layout. UIDs are
+    numbered from `rownum`; returns (df, next rownum) so chunks continue the numbering.
+    `keep_cols` are the header positions to keep (default: the columns with a value here).
+    """
+    bank_code = meta["bank_code"]
+    df = pd.DataFrame(data_rows, columns=headers)
+    if keep_cols is None:
+        keep_cols = _non_empty_columns(data_rows, len(headers))
+    df = df.iloc[:, keep_cols]
     df = df.loc[:, ~df.columns.str.match(r'Unnamed_\d+')]
 
     # Process "Particulars" column formatting and vendor extraction
     if "Particulars" in df.columns:
-        df["Particulars"] = df["Particulars"].apply(process_particulars)
-        df["tally_ven"] = df["Particulars"].apply(extract_vendor_updated)
+        df["Particulars"] = normalize_particulars(df["Particulars"])
+        df["tally_ven"] = extract_vendors(df["Particulars"])
     else:
         df["tally_ven"] = ""
 
@@ -250,34 +380,23 @@ def parse_tally_file(file_path, sheet_name):
         df = df[~df["Particulars"].str.strip(
         ).str.lower().str.startswith("closing balance")]
 
-    def to_hex(val):
-        try:
-            return hex(int(float(val)))[2:]
-        except Exception:
-            return ""
-
-    uids = []
-    rownum = 1
-    for i, row in df.iterrows():
-        date_val = row.get("Date", "")
-        credit_val = row.get("Credit", "")
-        debit_val = row.get("Debit", "")
-        balance_val = credit_val if (pd.notna(credit_val) and str(
-            credit_val).strip() != "") else debit_val
-        if pd.notna(date_val) and date_val != "":
-            date_str = str(date_val).replace("-", "")
-            hexdate = to_hex(date_str)
-            try:
-                hexbal = to_hex(
-                    round(float(str(balance_val).replace(",", ""))))
-            except Exception:
-                hexbal = ""
-            uid = f"T_{bank_code}_{hexdate}_{hexbal}_{rownum:06d}"
-
-            uids.append(uid)
-            rownum += 1
-        else:
-            uids.append("")
+    # Only dated rows get a UID; their numbering continues from `rownum`
+    if "Date" in df.columns:
+        dated = (df["Date"].notna() & (df["Date"] != "")).to_numpy()
+    else:
+        dated = np.zeros(len(df), dtype=bool)
+    uids = np.full(len(df), "", dtype=object)
+    if dated.any():
+        blank = pd.Series("", index=df.index)
+        credit = df["Credit"] if "Credit" in df.columns else blank
+        debit = df["Debit"] if "Debit" in df.columns else blank
+        balance = credit.where(credit.notna() & (credit.map(str).str.strip() != ""), debit)
+        uids[dated] = build_uids(
+            f"T_{bank_code}",
+            date_hex(df["Date"][dated]),
+            amount_hex(balance[dated].map(str).str.replace(",", "", regex=False), missing="", hex_slice=True),
+            row_numbers(np.arange(rownum, rownum + dated.sum())))
+        rownum += int(dated.sum())
     df["tally_uid"] = uids
     cols = ["tally_uid", "bank_code", "acct_no", "unit_name", "statement_month", "statement_year"] + \
         [c for c in df.columns if c not in ["tally_uid", "bank_code",
@@ -285,10 +404,10 @@ def parse_tally_file(file_path, sheet_name):
 
     df["bank_code"] = bank_code
     # Remove dashes from account number
-    df["acct_no"] = acct_no.replace("-", "")
-    df["unit_name"] = unit_name
-    df["statement_month"] = ledger_date
-    df["statement_year"] = ledger_year
+    df["acct_no"] = meta["acct_no"].replace("-", "")
+    df["unit_name"] = meta["unit_name"]
+    df["statement_month"] = meta["statement_month"]
+    df["statement_year"] = meta["statement_year"]
     df = df[cols]
 
     # Optionally: convert empty Debit/Credit to None for DB
@@ -313,5 +432,116 @@ def parse_tally_file(file_path, sheet_name):
     # Apply the column renaming to df
     df = df.rename(columns=new_column_names)
 
-    # Return the final df with the renamed columns
-    return df
+    # Exact integer amounts for matching
+    add_paisa_columns(df, ["T_Debit", "T_Credit"])
+
+    return df, rownum
+
+
+def _ledger_rows(file_path, sheet_name, backend=None):
+    """
+    (meta, headers, rows) of a Tally ledger export. `rows` lazily yields the collapsed,
+    deduplicated ledger rows below the header, without a trailing totals-only row.
+
+    Rows are read with utils/excel_reader.iter_sheet_rows (`backend` as there) and
+    merged ranges are filled from their anchors on the fly (see read_merged_ranges/fill_merged),
+    so memory does not grow with the sheet. The reader is closed when `rows` is.
+    """
+    merged = read_merged_ranges(file_path, sheet_name)
+    sheet_rows = iter_sheet_rows(file_path, sheet_name, backend)
+    try:
+        rows = fill_merged(sheet_rows, merged)
+
+        # --------- Find header row, keeping the rows above it as metadata ---------
+        header_keywords = {"Date", "Particulars",
+                           "Vch Type", "Vch No.", "Debit", "Credit"}
+        metadata_rows = []
+        header_cells = None
+        for raw, filled in rows:
+            if header_keywords.issubset({clean(c) for c in raw}):
+                header_cells = filled
+                break
+            metadata_rows.append([clean(c) for c in raw])
+        if header_cells is None:
+            raise ValueError("Header row not found.")
+
+        meta = _tally_metadata(pd.DataFrame(metadata_rows))
+        headers = _tally_headers(header_cells)
+        num_cols = len(headers)
+
+        def cleaned_rows():
+            for _, row in rows:
+                yield [clean(c) for c in row][:num_cols] + [""] * (num_cols - len(row))
+
+        collapsed = collapse_continuations(cleaned_rows(), headers)
+        first = next(collapsed, None)
+        if first is None:
+            raise ValueError("No ledger rows found below the header row.")
+        dedup_map = {v: idxs for v, idxs in pd.Series(first).groupby(
+            lambda x: x).groups.items() if len(idxs) > 1}
+    except BaseException:
+        sheet_rows.close()
+        raise
+
+    def ledger():
+        try:
+            pending = deduplicate_row(first, dedup_map)
+            for row in collapsed:
+                yield pending
+                pending = deduplicate_row(row, dedup_map)
+            # The last row is dropped when it is only totals (numbers/blanks)
+            if not all(clean(v).replace('.', '', 1).replace(',', '', 1).isdigit() or clean(v) == "" for v in pending):
+                yield pending
+        finally:
+            sheet_rows.close()
+
+    return meta, headers, ledger()
+
+
+def _non_empty_columns(rows, num_cols):
+    """Positions of the columns with a value in at least one of `rows`."""
+    seen = [False] * num_cols
+    for row in rows:
+        for i, val in enumerate(row):
+            if val != '':
+                seen[i] = True
+    return [i for i in range(num_cols) if seen[i]]
+
+
+def iter_tally_chunks(file_path, sheet_name, chunk_rows=TALLY_CHUNK_ROWS, backend=None):
+    """
+    Stream a Tally ledger export as tally_data DataFrames of at most `chunk_rows` ledger
+    rows (None: one frame for the whole sheet). Memory is bounded by the chunk size
+    rather than the sheet (see _ledger_rows).
+
+    Empty columns are pruned over the whole sheet, not per chunk, so every chunk has the
+    columns a whole-sheet parse would; when chunking, a first pass over the sheet finds them.
+    """
+    keep_cols = None
+    if chunk_rows:
+        _, headers, rows = _ledger_rows(file_path, sheet_name, backend)
+        keep_cols = _non_empty_columns(rows, len(headers))
+
+    meta, headers, rows = _ledger_rows(file_path, sheet_name, backend)
+    try:
+        rownum = 1
+        emitted = False
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if chunk_rows and len(chunk) >= chunk_rows:
+                df, rownum = _tally_frame(chunk, headers, meta, rownum, keep_cols)
+                yield df
+                emitted = True
+                chunk = []
+        if chunk or not emitted:
+            df, rownum = _tally_frame(chunk, headers, meta, rownum, keep_cols)
+            yield df
+    finally:
+        rows.close()
+
+
+def parse_tally_file(file_path, sheet_name, backend=None):
+    """The whole ledger as one DataFrame."""
+    frames = list(iter_tally_chunks(file_path, sheet_name, chunk_rows=None, backend=backend))
+    return frames[0]
@@ -1,12 +1,18 @@
 # routes/bank_fin_reconcile_routes.py
 
 from flask import Blueprint, request, jsonify
+import math
 import pandas as pd
 from sqlalchemy import text
 from datetime import datetime
 
 from utils.db import engine, ensure_table_exists
-from logics.bank_fin_match_logic import bank_fin_match, flatten_bf_matches
+from utils.bf_watermarks import WATERMARK_TABLE, load_watermarks, flag_new_rows, save_watermarks
+from utils.vendor_aliases import ALIAS_TABLE, VERSION_TABLE, get_alias_map
+from logics.bank_fin_match_logic import bank_fin_match, flatten_bf_matches, helper_columns
+from logics.bank_fin_parallel import bank_fin_match_parallel
+from logics.bank_fin_fuzzy import FUZZY_THRESHOLD
+from logics.match_stats import MatchStats
 from utils.help_texts import HelpTexts
 
 bank_fin_reconcile_bp = Blueprint('bank_fin_reconcile', __name__)
@@ -45,8 +51,33 @@ def reconcile():
     account_number = request.form.get('account_number')
     fin_table = 'fin_data'  # Always the same, universal
     bank_code = request.form.get('bank_code')
+    parallel = request.form.get('parallel', '').lower() in ('1', 'true', 'on')
+    # 'full' (default) retries every unmatched row; 'incremental' only evaluates pairs touching rows uploaded since the last run
+    mode = request.form.get('mode', 'full').lower()
+    incremental = mode == 'incremental'
+    # Minimum vendor similarity (0-1) to run the fuzzy stage, 'on' for FUZZY_THRESHOLD; off when not given
+    fuzzy_threshold = request.form.get('fuzzy_threshold', '')
+    # Alias stages compare vendors on letters and digits only ('TALI&CO' == 'TALICO'); off when not given
+    alias_letters_digits = request.form.get('alias_letters_digits', '').lower() in ('1', 'true', 'on')
+    # Optional ±N-day date tolerance; defaults to the bank's DATE_WINDOW_DAYS entry
+    date_window = request.form.get('date_window', '')
     if not bank_code:
         return jsonify({'success': False, 'msg': 'bank_code is required.'})
+    if mode not in ('full', 'incremental'):
+        return jsonify({'success': False, 'msg': 'mode must be "full" or "incremental".'})
+    if fuzzy_threshold.lower() in ('', 'off'):
+        fuzzy_threshold = None
+    elif fuzzy_threshold.lower() == 'on':
+        fuzzy_threshold = FUZZY_THRESHOLD
+    else:
+        try:
+            fuzzy_threshold = float(fuzzy_threshold)
+        except ValueError:
+            fuzzy_threshold = math.nan
+        if not math.isfinite(fuzzy_threshold) or not 0 < fuzzy_threshold <= 1:
+            return jsonify({'success': False, 'msg': 'fuzzy_threshold must be a number between 0 and 1, "on" or "off".'})
+    if date_window and not date_window.isdigit():
+        return jsonify({'success': False, 'msg': 'date_window must be a whole number of days.'})
 
     try:
         bank_df = pd.read_sql(
@@ -77,11 +108,33 @@ def reconcile():
         if not acct_no:
             acct_no = "UnknownAcct"
 
+        ensure_table_exists(engine, WATERMARK_TABLE)
+        bank_is_new = fin_is_new = None
+        if incremental:
+            watermarks = load_watermarks(engine, bank_code)
+            bank_is_new = flag_new_rows(bank_df, watermarks, 'bank_id', 0)
+            fin_is_new = flag_new_rows(fin_df, watermarks, 'fin_id', 1)
+
+        ensure_table_exists(engine, ALIAS_TABLE)
+        ensure_table_exists(engine, VERSION_TABLE)
+        vendor_aliases = get_alias_map(engine, bank_code)
+
     except Exception as e:
         return jsonify({'success': False, 'msg': f'Error loading tables: {e}'})
 
     run_tag = f"{bank_code}_{acct_no}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
 
+    if incremental and not bank_is_new.any() and not fin_is_new.any():
+        return jsonify({
+            'success': True,
+            'matched_count': 0,
+            'unmatched_bank_count': len(bank_df),
+            'unmatched_finance_count': len(fin_df),
+            'run_tag': run_tag,
+            'inserted_to_table': 0,
+            'msg': 'No rows uploaded since the last run. Use mode=full to retry all unmatched rows.'
+        })
+
     BANK_CONFIG = {
         'date_col': 'B_Date',
         'particular_col': 'B_Particulars',
@@ -90,68 +143,85 @@ def reconcile():
         'balance_col': 'B_Balance',
         'bank_uid_col': 'bank_uid',
         'bank_ven_col': 'bank_ven',
+        'fuzzy_threshold': fuzzy_threshold,
+        'alias_letters_digits': alias_letters_digits,
+        'vendor_aliases': vendor_aliases,
     }
+    if date_window:
+        BANK_CONFIG['date_window'] = int(date_window)
 
     config = BANK_CONFIG
+    stats = MatchStats('bank_fin_match', run_tag)
 
     try:
-        matched_rows, unmatched_bank, unmatched_finance = bank_fin_match(
-            bank_df, fin_df, config, bank_code)
+        # --------- Build bf_matched_df BEFORE dropping columns ---------
+        bank_cols = list(bank_df.columns)
+        fin_cols = list(fin_df.columns)
+        if parallel:
+            # One process per (acct_no, statement month) partition; writes are merged below
+            bf_matched_df, matched_count, unmatched_bank_count, unmatched_finance_count = \
+                bank_fin_match_parallel(bank_df, fin_df, config, bank_code, run_tag,
+                                        bank_is_new=bank_is_new, fin_is_new=fin_is_new, stats=stats)
+        else:
+            matched_rows, unmatched_bank, unmatched_finance = bank_fin_match(
+                bank_df, fin_df, config, bank_code, bank_is_new=bank_is_new, fin_is_new=fin_is_new, stats=stats)
+            with stats.stage('flatten', len(matched_rows)) as st:
+                bf_matched_df = flatten_bf_matches(
+                    matched_rows, bank_cols, fin_cols, run_tag=run_tag)
+                st.rows_out = len(bf_matched_df)
+            matched_count = len(matched_rows)
+            unmatched_bank_count = len(unmatched_bank)
+            unmatched_finance_count = len(unmatched_finance)
 
         matched_bank_ids = []
         matched_fin_ids = []
-        for row in matched_rows:
-            if row['source'] == 'Bank' and row.get('bank_id') is not None:
-                matched_bank_ids.append(int(row['bank_id']))
-            elif row['source'] == 'Finance' and row.get('fin_id') is not None:
-                matched_fin_ids.append(int(row['fin_id']))
-
-        matched_bank_ids = list(set(matched_bank_ids))
-        matched_fin_ids = list(set(matched_fin_ids))
+        if not bf_matched_df.empty:
+            is_bank = bf_matched_df['bf_source'] == 'Bank'
+            if 'bank_id' in bf_matched_df.columns:
+                matched_bank_ids = bf_matched_df.loc[is_bank, 'bank_id'].dropna().astype(int).unique().tolist()
+            if 'fin_id' in bf_matched_df.columns:
+                matched_fin_ids = bf_matched_df.loc[~is_bank, 'fin_id'].dropna().astype(int).unique().tolist()
 
-        # --------- Build bf_matched_df BEFORE dropping columns ---------
-        bank_cols = list(bank_df.columns)
-        fin_cols = list(fin_df.columns)
-        bf_matched_df = flatten_bf_matches(
-            matched_rows, bank_cols, fin_cols, run_tag=run_tag)
         bf_matched_df['bank_code'] = bank_code
         bf_matched_df['bf_date_matched'] = datetime.now()
 
-        # Drop helper columns if present
-        helper_cols = [
-            '_vendor_first5', '_ven_alias', '_norm_amt', '_norm_date',
-            # add any other temp/helper columns you use here
-        ]
-        bf_matched_df = bf_matched_df.drop(
-            columns=[c for c in helper_cols if c in bf_matched_df], errors='ignore')
+        # Drop matching helper columns if present
+        bf_matched_df = bf_matched_df.drop(columns=helper_columns(bf_matched_df))
 
         ensure_table_exists(engine, 'bf_matched')
 
         now_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-        with engine.begin() as conn:
-            # 1. Insert bf_matched rows first, atomically
-            if not bf_matched_df.empty:
-                bf_matched_df["bf_is_matched"] = 1
-                bf_matched_df.to_sql('bf_matched', conn,
-                                     if_exists='append', index=False)
-            # 2. Update is_matched status for matched bank rows
-            if matched_bank_ids:
-                ids_str = ','.join(map(str, matched_bank_ids))
-                conn.execute(text(
-                    f"UPDATE bank_data SET bf_is_matched=1, bf_date_matched=:dt WHERE bank_id IN ({ids_str})"), {"dt": now_str})
-            if matched_fin_ids:
-                ids_str = ','.join(map(str, matched_fin_ids))
-                conn.execute(text(
-                    f"UPDATE {fin_table} SET bf_is_matched=1, bf_date_matched=:dt WHERE fin_id IN ({ids_str})"), {"dt": now_str})
+        with stats.stage('db write', len(bf_matched_df)) as st:
+            with engine.begin() as conn:
+                # 1. Insert bf_matched rows first, atomically
+                if not bf_matched_df.empty:
+                    bf_matched_df["bf_is_matched"] = 1
+                    bf_matched_df.to_sql('bf_matched', conn,
+                                         if_exists='append', index=False)
+                # 2. Update is_matched status for matched bank rows
+                if matched_bank_ids:
+                    ids_str = ','.join(map(str, matched_bank_ids))
+                    conn.execute(text(
+                        f"UPDATE bank_data SET bf_is_matched=1, bf_date_matched=:dt WHERE bank_id IN ({ids_str})"), {"dt": now_str})
+                if matched_fin_ids:
+                    ids_str = ','.join(map(str, matched_fin_ids))
+                    conn.execute(text(
+                        f"UPDATE {fin_table} SET bf_is_matched=1, bf_date_matched=:dt WHERE fin_id IN ({ids_str})"), {"dt": now_str})
+                # 3. Advance the per-account watermarks for the next incremental run
+                save_watermarks(conn, bank_code, bank_df, fin_df, run_tag)
+            st.rows_out = len(matched_bank_ids) + len(matched_fin_ids)
+        stats.log()
 
         return jsonify({
             'success': True,
-            'matched_count': len(matched_rows),
-            'unmatched_bank_count': len(unmatched_bank),
-            'unmatched_finance_count': len(unmatched_finance),
+            'matched_count': matched_count,
+            'unmatched_bank_count': unmatched_bank_count,
+            'unmatched_finance_count': unmatched_finance_count,
             'run_tag': run_tag,
-            'inserted_to_table': len(bf_matched_df)
+            'mode': mode,
+            'inserted_to_table': len(bf_matched_df),
+            'stats': stats.as_dict()
         })
     except Exception as e:
         return jsonify({'success': False, 'msg': f'Error during reconciliation: {e}'})
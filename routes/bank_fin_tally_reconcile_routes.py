@@ -4,7 +4,9 @@ from sqlalchemy import text
 from datetime import datetime
 
 from utils.db import engine, ensure_table_exists
+from logics.bank_fin_match_logic import helper_columns
 from logics.bank_fin_tally_match_logic import bank_fin_tally_match
+from logics.match_stats import MatchStats
 from utils.help_texts import HelpTexts
 
 import sys
@@ -36,8 +38,12 @@ def get_bft_accounts():
 def reconcile_bft():
     bank_code = request.form.get('bank_code')
     account_number = request.form.get('account_number')
+    # 'group' (default) walks the groups one by one; 'set' resolves them all with merges
+    mode = request.form.get('mode', 'group').lower()
     if not bank_code or not account_number:
         return jsonify({'success': False, 'msg': 'bank_code and account_number are required.'})
+    if mode not in ('set', 'group'):
+        return jsonify({'success': False, 'msg': 'mode must be "set" or "group".'})
 
     try:
         # 1. Find all bf_match_id's for this bank/account (from BANK rows only)
@@ -83,8 +89,9 @@ def reconcile_bft():
 
     # Matching logic
     run_tag = f"{bank_code}_{account_number}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    stats = MatchStats('bank_fin_tally_match', run_tag)
     bft_matched_df = bank_fin_tally_match(
-        bf_df, tally_df, bank_code, run_tag=run_tag)
+        bf_df, tally_df, bank_code, run_tag=run_tag, stats=stats, mode=mode)
 
     ensure_table_exists(engine, 'bft_matched')
     inserted_count = 0
@@ -97,12 +104,8 @@ def reconcile_bft():
         bft_matched_df['input_date'] = now_dt
         bft_matched_df['bft_is_matched'] = 1
         bft_matched_df['bft_date_matched'] = now_dt
-        helper_cols = [
-            '_vendor_first5', '_ven_alias', '_norm_amt', '_norm_date',
-            # add any other temp/helper columns you use here
-        ]
-        bft_matched_df = bft_matched_df.drop(
-            columns=[c for c in helper_cols if c in bft_matched_df], errors='ignore')
+        # Drop matching helper columns if present
+        bft_matched_df = bft_matched_df.drop(columns=helper_columns(bft_matched_df))
         if 'id' in bft_matched_df.columns:
             bft_matched_df = bft_matched_df.drop(columns=['id'])
 
@@ -118,55 +121,58 @@ def reconcile_bft():
         matched_fin_uids = bft_matched_df.loc[bft_matched_df['bft_source']
                                               == 'Finance', 'fin_uid'].dropna().unique().tolist()
 
-        # Begin atomic transaction for insert and updates
-        with engine.begin() as conn:
-            bft_matched_df.to_sql('bft_matched', conn,
-                                  if_exists='append', index=False)
-            inserted_count = len(bft_matched_df)
-
-            matched_bank_count = bft_matched_df[bft_matched_df['bft_source']
-                                                == 'Bank'].shape[0]
-            matched_tally_count = bft_matched_df[bft_matched_df['bft_source']
-                                                 == 'Tally'].shape[0]
-
-            matched_bf_ids = bft_matched_df.loc[bft_matched_df['bft_source']
-                                                == 'Bank', 'bf_match_id'].unique().tolist()
-            matched_tally_uids = bft_matched_df.loc[bft_matched_df['bft_source'] == 'Tally', 'tally_uid'].unique(
-            ).tolist()
-
-            if matched_bf_ids:
-                ids = ",".join(f"'{x}'" for x in matched_bf_ids)
-                conn.execute(text(
-                    f"UPDATE bf_matched SET bft_is_matched=1, bft_date_matched=:dt "
-                    f"WHERE bf_match_id IN ({ids})"
-                ), {"dt": now_str})
-            if matched_tally_uids:
-                uids = ",".join(f"'{x}'" for x in matched_tally_uids)
-                conn.execute(text(
-                    f"UPDATE tally_data SET bft_is_matched=1, bft_date_matched=:dt "
-                    f"WHERE tally_uid IN ({uids})"
-                ), {"dt": now_str})
-
-            # --- NEW: Update bank_data and fin_data for BFT match ---
-            if matched_bank_uids:
-                bank_uids = ",".join(f"'{x}'" for x in matched_bank_uids)
-                conn.execute(text(
-                    f"UPDATE bank_data SET bft_is_matched=1, bft_date_matched=:dt "
-                    f"WHERE bank_uid IN ({bank_uids})"
-                ), {"dt": now_str})
-
-            if matched_fin_uids:
-                fin_uids = ",".join(f"'{x}'" for x in matched_fin_uids)
-                conn.execute(text(
-                    f"UPDATE fin_data SET bft_is_matched=1, bft_date_matched=:dt "
-                    f"WHERE fin_uid IN ({fin_uids})"
-                ), {"dt": now_str})
+        with stats.stage('db write', len(bft_matched_df)) as st:
+            # Begin atomic transaction for insert and updates
+            with engine.begin() as conn:
+                bft_matched_df.to_sql('bft_matched', conn,
+                                      if_exists='append', index=False)
+                inserted_count = len(bft_matched_df)
+
+                matched_bank_count = bft_matched_df[bft_matched_df['bft_source']
+                                                    == 'Bank'].shape[0]
+                matched_tally_count = bft_matched_df[bft_matched_df['bft_source']
+                                                     == 'Tally'].shape[0]
+
+                matched_bf_ids = bft_matched_df.loc[bft_matched_df['bft_source']
+                                                    == 'Bank', 'bf_match_id'].unique().tolist()
+                matched_tally_uids = bft_matched_df.loc[bft_matched_df['bft_source'] == 'Tally', 'tally_uid'].unique(
+                ).tolist()
+
+                if matched_bf_ids:
+                    ids = ",".join(f"'{x}'" for x in matched_bf_ids)
+                    conn.execute(text(
+                        f"UPDATE bf_matched SET bft_is_matched=1, bft_date_matched=:dt "
+                        f"WHERE bf_match_id IN ({ids})"
+                    ), {"dt": now_str})
+                if matched_tally_uids:
+                    uids = ",".join(f"'{x}'" for x in matched_tally_uids)
+                    conn.execute(text(
+                        f"UPDATE tally_data SET bft_is_matched=1, bft_date_matched=:dt "
+                        f"WHERE tally_uid IN ({uids})"
+                    ), {"dt": now_str})
+
+                # --- NEW: Update bank_data and fin_data for BFT match ---
+                if matched_bank_uids:
+                    bank_uids = ",".join(f"'{x}'" for x in matched_bank_uids)
+                    conn.execute(text(
+                        f"UPDATE bank_data SET bft_is_matched=1, bft_date_matched=:dt "
+                        f"WHERE bank_uid IN ({bank_uids})"
+                    ), {"dt": now_str})
+
+                if matched_fin_uids:
+                    fin_uids = ",".join(f"'{x}'" for x in matched_fin_uids)
+                    conn.execute(text(
+                        f"UPDATE fin_data SET bft_is_matched=1, bft_date_matched=:dt "
+                        f"WHERE fin_uid IN ({fin_uids})"
+                    ), {"dt": now_str})
+            st.rows_out = inserted_count
 
     # Calculate unmatched counts
     total_bank_rows = bf_df[bf_df['bf_source'].str.lower() == 'bank'].shape[0]
     total_tally_rows = tally_df.shape[0]
     unmatched_bf_count = total_bank_rows - matched_bank_count
     unmatched_tally_count = total_tally_rows - matched_tally_count
+    stats.log()
 
     return jsonify({
         'success': True,
@@ -174,5 +180,7 @@ def reconcile_bft():
         'msg': f'{inserted_count} records reconciled and saved to bft_matched.',
         'matched_count': matched_bank_count,
         'unmatched_bf_count': unmatched_bf_count,
-        'unmatched_tally_count': unmatched_tally_count
+        'unmatched_tally_count': unmatched_tally_count,
+        'run_tag': run_tag,
+        'stats': stats.as_dict()
     })
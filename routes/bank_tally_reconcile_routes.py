@@ -15,9 +15,8 @@ from datetime import datetime
 from utils.db import engine, ensure_table_exists
 from utils.help_texts import HelpTexts
 
-from logics.bank_tally_match_logic_mdb import match_cheques as match_cheques_mdb
-from logics.bank_tally_match_logic_mtb import match_cheques as match_cheques_mtb
-from logics.bank_tally_match_logic_pbl import match_cheques_pbl
+from logics.bank_tally_match_logic import match_cheques, supports_cheque_matching
+from logics.match_stats import MatchStats
 
 # Create a Flask Blueprint for bank tally reconciliation routes
 bank_tally_bp = Blueprint('bank_tally_bp', __name__, url_prefix='/bank_tally')
@@ -32,8 +31,20 @@ def reconcile_bank_tally():
     """
     bank_code = request.form.get('bank_code')
     account_number = request.form.get('account_number')
+    # Optional ±N-day tolerance between bank and tally dates; defaults to the bank config
+    date_window = request.form.get('date_window', '')
+    # Optional '0'/'1' to turn the rare-token fallback off/on; defaults to the bank config
+    token_fallback = request.form.get('token_fallback', '')
     if not bank_code or not account_number:
         return jsonify({'success': False, 'msg': 'bank_code and account_number are required.'})
+    if not supports_cheque_matching(bank_code):
+        return jsonify({'success': False, 'msg': f'Bank code {bank_code} not supported for cheque reconciliation.'})
+    if date_window and not date_window.isdigit():
+        return jsonify({'success': False, 'msg': 'date_window must be a whole number of days.'})
+    date_window = int(date_window) if date_window else None
+    if token_fallback not in ('', '0', '1'):
+        return jsonify({'success': False, 'msg': 'token_fallback must be 0 or 1.'})
+    token_fallback = bool(int(token_fallback)) if token_fallback else None
 
     try:
         # Retrieve unmatched bank records for the given account number
@@ -56,21 +67,12 @@ def reconcile_bank_tally():
 
     # Generate a unique run tag for this reconciliation process
     run_tag = f"{bank_code}_{account_number}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-    # Execute matching logic based on the bank code
-    if bank_code == "MDB":
-        bt_matched = match_cheques_mdb(
-            bank_df, tally_df, start_id=1, run_tag=run_tag)
-    elif bank_code == "MTB":
-        bt_matched = match_cheques_mtb(
-            bank_df, tally_df, start_id=1, run_tag=run_tag)
-    elif bank_code == "PBL":
-        bt_matched = match_cheques_pbl(
-            bank_df, tally_df, start_id=1, run_tag=run_tag)
-    else:
-        return jsonify({'success': False, 'msg': f'Bank code {bank_code} not supported for cheque reconciliation.'})
-
-    # Convert matched results to DataFrame
-    bt_matched_df = pd.DataFrame(bt_matched)
+    stats = MatchStats(f'match_cheques_{bank_code}', run_tag)
+    # Execute matching logic with the bank's cheque spec
+    bt_matched_df = match_cheques(
+        bank_code, bank_df, tally_df, start_id=1, run_tag=run_tag, date_window=date_window, stats=stats,
+        token_fallback=token_fallback)
+    matched_count = len(bt_matched_df)
 
     # Ensure the results table exists in the database
     ensure_table_exists(engine, 'bt_matched')
@@ -94,28 +96,33 @@ def reconcile_bank_tally():
                                                == 'Tally', 'tally_uid'].dropna().unique().tolist()
         now_str = now_dt.strftime('%Y-%m-%d %H:%M:%S')
 
-        with engine.begin() as conn:
-            bt_matched_df.to_sql('bt_matched', conn,
-                                 if_exists='append', index=False)
-            # Update matched records in bank_data
-            if matched_bank_uids:
-                bank_uids = ",".join(f"'{x}'" for x in matched_bank_uids)
-                conn.execute(
-                    text(
-                        f"UPDATE bank_data SET bt_is_matched=1, bt_date_matched=:dt WHERE bank_uid IN ({bank_uids})"),
-                    {"dt": now_str}
-                )
-            # Update matched records in tally_data
-            if matched_tally_uids:
-                tally_uids = ",".join(f"'{x}'" for x in matched_tally_uids)
-                conn.execute(
-                    text(
-                        f"UPDATE tally_data SET bt_is_matched=1, bt_date_matched=:dt WHERE tally_uid IN ({tally_uids})"),
-                    {"dt": now_str}
-                )
+        with stats.stage('db write', len(bt_matched_df)) as st:
+            with engine.begin() as conn:
+                bt_matched_df.to_sql('bt_matched', conn,
+                                     if_exists='append', index=False)
+                # Update matched records in bank_data
+                if matched_bank_uids:
+                    bank_uids = ",".join(f"'{x}'" for x in matched_bank_uids)
+                    conn.execute(
+                        text(
+                            f"UPDATE bank_data SET bt_is_matched=1, bt_date_matched=:dt WHERE bank_uid IN ({bank_uids})"),
+                        {"dt": now_str}
+                    )
+                # Update matched records in tally_data
+                if matched_tally_uids:
+                    tally_uids = ",".join(f"'{x}'" for x in matched_tally_uids)
+                    conn.execute(
+                        text(
+                            f"UPDATE tally_data SET bt_is_matched=1, bt_date_matched=:dt WHERE tally_uid IN ({tally_uids})"),
+                        {"dt": now_str}
+                    )
+            st.rows_out = len(matched_bank_uids) + len(matched_tally_uids)
+    stats.log()
 
     return jsonify({
         'success': True,
-        'matched_count': len(bt_matched),
-        'msg': f'Matched records inserted: {len(bt_matched)}'
+        'matched_count': matched_count,
+        'msg': f'Matched records inserted: {matched_count}',
+        'run_tag': run_tag,
+        'stats': stats.as_dict()
     })
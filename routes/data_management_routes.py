@@ -3,8 +3,11 @@
 from flask import Blueprint, request, jsonify
 from utils.db import engine
 from sqlalchemy import text
+import pandas as pd
 import traceback
 
+from logics.match_keys import KEY_COLUMNS, ID_COLUMNS, compute_match_keys, source_columns
+
 data_management_bp = Blueprint('data_management', __name__)
 
 @data_management_bp.route('/truncate_data', methods=['POST'])
@@ -164,3 +167,64 @@ def reset_matches():
             'success': False,
             'message': f'Error resetting matches: {str(e)}'
         })
+
+
+def backfill_match_keys(tables=None, recompute=False, batch_size=5000):
+    """
+    Populate the stored match keys (see logics/match_keys.py) for existing rows, batch by
+    batch in id order. Only rows with a NULL key are touched unless `recompute` is set,
+    e.g. after a CHEQUE_SPECS change. Returns {table: rows updated}.
+    """
+    updated = {}
+    for table in tables or list(KEY_COLUMNS):
+        id_col = ID_COLUMNS[table]
+        key_cols = KEY_COLUMNS[table]
+        select_cols = ", ".join(f"`{c}`" for c in source_columns(table))
+        where = "" if recompute else " AND (" + " OR ".join(f"`{c}` IS NULL" for c in key_cols) + ")"
+        assignments = ", ".join(f"`{c}` = :{c}" for c in key_cols)
+        updated[table] = 0
+        last_id = 0
+        while True:
+            rows = pd.read_sql(
+                text(f"SELECT {select_cols} FROM {table} WHERE {id_col} > :last_id{where} "
+                     f"ORDER BY {id_col} LIMIT {int(batch_size)}"),
+                engine, params={"last_id": last_id}
+            )
+            if rows.empty:
+                break
+            keys = compute_match_keys(rows, table).reindex(columns=key_cols)
+            keys = keys.astype(object).where(keys.notna(), None)
+            keys[id_col] = rows[id_col].astype(int)
+            with engine.begin() as conn:
+                conn.execute(
+                    text(f"UPDATE {table} SET {assignments} WHERE {id_col} = :{id_col}"),
+                    keys.to_dict('records')
+                )
+            updated[table] += len(rows)
+            last_id = int(rows[id_col].max())
+    return updated
+
+
+@data_management_bp.route('/backfill_match_keys', methods=['POST'])
+def backfill_match_keys_route():
+    """
+    Fill the stored match keys for rows uploaded before they existed
+    (or recompute them all with {"recompute": true})
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        table_type = data.get('table_type', 'all')
+        if table_type != 'all' and table_type not in KEY_COLUMNS:
+            return jsonify({'success': False, 'message': 'Invalid table type'})
+        tables = None if table_type == 'all' else [table_type]
+        updated = backfill_match_keys(tables, recompute=bool(data.get('recompute')))
+        return jsonify({
+            'success': True,
+            'updated': updated,
+            'message': 'Match keys updated: ' + ', '.join(f'{t} {n}' for t, n in updated.items())
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error backfilling match keys: {str(e)}'
+        })
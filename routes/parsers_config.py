@@ -3,7 +3,7 @@
 from parsers.fin_parser import parse_fin_statement
 from parsers.mdb_parser import parse_mdb_statement
 from parsers.mtb_parser import parse_mtb_statement
-from parsers.tally_parser import parse_tally_file
+from parsers.tally_parser import iter_tally_chunks
 from utils.help_texts import HelpTexts
 
 PARSERS = [
@@ -28,7 +28,7 @@ PARSERS = [
         'title': 'Tally Parser',
         'file_field': 'tally_file',
         'route': '/parse_tally',
-        'parse_func': parse_tally_file,
+        'parse_func': iter_tally_chunks,
         'table': 'tally_data',
     }
 ]
@@ -551,7 +551,7 @@ def get_bank_tally_matched_report():
     statement_month = data.get('statement_month')
     statement_year = data.get('statement_year')
     column_order = [
-        'S/N', 'bt_match_id', 'bt_source', 'bank_uid', 'acct_no', 'bank_code', 'B_Date',
+        'S/N', 'bt_match_id', 'bt_source', 'bt_match_type', 'bank_uid', 'acct_no', 'bank_code', 'B_Date',
         'B_Particulars', 'B_Ref_Cheque', 'B_Withdrawal', 'B_Deposit', 'bank_ven',
         'tally_uid', 'T_Date', 'dr_cr', 'T_Particulars', 'T_Vch_No', 'T_Debit', 'T_Credit',
         'tally_ven', 'statement_month', 'statement_year'
@@ -599,7 +599,7 @@ def download_bank_tally_matched_excel():
     statement_month = data.get('statement_month')
     statement_year = data.get('statement_year')
     column_order = [
-        'S/N', 'bt_match_id', 'bt_source', 'bank_uid', 'acct_no', 'bank_code', 'B_Date',
+        'S/N', 'bt_match_id', 'bt_source', 'bt_match_type', 'bank_uid', 'acct_no', 'bank_code', 'B_Date',
         'B_Particulars', 'B_Ref_Cheque', 'B_Withdrawal', 'B_Deposit', 'bank_ven',
         'tally_uid', 'T_Date', 'dr_cr', 'T_Particulars', 'T_Vch_No', 'T_Debit', 'T_Credit',
         'tally_ven', 'statement_month', 'statement_year'
@@ -7,10 +7,11 @@ from sqlalchemy.exc import IntegrityError
 
 from utils.db import engine, ensure_table_exists
 from routes.parsers_config import PARSERS
+from logics.match_keys import add_match_keys
 from parsers.fin_parser import parse_fin_statement
 from parsers.mdb_parser import parse_mdb_statement
 from parsers.mtb_parser import parse_mtb_statement
-from parsers.tally_parser import parse_tally_file
+from parsers.tally_parser import iter_tally_chunks
 from utils.help_texts import HelpTexts
 
 UPLOAD_FOLDER = 'uploads'
@@ -43,14 +44,23 @@ def generic_parse(parse_func, table, file_field):
     file.save(temp_path)
 
     try:
-        df_data = parse_func(temp_path, sheet_name=sheet_name)
-        df_data["input_date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        parsed = parse_func(temp_path, sheet_name=sheet_name)
+        # Streaming parsers yield DataFrame chunks; all chunks go in one transaction
+        chunks = [parsed] if isinstance(parsed, pd.DataFrame) else parsed
+        input_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         ensure_table_exists(engine, table)
 
-        if table == 'tally_data' and 'mdb_acct_no' in df_data.columns:
-            df_data = df_data.rename(columns={'mdb_acct_no': 'acct_no'})
+        with engine.begin() as conn:
+            for df_data in chunks:
+                df_data["input_date"] = input_date
+
+                if table == 'tally_data' and 'mdb_acct_no' in df_data.columns:
+                    df_data = df_data.rename(columns={'mdb_acct_no': 'acct_no'})
+
+                # Match keys are computed once here and stored with the rows
+                add_match_keys(df_data, table)
 
-        df_data.to_sql(table, engine, if_exists='append', index=False)
+                df_data.to_sql(table, conn, if_exists='append', index=False)
         uploaded_filename = filename
         msg = f"✅ Successfully uploaded and parsed data from sheet: {sheet_name}"
         success = True
@@ -78,7 +88,7 @@ def parse_finance():
 
 @upload_bp.route('/parse_tally', methods=['POST'])
 def parse_tally():
-    return generic_parse(parse_func=parse_tally_file, table='tally_data', file_field='tally_file')
+    return generic_parse(parse_func=iter_tally_chunks, table='tally_data', file_field='tally_file')
 
 @upload_bp.route('/parse_bank', methods=['POST'])
 def parse_bank():
@@ -126,6 +136,7 @@ def parse_bank():
 
         # Insert all data into 'bank_data' table
         df_data["input_date"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        add_match_keys(df_data, 'bank_data')  # Stored match keys (cheque_ref, vendor keys)
         ensure_table_exists(engine, 'bank_data')  # Ensures the 'bank_data' table exists
         df_data.to_sql('bank_data', engine, if_exists='append', index=False)  # Insert all data into 'bank_data'
 
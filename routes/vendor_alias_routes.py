@@ -0,0 +1,69 @@
+# routes/vendor_alias_routes.py
+
+from flask import Blueprint, request, jsonify
+
+from utils.db import engine, ensure_table_exists
+from utils.vendor_aliases import (
+    ALIAS_TABLE, VERSION_TABLE, list_aliases, upsert_alias, update_alias, delete_alias
+)
+
+vendor_alias_bp = Blueprint('vendor_alias', __name__, url_prefix='/vendor_aliases')
+
+
+def _ensure_tables():
+    ensure_table_exists(engine, ALIAS_TABLE)
+    ensure_table_exists(engine, VERSION_TABLE)
+
+
+@vendor_alias_bp.route('', methods=['GET'])
+def get_aliases():
+    try:
+        _ensure_tables()
+        df = list_aliases(engine, request.args.get('bank_code'))
+        df['updated_at'] = df['updated_at'].astype(str)
+        return jsonify({'success': True, 'aliases': df.to_dict(orient='records')})
+    except Exception as e:
+        return jsonify({'success': False, 'msg': str(e)})
+
+
+@vendor_alias_bp.route('', methods=['POST'])
+def add_alias():
+    data = request.get_json(silent=True) or request.form
+    bank_code = data.get('bank_code')
+    bank_vendor = data.get('bank_vendor')
+    fin_vendor = data.get('fin_vendor')
+    if not bank_code or not bank_vendor or not fin_vendor:
+        return jsonify({'success': False, 'msg': 'bank_code, bank_vendor and fin_vendor are required.'})
+    try:
+        _ensure_tables()
+        upsert_alias(engine, bank_code, bank_vendor, fin_vendor)
+        return jsonify({'success': True, 'msg': f'Alias saved for {bank_code}.'})
+    except Exception as e:
+        return jsonify({'success': False, 'msg': str(e)})
+
+
+@vendor_alias_bp.route('/<int:alias_id>', methods=['PUT'])
+def edit_alias(alias_id):
+    data = request.get_json(silent=True) or request.form
+    bank_vendor = data.get('bank_vendor')
+    fin_vendor = data.get('fin_vendor')
+    if not bank_vendor or not fin_vendor:
+        return jsonify({'success': False, 'msg': 'bank_vendor and fin_vendor are required.'})
+    try:
+        _ensure_tables()
+        if not update_alias(engine, alias_id, bank_vendor, fin_vendor):
+            return jsonify({'success': False, 'msg': f'Alias {alias_id} not found.'})
+        return jsonify({'success': True, 'msg': f'Alias {alias_id} updated.'})
+    except Exception as e:
+        return jsonify({'success': False, 'msg': str(e)})
+
+
+@vendor_alias_bp.route('/<int:alias_id>', methods=['DELETE'])
+def remove_alias(alias_id):
+    try:
+        _ensure_tables()
+        if not delete_alias(engine, alias_id):
+            return jsonify({'success': False, 'msg': f'Alias {alias_id} not found.'})
+        return jsonify({'success': True, 'msg': f'Alias {alias_id} deleted.'})
+    except Exception as e:
+        return jsonify({'success': False, 'msg': str(e)})
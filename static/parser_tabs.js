@@ -2059,7 +2059,7 @@ if (document.getElementById('bank-tally-matched-form')) {
     document.getElementById('bank-tally-matched-statement-year-select').addEventListener('change', updateBTMatchedReportBtnState);
 }
 const btMatchedColumnOrder = [
-    'S/N', 'bt_match_id', 'bt_source', 'bank_uid', 'acct_no', 'bank_code', 'B_Date',
+    'S/N', 'bt_match_id', 'bt_source', 'bt_match_type', 'bank_uid', 'acct_no', 'bank_code', 'B_Date',
     'B_Particulars', 'B_Ref_Cheque', 'B_Withdrawal', 'B_Deposit', 'bank_ven',
     'tally_uid', 'T_Date', 'dr_cr', 'T_Particulars', 'T_Vch_No', 'T_Debit', 'T_Credit',
     'tally_ven', 'statement_month', 'statement_year'
@@ -0,0 +1,153 @@
+# tests/test_bank_fin_match.py
+
+"""
+bank_fin_match against the nested-loop matcher it replaced (hash joins for the 1-to-1
+stages, the bounded subset-sum for the 1-to-N ones). The reference below is that loop
+with its documented change: a Sunday bank row pairs with the preceding Thursday only
+(the old check took any Thursday). With config['alias_letters_digits'] the alias key
+also keeps letters and digits only.
+"""
+
+import random
+import re
+from datetime import date, timedelta
+from itertools import combinations
+
+import pandas as pd
+import pytest
+
+from logics.bank_fin_match_logic import bank_fin_match
+
+CONFIG = {'date_col': 'B_Date', 'debit_col': 'B_Withdrawal', 'bank_ven_col': 'bank_ven'}
+
+
+def frames(bank_rows, fin_rows):
+    bank = pd.DataFrame(bank_rows, columns=['bank_id', 'bank_ven', 'B_Withdrawal', 'B_Date'])
+    fin = pd.DataFrame(fin_rows, columns=['fin_id', 'fin_ven', 'F_Credit_Amount', 'F_Payment_Date'])
+    return bank, fin
+
+
+def matches(bank, fin, config=CONFIG, **kw):
+    """(match_type, bank_id, finance ids) per match, in match order."""
+    matched, _, _ = bank_fin_match(bank, fin, config, 'MDB', **kw)
+    groups = {}
+    for row in matched.to_dict('records'):
+        group = groups.setdefault(row['bf_match_id'], [row['match_type'], None, []])
+        if row['source'] == 'Bank':
+            group[1] = row['bank_id']
+        else:
+            group[2].append(row['fin_id'])
+    return [(t, b, tuple(f)) for t, b, f in groups.values()]
+
+
+def reference_matches(bank, fin, max_combo, letters_digits=False):
+    def first5(v):
+        return v.upper().strip()[:5]
+
+    def alias(v):
+        key = v.upper().strip()
+        return re.sub(r'[\W_]+', '', key) if letters_digits else key
+
+    def same_day(b_date, f_date):
+        b, f = date.fromisoformat(b_date), date.fromisoformat(f_date)
+        return b == f or (b.weekday() == 6 and f == b - timedelta(days=3))
+
+    def paisa(v):
+        return round(v * 100)
+
+    fins = list(fin.itertuples(index=False))
+    available = list(range(len(fins)))
+    result = []
+
+    def one_to_one(rows, key, match_type):
+        left = []
+        for b in rows:
+            hit = next((i for i in available
+                        if key(b.bank_ven) == key(fins[i].fin_ven)
+                        and paisa(b.B_Withdrawal) == paisa(fins[i].F_Credit_Amount)
+                        and same_day(b.B_Date, fins[i].F_Payment_Date)), None)
+            if hit is None:
+                left.append(b)
+                continue
+            available.remove(hit)
+            result.append((match_type, b.bank_id, (fins[hit].fin_id,)))
+        return left
+
+    def one_to_n(rows, key, suffix):
+        left = []
+        for b in rows:
+            candidates = [i for i in available
+                          if key(b.bank_ven) == key(fins[i].fin_ven) and same_day(b.B_Date, fins[i].F_Payment_Date)]
+            combo = next((c for r in range(2, max_combo + 1) for c in combinations(candidates, r)
+                          if sum(paisa(fins[i].F_Credit_Amount) for i in c) == paisa(b.B_Withdrawal)), None)
+            if combo is None:
+                left.append(b)
+                continue
+            for i in combo:
+                available.remove(i)
+            result.append((f'1 to {len(combo)}{suffix}', b.bank_id, tuple(fins[i].fin_id for i in combo)))
+        return left
+
+    rows = list(bank.itertuples(index=False))
+    rows = one_to_one(rows, first5, '1 to 1')
+    rows = one_to_n(rows, first5, '')
+    rows = one_to_one(rows, alias, '1 to 1 (alias)')
+    one_to_n(rows, alias, ' (alias)')
+    return result
+
+
+def random_frames(rng, n_bank, n_fin):
+    # First-5 collisions (ACME ...) and names that only meet on the alias key (ACMETRADERS)
+    vendors = ['ACME TRADERS', 'ACMETRADERS', 'ACME TRADING', 'BETA LTD', 'BETA-LTD', 'GAMMA CO']
+    amounts = [100.0, 200.0, 300.0, 250.5, 500.0, 1000.25]
+    # Thursday, the Sunday after it, Monday and the next Thursday
+    days = ['2025-02-13', '2025-02-16', '2025-02-17', '2025-02-20']
+    bank = [(i, rng.choice(vendors), rng.choice(amounts) * rng.choice([1, 1, 2, 3]), rng.choice(days))
+            for i in range(n_bank)]
+    fin = [(100 + i, rng.choice(vendors), rng.choice(amounts), rng.choice(days)) for i in range(n_fin)]
+    return frames(bank, fin)
+
+
+@pytest.mark.parametrize('letters_digits', [False, True])
+def test_same_matches_as_the_nested_loop(letters_digits):
+    config = {**CONFIG, 'alias_letters_digits': letters_digits}
+    rng = random.Random(11)
+    for _ in range(60):
+        bank, fin = random_frames(rng, rng.randint(1, 30), rng.randint(1, 60))
+        assert matches(bank, fin, config, max_combo=4) == \
+            reference_matches(bank, fin, max_combo=4, letters_digits=letters_digits)
+
+
+def test_alias_key_keeps_punctuation_by_default():
+    bank, fin = frames([(1, 'TALI&CO', 500.0, '2025-02-17')], [(10, 'TALICO', 500.0, '2025-02-17')])
+    assert matches(bank, fin) == []
+    assert matches(bank, fin, {**CONFIG, 'alias_letters_digits': True}) == [('1 to 1 (alias)', 1, (10,))]
+
+
+def test_sunday_pairs_with_the_preceding_thursday_only():
+    # 2025-02-16 is a Sunday. The old check also accepted the Thursdays before and after it.
+    bank, fin = frames(
+        [(1, 'ACME', 500.0, '2025-02-16'), (2, 'BETA', 500.0, '2025-02-16'), (3, 'GAMMA', 500.0, '2025-02-16')],
+        [(10, 'ACME', 500.0, '2025-02-13'), (11, 'BETA', 500.0, '2025-02-20'), (12, 'GAMMA', 500.0, '2025-02-06')])
+    assert matches(bank, fin) == [('1 to 1', 1, (10,))]
+
+
+def test_first_business_day_after_a_holiday():
+    bank, fin = frames([(1, 'ACME', 500.0, '2025-02-18')], [(10, 'ACME', 500.0, '2025-02-16')])
+    assert matches(bank, fin) == []
+    assert matches(bank, fin, holidays=['2025-02-17']) == [('1 to 1', 1, (10,))]
+
+
+def test_earliest_finance_row_wins():
+    bank, fin = frames(
+        [(1, 'ACME', 500.0, '2025-02-16'), (2, 'ACME', 500.0, '2025-02-16')],
+        [(10, 'ACME', 500.0, '2025-02-16'), (11, 'ACME', 500.0, '2025-02-13'), (12, 'ACME', 500.0, '2025-02-16')])
+    assert matches(bank, fin) == [('1 to 1', 1, (10,)), ('1 to 1', 2, (11,))]
+
+
+def test_combo_budget_leaves_the_bank_row_unmatched():
+    bank, fin = frames(
+        [(1, 'ACME', 600.0, '2025-02-17')],
+        [(10, 'ACME', 100.0, '2025-02-17'), (11, 'ACME', 200.0, '2025-02-17'), (12, 'ACME', 300.0, '2025-02-17')])
+    assert matches(bank, fin) == [('1 to 3', 1, (10, 11, 12))]
+    assert matches(bank, fin, combo_node_budget=1) == []
@@ -0,0 +1,34 @@
+# tests/test_bank_fin_routes.py
+
+"""/reconcile request validation; rejected requests never reach the database."""
+
+import pytest
+
+flask = pytest.importorskip('flask')
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('pymysql')
+
+import routes.bank_fin_reconcile_routes as bf_routes
+
+
+@pytest.fixture
+def client():
+    app = flask.Flask(__name__)
+    app.register_blueprint(bf_routes.bank_fin_reconcile_bp)
+    return app.test_client()
+
+
+@pytest.mark.parametrize('value', ['0', '-0.5', '1.01', '7', 'nan', 'NaN', 'inf', '-inf', 'abc'])
+def test_fuzzy_threshold_out_of_range_is_rejected(client, value):
+    body = client.post('/reconcile', data={'bank_code': 'MDB', 'fuzzy_threshold': value}).get_json()
+    assert body == {'success': False,
+                    'msg': 'fuzzy_threshold must be a number between 0 and 1, "on" or "off".'}
+
+
+@pytest.mark.parametrize('value', ['', 'off', 'on', '0.7', '1'])
+def test_valid_fuzzy_threshold_passes_validation(client, monkeypatch, value):
+    def no_database(*args, **kwargs):
+        raise RuntimeError('no database')
+    monkeypatch.setattr(bf_routes.pd, 'read_sql', no_database)
+    body = client.post('/reconcile', data={'bank_code': 'MDB', 'fuzzy_threshold': value}).get_json()
+    assert body == {'success': False, 'msg': 'Error loading tables: no database'}
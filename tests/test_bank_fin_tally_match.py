@@ -0,0 +1,146 @@
+# tests/test_bank_fin_tally_match.py
+
+"""
+bank_fin_tally_match: the group walk against the per-group mask loop it replaced, and
+the set-based mode against the group walk, on random bf groups and tally rows. The data
+has keys shared by several groups and keys with more demand than tally rows, as well as
+the same key twice in one group, NaN and blank amounts, groups without finance rows and
+groups with two bank rows.
+"""
+
+import math
+import random
+import re
+
+import pandas as pd
+
+from logics.bank_fin_tally_match_logic import bank_fin_tally_match
+
+AMOUNTS = [100.0, 250.0, 250.5, 1000.0]
+
+
+def random_frames(rng, n_groups, n_vouchers, n_tally, blanks=True):
+    missing = [float('nan'), ''] if blanks else [float('nan')]
+    bf = []
+    for g in range(1, n_groups + 1):
+        gid = f"{g:04d}"
+        fins = []
+        for _ in range(rng.choice([0, 1, 1, 2, 2, 3])):
+            amounts = AMOUNTS + missing if rng.random() < 0.1 else AMOUNTS
+            fins.append((f"PV-{rng.randrange(n_vouchers)}", rng.choice(amounts)))
+        if fins and rng.random() < 0.15:
+            fins.append(fins[0])
+        total = sum(a for _, a in fins if isinstance(a, float) and not math.isnan(a))
+        bank_amount = rng.choice([total, total, total, total + 1, float('nan')])
+        for _ in range(2 if rng.random() < 0.05 else 1):
+            bf.append((gid, rng.choice(['Bank', 'bank']), f"B{g}", None, bank_amount, None, None))
+        for k, (vch, amt) in enumerate(fins):
+            bf.append((gid, 'Finance', None, f"F{g}_{k}", None, amt, vch))
+    rng.shuffle(bf)
+    bf = pd.DataFrame(bf, columns=['bf_match_id', 'bf_source', 'bank_uid', 'fin_uid',
+                                   'B_Withdrawal', 'F_Credit_Amount', 'F_Voucher_No'])
+    tally = pd.DataFrame({
+        'tally_uid': [f"T{i:03d}" for i in range(n_tally)],
+        'T_Vch_No': [f"V/{rng.randrange(n_vouchers)}" for _ in range(n_tally)],
+        'T_Credit': [rng.choice(AMOUNTS + missing) for _ in range(n_tally)],
+    })
+    return bf, tally
+
+
+def reference_match(bf_df, tally_df, run_tag=""):
+    """The per-group mask loop bank_fin_tally_match had before the tally index."""
+    def numeric(val):
+        return '' if pd.isnull(val) else ''.join(re.findall(r'\d+', str(val)))
+
+    tally_df = tally_df.copy()
+    tally_df['tally_uid'] = tally_df['tally_uid'].astype(str)
+    tally_df = tally_df.set_index('tally_uid', drop=False)
+    used_tally_uids = set()
+    rows = []
+    counter = 1
+    for _, group in bf_df.groupby('bf_match_id'):
+        bank_rows = group[group['bf_source'].str.lower() == 'bank']
+        finance_rows = group[group['bf_source'].str.lower() == 'finance']
+        if bank_rows.shape[0] != 1 or finance_rows.shape[0] < 1:
+            continue
+        bank_row = bank_rows.iloc[0]
+        finance_amounts = finance_rows['F_Credit_Amount'].astype(float)
+        bank_amount = float(bank_row['B_Withdrawal'])
+
+        matched = []
+        candidates = tally_df[~tally_df.index.isin(used_tally_uids)].copy()
+        candidates['vch_suffix'] = candidates['T_Vch_No'].apply(numeric)
+        candidates['T_Credit'] = candidates['T_Credit'].astype(float)
+        for vch, amt in zip(finance_rows['F_Voucher_No'].apply(numeric), finance_amounts):
+            hit = candidates[(candidates['vch_suffix'] == vch) & (candidates['T_Credit'] == amt)]
+            if hit.empty:
+                break
+            matched.append(str(hit['tally_uid'].iloc[0]))
+
+        sum_tally = tally_df.loc[matched]['T_Credit'].sum() if matched else 0
+        if len(finance_rows) == len(matched) and abs(finance_amounts.sum() - bank_amount) < 1e-4 \
+                and abs(sum_tally - bank_amount) < 1e-4:
+            used_tally_uids.update(matched)
+            match_id = f"BFTM_{run_tag}_{counter:04d}" if run_tag else f"BFTM_{counter:04d}"
+            match_type = f"1 to {len(finance_rows)} to {len(matched)}"
+            parts = [('Bank', bank_row)] + [('Finance', r) for _, r in finance_rows.iterrows()] \
+                + [('Tally', tally_df.loc[uid]) for uid in matched]
+            for source, row in parts:
+                row = row.copy()
+                row['bft_match_id'] = match_id
+                row['bft_match_type'] = match_type
+                row['bft_source'] = source
+                rows.append(row)
+            counter += 1
+    return pd.DataFrame(rows)
+
+
+def canon(df):
+    """Row values with every missing value as None (the modes differ only in NaN vs None)."""
+    df = df.reset_index(drop=True).astype(object)
+    return df.where(df.notna(), None)
+
+
+def test_set_mode_returns_the_group_walk_rows():
+    matched_groups = 0
+    for seed in range(60):
+        rng = random.Random(seed)
+        bf, tally = random_frames(rng, n_groups=rng.choice([5, 20, 40]),
+                                  n_vouchers=rng.choice([2, 4, 8]), n_tally=rng.choice([5, 20, 60]))
+        by_group = bank_fin_tally_match(bf, tally.copy(), 'MDB', run_tag='T', mode='group')
+        by_set = bank_fin_tally_match(bf, tally.copy(), 'MDB', run_tag='T', mode='set')
+        pd.testing.assert_frame_equal(canon(by_set), canon(by_group), obj=f"seed {seed}")
+        if not by_group.empty:
+            matched_groups += by_group['bft_match_id'].nunique()
+    assert matched_groups > 150
+
+
+def test_group_walk_matches_the_mask_loop():
+    for seed in range(30):
+        rng = random.Random(seed)
+        bf, tally = random_frames(rng, n_groups=rng.choice([5, 20, 40]), n_vouchers=rng.choice([2, 4, 8]),
+                                  n_tally=rng.choice([5, 20, 60]), blanks=False)
+        expected = reference_match(bf, tally, run_tag='T')
+        got = bank_fin_tally_match(bf, tally, 'MDB', run_tag='T', mode='group')
+        pd.testing.assert_frame_equal(canon(got), canon(expected), obj=f"seed {seed}")
+
+
+def test_same_key_twice_in_a_group_reuses_the_tally_row():
+    # As in the mask loop, both finance rows of a group take the first unused tally row
+    # for their key; the row is only marked used once the group has matched.
+    bf = pd.DataFrame({
+        'bf_match_id': ['0001', '0001', '0001', '0002', '0002'],
+        'bf_source': ['Bank', 'Finance', 'Finance', 'Bank', 'Finance'],
+        'B_Withdrawal': [200.0, None, None, 100.0, None],
+        'F_Credit_Amount': [None, 100.0, 100.0, None, 100.0],
+        'F_Voucher_No': [None, 'PV-1', 'PV-1', None, 'PV-1'],
+    })
+    tally = pd.DataFrame({'tally_uid': [7, 8], 'T_Vch_No': ['V/1', 'V/1'], 'T_Credit': [100.0, 100.0]})
+    before = tally.copy()
+
+    expected = reference_match(bf, tally)
+    for mode in ('group', 'set'):
+        got = bank_fin_tally_match(bf, tally, 'MDB', mode=mode)
+        pd.testing.assert_frame_equal(canon(got), canon(expected), obj=mode)
+        assert list(got.loc[got['bft_source'] == 'Tally', 'tally_uid']) == ['7', '7', '8']
+    pd.testing.assert_frame_equal(tally, before)
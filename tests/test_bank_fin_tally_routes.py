@@ -0,0 +1,93 @@
+# tests/test_bank_fin_tally_routes.py
+
+"""
+/reconcile_bft end to end on an in-memory SQLite database standing in for MySQL: a
+matching bf group and tally row are written to bft_matched without the matching
+helper columns, and the source rows are flagged as matched.
+"""
+
+import pandas as pd
+import pytest
+
+flask = pytest.importorskip('flask')
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('pymysql')
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+import routes.bank_fin_tally_reconcile_routes as bft_routes
+
+BF_ROWS = [
+    # bf_match_id, bf_source, bank_uid, fin_uid, B_Withdrawal, F_Credit_Amount, F_Voucher_No, _ven_alias
+    ('0001', 'Bank', 'B1', None, 1500.0, None, None, 'ACME'),
+    ('0001', 'Finance', None, 'F1', None, 1000.0, 'PV-101', 'ACME'),
+    ('0001', 'Finance', None, 'F2', None, 500.0, 'PV-102', 'ACME'),
+    ('0002', 'Bank', 'B2', None, 900.0, None, None, 'BETA'),
+    ('0002', 'Finance', None, 'F3', None, 900.0, 'PV-103', 'BETA'),
+]
+TALLY_ROWS = [
+    # tally_uid, T_Vch_No, T_Credit
+    ('T1', 'VCH/101', 1000.0),
+    ('T2', 'VCH/102', 500.0),
+    ('T3', 'VCH/104', 900.0),
+]
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    bf = pd.DataFrame(BF_ROWS, columns=['bf_match_id', 'bf_source', 'bank_uid', 'fin_uid', 'B_Withdrawal',
+                                        'F_Credit_Amount', 'F_Voucher_No', '_ven_alias'])
+    bf.insert(0, 'id', range(1, len(bf) + 1))
+    bf = bf.assign(bank_code='MDB', acct_no='123', bft_is_matched=0, bft_date_matched=None)
+    tally = pd.DataFrame(TALLY_ROWS, columns=['tally_uid', 'T_Vch_No', 'T_Credit'])
+    tally.insert(0, 'id', range(1, len(tally) + 1))
+    tally = tally.assign(bank_code='MDB', acct_no='123', bft_is_matched=0, bft_date_matched=None)
+    bf.to_sql('bf_matched', engine, index=False)
+    tally.to_sql('tally_data', engine, index=False)
+    pd.DataFrame({'bank_uid': ['B1', 'B2'], 'bft_is_matched': 0, 'bft_date_matched': None}).to_sql(
+        'bank_data', engine, index=False)
+    pd.DataFrame({'fin_uid': ['F1', 'F2', 'F3'], 'bft_is_matched': 0, 'bft_date_matched': None}).to_sql(
+        'fin_data', engine, index=False)
+    # bft_matched has no helper columns, so an undropped _ven_alias fails the insert
+    out_cols = [c for c in bf.columns if c not in ('id', '_ven_alias')] + [
+        c for c in tally.columns if c not in bf.columns and c != 'id'] + [
+        'input_date', 'bft_match_id', 'bft_match_type', 'bft_source']
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE TABLE bft_matched ({', '.join(out_cols)})"))
+    monkeypatch.setattr(bft_routes, 'engine', engine)
+    return engine
+
+
+@pytest.fixture
+def client():
+    app = flask.Flask(__name__)
+    app.register_blueprint(bft_routes.bank_fin_tally_reconcile_bp)
+    return app.test_client()
+
+
+def test_reconcile_writes_matched_rows_without_helper_columns(db, client):
+    response = client.post('/reconcile_bft', data={'bank_code': 'MDB', 'account_number': '123'})
+    body = response.get_json()
+
+    assert response.status_code == 200
+    assert body['success'], body
+    assert body['inserted'] == 5
+    assert body['matched_count'] == 1
+    assert body['unmatched_bf_count'] == 1
+    assert body['unmatched_tally_count'] == 1
+
+    written = pd.read_sql('SELECT * FROM bft_matched', db)
+    assert list(written['bft_source']) == ['Bank', 'Finance', 'Finance', 'Tally', 'Tally']
+    assert set(written['bft_match_type']) == {'1 to 2 to 2'}
+    assert list(written.loc[written['bft_source'] == 'Tally', 'tally_uid']) == ['T1', 'T2']
+
+    def flagged(table, key):
+        rows = pd.read_sql(f'SELECT {key}, bft_is_matched FROM {table}', db)
+        return sorted(rows.loc[rows['bft_is_matched'] == 1, key])
+
+    assert flagged('bf_matched', 'bf_match_id') == ['0001', '0001', '0001']
+    assert flagged('tally_data', 'tally_uid') == ['T1', 'T2']
+    assert flagged('bank_data', 'bank_uid') == ['B1']
+    assert flagged('fin_data', 'fin_uid') == ['F1', 'F2']
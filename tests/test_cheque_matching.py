@@ -0,0 +1,244 @@
+# tests/test_cheque_matching.py
+
+"""
+match_cheques driven by CHEQUE_SPECS against the MDB, MTB and PBL matchers it replaced:
+the refs each spec extracts (expected values from the old per-bank extractors) and the
+pairs, compared with the old per-row walk: each bank row with a ref takes the first
+unused tally row, in tally order, with that ref and an exact amount in its direction.
+prefix_rule_hits against one re.search per rule. The rare-token fallback
+(match_ref_tokens) and its opt-in switch.
+"""
+
+import random
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from logics.bank_tally_match_logic import CHEQUE_SPECS, match_cheques, compile_cheque_spec
+from logics.cheque_ref_extract import prefix_rule_hits
+from logics.cheque_token_index import match_ref_tokens
+
+EXTRACTION_CASES = {
+    ("MDB", "bank"): [
+        ("On-Line CashCA1234567 Vendor", "1234567"),
+        ("CLG- InwardCA 0012345 RV", "0012345"),
+        ("on-line cashca12 34", "1234"),
+        ("RTGS RTGS Outward/ABC/98765-43/XYZ", "9876543"),
+        ("rtgs rtgs inward/x/1234 5/y", "12345"),
+        ("CLG HV/a/b/ 55-555 /c", "55555"),
+        ("CLG HV/a/b/123/c", None),
+        ("Transfer BEFTN Outward/1/2/3", None),
+        (None, None),
+    ],
+    ("MDB", "tally"): [
+        ("Paid by cq-12345 to vendor", "12345"),
+        ("Cheque No : C 0045678", "0045678"),
+        ("Ref A/C-99 88 77", "998877"),
+        ("SND-1234", None),
+        ("x CQ-555-55 y cd-66666", "55555"),
+        ("(Hypo)-77777", "77777"),
+        ("OD#12-345", "12345"),
+        ("nothing here", None),
+        (None, None),
+    ],
+    ("MTB", "bank"): [
+        ("LC ISSUE CHARGE : 00012345", "12345"),
+        ("Transfer 11111 to 22,222 ref", "22222"),
+        ("USD 12345 67890", "67890"),
+        ("ACCEPTANCE COMM/a/b/c/98765/x", "98765"),
+        ("ACCEPTANCE COMM/a/b/no digits/x", None),
+        ("short 12 34", None),
+    ],
+    ("MTB", "tally"): [
+        ("$0012345", "12345"),
+        ("GULC#55555", "55555"),
+        ("cq-0000012345", "12345"),
+        ("STD-12 34", "1234"),
+        ("nothing", None),
+    ],
+    ("PBL", "bank"): [
+        ("LD2503320442", "LD2503320442"),
+        ("PDLD2404274823X", "PDLD2404274823X"),
+        ("ref FT25032KBLVY", None),
+        ("ld2503320442", None),
+        (None, None),
+    ],
+}
+EXTRACTION_CASES[("PBL", "tally")] = EXTRACTION_CASES[("PBL", "bank")]
+
+# Narrations carrying a ref, per bank and side; the last template carries none a rule can find
+TEMPLATES = {
+    "MDB": (["CLG- InwardCA {ref} RV", "On-Line CashCA{ref} Vendor", "RTGS RTGS Outward/ABC/{ref}/XYZ", "misc {ref}"],
+            ["cq-{ref}", "Cheque No : C {ref}", "CD-{ref}", "text {ref}"]),
+    "MTB": (["LC ISSUE CHARGE : 00{ref}", "USD {ref}", "Transfer 11111 to {ref}", "short {ref}"],
+            ["$00{ref}", "cq-{ref}", "GULC#{ref}", "nothing {ref}"]),
+    "PBL": (["LD{ref}", "FT{ref}X", "PD{ref}", "{ref}"],
+            ["paid LD{ref} x", "FT{ref}X", "PD{ref}", "ld{ref}"]),
+}
+REFS = ["1234567", "2345678", "3456789"]
+AMOUNTS = [None, 0, 500.0, 1250.5, 99999.99]
+
+
+@pytest.mark.parametrize("bank_code, side", sorted(EXTRACTION_CASES))
+def test_extracted_refs_match_the_old_extractors(bank_code, side):
+    texts, expected = zip(*EXTRACTION_CASES[(bank_code, side)])
+    refs = compile_cheque_spec(bank_code).extract(side, pd.Series(texts, dtype=object))
+    assert refs.tolist() == list(expected)
+
+
+def frames(bank_rows, tally_rows):
+    bank = pd.DataFrame(bank_rows, columns=['bank_id', 'B_Particulars', 'B_Ref_Cheque', 'B_Withdrawal',
+                                            'B_Deposit', 'B_Date'])
+    tally = pd.DataFrame(tally_rows, columns=['tally_id', 'T_Particulars', 'T_Debit', 'T_Credit', 'T_Date'])
+    return bank.assign(bf_is_matched=0), tally.assign(bft_is_matched=0)
+
+
+def pairs(matched):
+    """(bank_id, tally_id) per match; match_cheques emits the bank row then its tally row."""
+    assert matched['bt_source'].tolist() == ['Bank', 'Tally'] * (len(matched) // 2)
+    return list(zip(matched['bank_id'].iloc[0::2].astype(int), matched['tally_id'].iloc[1::2].astype(int)))
+
+
+def reference_pairs(bank_code, bank, tally):
+    spec = compile_cheque_spec(bank_code)
+    bank_refs = spec.extract('bank', bank[spec['bank']['column']])
+    tally_refs = spec.extract('tally', tally[spec['tally']['column']])
+
+    def paisa(val):
+        return 0 if val is None or pd.isna(val) else round(float(val) * 100)
+
+    used = set()
+    result = []
+    for b, ref in zip(bank.itertuples(index=False), bank_refs):
+        if not isinstance(ref, str) or not ref:
+            continue
+        withdrawal = paisa(b.B_Withdrawal)
+        if spec['withdrawal_amount'] == 'abs':
+            withdrawal = abs(withdrawal)
+        deposit = paisa(b.B_Deposit)
+        for j, (t, t_ref) in enumerate(zip(tally.itertuples(index=False), tally_refs)):
+            if j in used or t_ref != ref:
+                continue
+            if (withdrawal and withdrawal == paisa(t.T_Credit)) or (deposit and deposit == paisa(t.T_Debit)):
+                used.add(j)
+                result.append((b.bank_id, t.tally_id))
+                break
+    return result
+
+
+def random_frames(rng, bank_code, n_bank, n_tally):
+    bank_templates, tally_templates = TEMPLATES[bank_code]
+    sign = -1 if bank_code == "PBL" else 1
+
+    def amount():
+        val = rng.choice(AMOUNTS)
+        return val * rng.choice([1, sign]) if val else val
+
+    bank_rows = []
+    for i in range(n_bank):
+        text = rng.choice(bank_templates).format(ref=rng.choice(REFS))
+        particulars, cheque = (f"narration {i}", text) if bank_code == "PBL" else (text, None)
+        bank_rows.append((i, particulars, cheque, amount(), rng.choice(AMOUNTS), "2025-02-16"))
+    tally_rows = [(100 + j, rng.choice(tally_templates).format(ref=rng.choice(REFS)),
+                   rng.choice(AMOUNTS), rng.choice(AMOUNTS), "2025-02-16") for j in range(n_tally)]
+    return frames(bank_rows, tally_rows)
+
+
+@pytest.mark.parametrize("bank_code", ["MDB", "MTB", "PBL"])
+def test_same_pairs_as_the_per_bank_matchers(bank_code):
+    rng = random.Random(bank_code)
+    found = 0
+    for _ in range(30):
+        bank, tally = random_frames(rng, bank_code, rng.randint(1, 30), rng.randint(1, 40))
+        expected = reference_pairs(bank_code, bank, tally)
+        assert pairs(match_cheques(bank_code, bank, tally)) == expected
+        found += len(expected)
+    assert found > 0
+
+
+@pytest.mark.parametrize("bank_code", ["MDB", "MTB", "PBL"])
+def test_rows_without_a_ref_never_pair(bank_code):
+    # The old PBL matcher paired these: newer pandas turned its None refs into truthy NaN
+    bank, tally = frames(
+        [(1, None, None, 500.0, None, "2025-02-16"), (2, "no ref here", float("nan"), 500.0, None, "2025-02-16")],
+        [(10, "no ref here", None, 500.0, "2025-02-16"), (11, None, None, 500.0, "2025-02-16")])
+    assert match_cheques(bank_code, bank, tally).empty
+
+
+def test_date_window_takes_the_closest_tally_row():
+    bank, tally = frames(
+        [(1, "CLG- InwardCA 1234567 RV", None, 500.0, None, "2025-02-16")],
+        [(10, "cq-1234567", None, 500.0, "2025-02-13"), (11, "cq-1234567", None, 500.0, "2025-02-17"),
+         (12, "cq-1234567", None, 500.0, "2025-02-26")])
+    assert pairs(match_cheques("MDB", bank, tally, date_window=3)) == [(1, 11)]
+    assert pairs(match_cheques("MDB", bank, tally.iloc[[0, 2]], date_window=3)) == [(1, 10)]
+    assert match_cheques("MDB", bank, tally.iloc[[2]], date_window=3).empty
+
+
+def token_match(bank_tokens, tally_tokens, withdrawals, tally_credits, near=None):
+    """match_ref_tokens over every row of withdrawal-only pools, as (bank, tally, token) triples."""
+    bank_tokens = [frozenset(t) for t in bank_tokens]
+    tally_tokens = [frozenset(t) for t in tally_tokens]
+    zeros_bank = np.zeros(len(bank_tokens), dtype='int64')
+    zeros_tally = np.zeros(len(tally_tokens), dtype='int64')
+    found, tokens = match_ref_tokens(
+        bank_tokens, tally_tokens, np.arange(len(bank_tokens)), np.arange(len(tally_tokens)),
+        np.array(withdrawals, dtype='int64'), zeros_bank, np.array(tally_credits, dtype='int64'), zeros_tally,
+        near=near)
+    return [(int(i), int(j), token) for (i, j), token in zip(found, tokens)]
+
+
+def test_token_fallback_skips_common_tokens():
+    # 'ACCT00111' is on 10 of 100 tally rows: idf ln(1 + 100/10) is under the ln(51) cutoff
+    tally = [{'ACCT00111'} if j < 10 else {f'FILL{j:05d}'} for j in range(100)]
+    credits = [50000] * 100
+    assert token_match([{'ACCT00111'}], tally, [50000], credits) == []
+    # A token on a single tally row is rare enough, whatever the pool size
+    assert token_match([{'ACCT00111', 'FILL00042'}], tally, [50000], credits) == [(0, 42, 'FILL00042')]
+
+
+def test_token_fallback_ignores_the_amount_itself():
+    # 12345.00 taka: neither '12345' nor '1234500' may pair the rows
+    assert token_match([{'12345'}], [{'12345'}], [1234500], [1234500]) == []
+    assert token_match([{'1234500'}], [{'1234500'}], [1234500], [1234500]) == []
+    assert token_match([{'12345', 'LD25033'}], [{'12345', 'LD25033'}], [1234500], [1234500]) == \
+        [(0, 0, 'LD25033')]
+
+
+def test_token_fallback_needs_the_amount_and_near():
+    assert token_match([{'LD25033'}], [{'LD25033'}], [50000], [50001]) == []
+    assert token_match([{'LD25033'}], [{'LD25033'}], [50000], [50000], near=lambda i, j: False) == []
+    # Most shared rare tokens first, then the earliest tally row
+    assert token_match([{'LD25033', 'CQ77777'}], [{'LD25033'}, {'LD25033', 'CQ77777'}, {'CQ77777'}],
+                       [50000], [50000] * 3) == [(0, 1, 'CQ77777')]
+
+
+def test_token_fallback_is_off_by_default():
+    bank, tally = frames(
+        [(1, "Transfer LD2503320442 ACME", None, 500.0, None, "2025-02-16")],
+        [(10, "Payment ref LD2503320442", None, 500.0, "2025-02-16")])
+    assert match_cheques("MDB", bank, tally).empty
+    assert match_cheques("MDB", bank, tally, token_fallback=False).empty
+    matched = match_cheques("MDB", bank, tally, token_fallback=True)
+    assert pairs(matched) == [(1, 10)]
+    assert matched['cheque_ref'].tolist() == ['2503320442'] * 2
+    assert match_cheques("MDB", bank, tally.assign(T_Date="2025-02-26"), date_window=3, token_fallback=True).empty
+
+
+@pytest.mark.parametrize("bank_code", sorted(CHEQUE_SPECS))
+@pytest.mark.parametrize("side", ["bank", "tally"])
+def test_prefix_rule_hits_equal_one_search_per_rule(bank_code, side):
+    rules = tuple((r['prefix'], r['min_digits']) for r in CHEQUE_SPECS[bank_code][side]['rules'] if 'prefix' in r)
+    if not rules:
+        pytest.skip("no prefix rules")
+    rng = random.Random(f"{bank_code}{side}")
+    pieces = [prefix for prefix, _ in rules] + ['cq', 'CQ', '/', ' ', '-', '0', '12345', '1-2 3', '\n', 'x']
+    texts = pd.Series([''.join(rng.choice(pieces) for _ in range(rng.randint(0, 12))) for _ in range(3000)],
+                      dtype=object)
+    hits = prefix_rule_hits(texts, rules)
+    for i, (prefix, min_digits) in enumerate(rules):
+        pattern = re.compile(rf"{re.escape(prefix)}([\d\- ]{{{min_digits},}})", re.DOTALL | re.IGNORECASE)
+        expected = [m.group(1) if (m := pattern.search(text)) else None for text in texts]
+        assert hits[f"r{i}"].tolist() == expected, prefix
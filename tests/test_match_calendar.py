@@ -0,0 +1,41 @@
+# tests/test_match_calendar.py
+
+import pandas as pd
+
+from logics.match_calendar import add_date_keys
+
+
+def day(date):
+    return (pd.Timestamp(date) - pd.Timestamp('1970-01-01')).days
+
+
+def date_keys(dates, holidays=()):
+    return add_date_keys(pd.DataFrame({'d': dates}), 'd', holidays)
+
+
+def test_sunday_probes_the_preceding_thursday_only():
+    # 2025-02-13 is a Thursday; Friday and Saturday are off
+    df = date_keys(['2025-02-13', '2025-02-14', '2025-02-15', '2025-02-16', '2025-02-17'])
+    assert df['_norm_weekday'].tolist() == [3, 4, 5, 6, 0]
+    assert df['_norm_day'].tolist() == [day('2025-02-13'), day('2025-02-14'), day('2025-02-15'),
+                                        day('2025-02-16'), day('2025-02-17')]
+    prev = df['_norm_prev_day']
+    assert prev.isna().tolist() == [True, True, True, False, True]
+    assert prev.iloc[3] == day('2025-02-13')
+
+
+def test_first_business_day_after_a_holiday():
+    # Monday 2025-02-17 off: Tuesday reaches back over it and the weekend to Thursday
+    df = date_keys(['2025-02-16', '2025-02-17', '2025-02-18', '2025-02-19'], holidays=['2025-02-17'])
+    prev = df['_norm_prev_day']
+    assert prev.iloc[0] == day('2025-02-13')
+    assert pd.isna(prev.iloc[1])  # a holiday is not a business day itself
+    assert prev.iloc[2] == day('2025-02-16')
+    assert pd.isna(prev.iloc[3])
+
+
+def test_unparseable_dates_get_no_keys():
+    df = date_keys(['2025-02-16', 'not a date', None])
+    assert df['_norm_date'].isna().tolist() == [False, True, True]
+    assert df['_norm_day'].isna().tolist() == [False, True, True]
+    assert df['_norm_prev_day'].isna().tolist() == [False, True, True]
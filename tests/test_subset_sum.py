@@ -0,0 +1,63 @@
+# tests/test_subset_sum.py
+
+import random
+from itertools import combinations
+
+from logics.match_stats import StageStats
+from logics.subset_sum import find_subset_sum
+
+
+def brute_force(amounts, target, min_r=2, max_r=10):
+    """The pre-solver search: smallest r first, then the first combination of positions."""
+    for r in range(min_r, min(max_r, len(amounts)) + 1):
+        for combo in combinations(range(len(amounts)), r):
+            if sum(amounts[i] for i in combo) == target:
+                return list(combo)
+    return None
+
+
+def test_same_answer_as_itertools_combinations():
+    rng = random.Random(7)
+    for _ in range(400):
+        n = rng.randint(0, 11)
+        amounts = [rng.choice([0, 5000, 10000, 12550, 20000, 33333, 50000]) for _ in range(n)]
+        max_r = rng.randint(2, 5)
+        if amounts and rng.random() < 0.7:
+            picked = rng.sample(range(n), min(n, rng.randint(1, max_r)))
+            target = sum(amounts[i] for i in picked)
+        else:
+            target = rng.randint(0, 150000)
+        assert find_subset_sum(amounts, target, max_r=max_r) == brute_force(amounts, target, max_r=max_r)
+
+
+def test_no_subset_and_degenerate_inputs():
+    assert find_subset_sum([100, 200], 250) is None
+    assert find_subset_sum([300], 300) is None  # a single row is the 1-to-1 stage's job
+    assert find_subset_sum([], 0) is None
+    assert find_subset_sum([100, 200], None) is None
+    assert find_subset_sum([100, 200, 300], 600, max_r=2) is None
+    assert find_subset_sum([100, 200, 300], 600, max_r=3) == [0, 1, 2]
+
+
+def test_node_budget_gives_up_and_counts_nodes():
+    # Even amounts never reach an odd target, but the min/max bounds cannot tell
+    amounts = [2 * (i + 1) for i in range(40)]
+    st = StageStats('1 to N')
+    assert find_subset_sum(amounts, 101, max_r=10, node_budget=100, time_budget=None, stats=st) is None
+    assert st.combinations == 101
+
+
+def test_budget_can_hide_a_solution():
+    amounts = [2 * (i + 1) for i in range(30)] + [1]
+    target = amounts[-1] + amounts[5] + amounts[10]
+    assert find_subset_sum(amounts, target, max_r=3, node_budget=None, time_budget=None) == brute_force(
+        amounts, target, max_r=3)
+    assert find_subset_sum(amounts, target, max_r=3, node_budget=5, time_budget=None) is None
+
+
+def test_time_budget_gives_up():
+    amounts = [2 * (i + 1) for i in range(60)]
+    st = StageStats('1 to N')
+    assert find_subset_sum(amounts, 301, max_r=10, node_budget=None, time_budget=1e-9, stats=st) is None
+    # The clock is only read every 1024 nodes
+    assert 1024 <= st.combinations < 1_000_000
@@ -0,0 +1,213 @@
+# tests/test_tally_parser.py
+
+"""
+The streaming Tally ledger parser on small workbooks built here: merged cells against
+the full-mode unmerge it replaced, chunked output against the whole-sheet parse, and
+the trailing totals-only row. normalize_particulars/extract_vendors against the per-row
+process_particulars/extract_vendor_updated they replaced. The calamine reader backend
+against openpyxl, when python-calamine is installed.
+"""
+
+import random
+import re
+import string
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from parsers.tally_parser import (
+    extract_vendors, fill_merged, iter_tally_chunks, normalize_particulars, parse_tally_file, read_merged_ranges
+)
+from utils.excel_reader import iter_sheet_rows, read_raw_sheet
+
+SHEET = 'Ledger'
+METADATA = [
+    ['ACME Unit : (Dhaka Factory)'],
+    ['Midland Bank Ltd'],
+    ['A/C 0011-1050011026'],
+    ['1-Feb-2025 to 28-Feb-2025'],
+    [],
+]
+HEADER = ['Date', 'Particulars', None, 'Vch Type', 'Vch No.', 'Debit', 'Credit']
+LEDGER = [
+    [datetime(2025, 2, 1), 'Cr', 'Opening Balance', None, None, None, 100000],
+    [datetime(2025, 2, 3), 'Dr', 'M/S Acme Traders', 'Payment', 'PV-1', 1500.5, None],
+    [None, None, 'cq-123456 first line', None, None, None, None],
+    [datetime(2025, 2, 4), 'Dr', 'Advance Beta and Co-ID:77', 'Payment', 'PV-2', 2500.5, None],
+    [datetime(2025, 2, 5), 'Cr', '(as per details)', 'Receipt', 'PV-3', None, '1,200.00'],
+    [None, None, 'Payable-Gamma Traders-ID 5 Amount 1200', None, None, None, None],
+    [datetime(2025, 2, 6), 'Dr', 'Delta Ltd', 'Journal', 'JV-9', 300, None],  # D:E merged below
+    [datetime(2025, 2, 7), 'Dr', 'Epsilon spanning', 'Payment', 'PV-4', 3.5, None],  # C merged over 2 rows
+    [None, None, None, None, None, None, None],
+    [datetime(2025, 2, 8), 'Cr', 'M/S. Zeta', 'Receipt', 'PV-5', None, -42.5],
+    [None, None, 'Closing Balance', None, None, '1', '2'],
+    [None, None, None, None, None, '123,456.00', '654,321.00'],
+]
+# (min_row, min_col, max_row, max_col) in sheet coordinates
+MERGES = [(1, 1, 1, 4), (6, 2, 6, 3), (13, 4, 13, 5), (14, 3, 15, 3)]
+
+
+def ledger_workbook(path, merged=True):
+    """The ledger above; merged=False writes every merged cell's anchor value out instead."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = SHEET
+    for row in METADATA + [HEADER] + LEDGER:
+        ws.append(row)
+    for min_row, min_col, max_row, max_col in MERGES:
+        if merged:
+            ws.merge_cells(start_row=min_row, start_column=min_col, end_row=max_row, end_column=max_col)
+        else:
+            anchor = ws.cell(min_row, min_col).value
+            for r in range(min_row, max_row + 1):
+                for c in range(min_col, max_col + 1):
+                    ws.cell(r, c).value = anchor
+    wb.save(path)
+    return path
+
+
+def old_unmerged_rows(path):
+    """Sheet rows after the old parser's unmerge loop on a full-mode workbook."""
+    wb = load_workbook(path, data_only=True)
+    ws = wb[SHEET]
+    for rng in list(ws.merged_cells.ranges):
+        val = ws[rng.coord.split(":")[0]].value
+        ws.unmerge_cells(str(rng))
+        for row in ws[rng.coord]:
+            for cell in row:
+                cell.value = val
+    rows = [list(r) for r in ws.iter_rows(values_only=True)]
+    wb.close()
+    return rows
+
+
+def canon(df):
+    """Row values with every missing value as None."""
+    df = df.reset_index(drop=True).astype(object)
+    return df.where(df.notna(), None)
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    return ledger_workbook(tmp_path / 'ledger.xlsx')
+
+
+def test_merged_ranges_fill_like_the_old_unmerge(workbook):
+    merged = read_merged_ranges(workbook, SHEET)
+    assert sorted(merged) == sorted(MERGES)
+    filled = [f for _, f in fill_merged(iter_sheet_rows(workbook, SHEET, 'openpyxl'), merged)]
+    assert filled == old_unmerged_rows(workbook)
+
+
+def test_merged_sheet_parses_like_its_unmerged_copy(workbook, tmp_path):
+    df = parse_tally_file(workbook, SHEET, backend='openpyxl')
+    plain = parse_tally_file(ledger_workbook(tmp_path / 'plain.xlsx', merged=False), SHEET, backend='openpyxl')
+    pd.testing.assert_frame_equal(df, plain)
+    # The D:E merge repeats the voucher type into Vch No., as unmerging did
+    assert df.loc[df['T_Particulars'] == 'Delta Ltd', 'T_Vch_No'].tolist() == ['Journal']
+
+
+def test_chunks_concatenate_to_the_whole_sheet(workbook):
+    whole = parse_tally_file(workbook, SHEET, backend='openpyxl')
+    chunks = list(iter_tally_chunks(workbook, SHEET, chunk_rows=2, backend='openpyxl'))
+    assert len(chunks) > 2
+    for chunk in chunks:
+        assert list(chunk.columns) == list(whole.columns)
+    # A chunk whose Debit cells are all empty has None where the whole sheet has NaN
+    pd.testing.assert_frame_equal(canon(pd.concat(chunks, ignore_index=True)), canon(whole))
+    numbers = [int(uid.rsplit('_', 1)[1]) for uid in whole['tally_uid'] if uid]
+    assert numbers == list(range(1, len(numbers) + 1))
+
+
+def test_trailing_totals_row_is_dropped(workbook):
+    df = parse_tally_file(workbook, SHEET, backend='openpyxl')
+    assert df['T_Vch_No'].iloc[-1] == 'PV-5'
+    assert '123,456.00' not in df['T_Debit'].tolist()
+
+
+def old_process_particulars(value):
+    if pd.isna(value):
+        return ""
+    val = str(value).replace('\r\n', '\n').replace('\r', '\n').strip()
+    lines = [line.strip() for line in val.split('\n') if line.strip()]
+    if not lines:
+        return ""
+    header = lines[0]
+    if len(lines) > 1:
+        return f"{header}\n{' '.join(lines[1:]).strip()}"
+    match = re.match(r'^([A-Za-z0-9\-/ ]+)[.:,-]\s*(.+)', header)
+    if match:
+        return f"{match.group(1).strip()}\n{match.group(2).strip()}"
+    return header
+
+
+def old_extract_vendor(particulars):
+    if pd.isna(particulars):
+        return ""
+    lines = [line.strip() for line in str(particulars).strip().splitlines() if line.strip()]
+    if lines and lines[0].lower().replace(" ", "") == "(asperdetails)" and len(lines) > 1:
+        val = lines[1]
+        match = re.search(r'\b([A-Za-z]+-CE-\d+-\d+-CI)\b', val)
+        if match:
+            return match.group(1).upper().replace(" ", "")
+        match2 = re.search(r'Payable-([^-]+)-ID', val)
+        if match2:
+            return match2.group(1).strip().upper().replace(" ", "")
+        match3 = re.search(r'([A-Za-z .&-]+(?:Ltd|Limited))', val, re.IGNORECASE)
+        if match3:
+            return match3.group(1).strip().upper().replace(" ", "")
+        if 'Amount' in val:
+            chunks = [c.strip() for c in val.split('Amount')[0].split('-') if c.strip()]
+            if chunks:
+                return re.sub(r'[^A-Z0-9]', '', chunks[-1].upper())
+        return val.upper().replace(" ", "")
+    val = lines[0] if lines else ""
+    val = re.sub(r'^(adv(?:ance)?|ap)[\s\-]*', '', val, flags=re.IGNORECASE)
+    val = re.sub(r'^(m[\s\-\/]*s)[\s\-]*', '', val, flags=re.IGNORECASE)
+    val = re.split(r'-ID:', val, flags=re.IGNORECASE)[0]
+    val = re.sub(r'\band\b', '', val, flags=re.IGNORECASE)
+    val = re.sub(f'[{re.escape(string.punctuation)}\\s]+', '', val)
+    return val.upper()
+
+
+PARTICULARS = [
+    None, float('nan'), 42, 1.5, '', '   ', 'Opening Balance', 'M/S Acme Traders',
+    'Cheque-123: Acme', 'Acme\r\ncq 1', 'Acme\rcq 1\r\rline 3', 'Acme\vcq 1', 'Acme\u2028cq 1', 'Acme\x85cq',
+    '(as per details)', '(as per details)\nBeta-CE-12-34-CI paid', ' ( As Per Details ) \r\nPayable-Gamma Co-ID 7',
+    '(as per details)\u2028Delta & Sons Limited bill', '(as per details)\vRef - Epsilon - Amount 100',
+    '(as per details)\n- Amount 5', '(as per details)\n\nZeta corp',
+]
+LINE_PIECES = ['(as per details)', '(As Per Details)', 'Payable-Gamma-ID', 'Beta-CE-1-2-CI', 'Acme Ltd',
+               'Amount', ' - ', '-', 'M/S ', 'Advance ', 'AP-', 'and', '-ID:', 'Cheque', ':', '.', ',', '12',
+               ' ', '\n', '\r', '\r\n', '\v', '\f', '\u2028', '\u2029', '\x85', '\x1c']
+
+
+def fuzzed_particulars(rng, count):
+    return [''.join(rng.choice(LINE_PIECES) for _ in range(rng.randint(0, 8))) for _ in range(count)]
+
+
+def test_normalize_particulars_matches_the_per_row_function():
+    values = PARTICULARS + fuzzed_particulars(random.Random(23), 5000)
+    assert normalize_particulars(values).tolist() == [old_process_particulars(v) for v in values]
+
+
+def test_extract_vendors_matches_the_per_row_function():
+    values = PARTICULARS + fuzzed_particulars(random.Random(32), 5000)
+    assert extract_vendors(values).tolist() == [old_extract_vendor(v) for v in values]
+    # As the parser applies them: vendors of the normalized particulars
+    normalized = normalize_particulars(values)
+    assert extract_vendors(normalized).tolist() == [old_extract_vendor(old_process_particulars(v)) for v in values]
+
+
+def test_calamine_reads_like_openpyxl(workbook):
+    pytest.importorskip('python_calamine')
+    assert list(iter_sheet_rows(workbook, SHEET, 'calamine')) == list(iter_sheet_rows(workbook, SHEET, 'openpyxl'))
+    pd.testing.assert_frame_equal(read_raw_sheet(workbook, SHEET, 'calamine'),
+                                  read_raw_sheet(workbook, SHEET, 'openpyxl'))
+    pd.testing.assert_frame_equal(parse_tally_file(workbook, SHEET, backend='calamine'),
+                                  parse_tally_file(workbook, SHEET, backend='openpyxl'))
+    for calamine, openpyxl in zip(iter_tally_chunks(workbook, SHEET, chunk_rows=2, backend='calamine'),
+                                  iter_tally_chunks(workbook, SHEET, chunk_rows=2, backend='openpyxl'), strict=True):
+        pd.testing.assert_frame_equal(calamine, openpyxl)
@@ -0,0 +1,99 @@
+# tests/test_uid.py
+
+"""
+utils/uid against the per-row UID code it replaced: the bank parsers' to_hex_date /
+to_hex_balance (MDB, MTB, PBL), the fin parser loop and the tally parser's to_hex.
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.uid import amount_hex, build_uids, date_hex, row_numbers
+
+DATES = ['2025-02-13', '2024-12-31', '2025-2-3', '02/13/2025', 'Feb 5, 2025', '2025-02-30', 'not a date',
+         '', None, np.nan, pd.NaT, pd.Timestamp('2025-01-07'), '2025-02-13']
+AMOUNTS = [0, 1.5, 2.5, 3.5, -2.5, -255.4, 0.49, 1234567.5, '12', ' 7.5 ', '1,234.50', 'abc', '', 'nan', 'inf',
+           '-inf', None, np.nan, np.inf, -np.inf, 2.5]
+NUMERIC = [0.0, 0.5, 1.5, 2.5, -0.5, -1.5, -255.4, 99.99, np.nan, np.inf, -np.inf, 1e9 + 0.5]
+
+
+def old_hex_date(date_str):
+    # to_hex_date of the MDB, MTB and PBL parsers
+    try:
+        dt = pd.to_datetime(date_str, errors="coerce")
+        if pd.isna(dt):
+            return "0"
+        return format(int(dt.strftime("%Y%m%d")), "x")
+    except Exception:
+        return "0"
+
+
+def old_hex_balance(balance):
+    # to_hex_balance of the MDB, MTB and PBL parsers
+    try:
+        return format(int(round(float(balance))), "x")
+    except Exception:
+        return "0"
+
+
+def old_fin_hex(payment_date, amount):
+    # The fin parser's UID loop
+    try:
+        hexdate = format(int(pd.to_datetime(payment_date).strftime("%Y%m%d")), "X")
+    except Exception:
+        hexdate = "UNKNOWN"
+    try:
+        hexamount = format(int(float(amount)), "X")
+    except Exception:
+        hexamount = "UNKNOWN"
+    return hexdate, hexamount
+
+
+def old_tally_hex_balance(balance):
+    # The tally parser's to_hex(round(float(...)))
+    def to_hex(val):
+        try:
+            return hex(int(float(val)))[2:]
+        except Exception:
+            return ""
+    try:
+        return to_hex(round(float(str(balance).replace(",", ""))))
+    except Exception:
+        return ""
+
+
+def test_bank_date_hex():
+    assert list(date_hex(DATES)) == [old_hex_date(d) for d in DATES]
+    assert list(date_hex(pd.to_datetime(pd.Series(DATES[:2] + [None])))) == \
+        [old_hex_date(d) for d in DATES[:2]] + ['0']
+
+
+def test_bank_amount_hex():
+    for values in (AMOUNTS, NUMERIC):
+        assert list(amount_hex(values)) == [old_hex_balance(v) for v in values]
+
+
+def test_fin_uids():
+    dates = (DATES * 2)[:len(AMOUNTS)]
+    old = [old_fin_hex(d, a) for d, a in zip(dates, AMOUNTS)]
+    assert list(date_hex(dates, upper=True, missing="UNKNOWN")) == [d for d, _ in old]
+    assert list(amount_hex(AMOUNTS, rounding="trunc", upper=True, missing="UNKNOWN")) == [a for _, a in old]
+    assert list(amount_hex(NUMERIC, rounding="trunc", upper=True, missing="UNKNOWN")) == \
+        [old_fin_hex(None, a)[1] for a in NUMERIC]
+
+
+def test_tally_amount_hex():
+    # The tally parser passes the balances as text with thousands separators removed
+    for values in (AMOUNTS, NUMERIC):
+        text = pd.Series(values, dtype=object).map(str).str.replace(",", "", regex=False)
+        assert list(amount_hex(text, missing="", hex_slice=True)) == [old_tally_hex_balance(v) for v in values]
+    assert old_tally_hex_balance(-255.4) == 'xff'
+
+
+def test_build_uids():
+    dates = ['2025-02-13', 'not a date', None]
+    balances = [1500.5, 'abc', -2.5]
+    uids = build_uids("B_MDB", date_hex(dates), amount_hex(balances), row_numbers(np.arange(1, 4)))
+    old = [f"B_MDB_{old_hex_date(d)}_{old_hex_balance(b)}_{str(i + 1).zfill(6)}"
+           for i, (d, b) in enumerate(zip(dates, balances))]
+    assert uids == old == ['B_MDB_134fe65_5dc_000001', 'B_MDB_0_0_000002', 'B_MDB_0_-2_000003']
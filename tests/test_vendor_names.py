@@ -0,0 +1,79 @@
+# tests/test_vendor_names.py
+
+"""
+normalize_vendor() against the four normalizers VENDOR_RULES replaced, on fuzzed names
+built from the pieces their rules look for (M/S spellings, Advance/AP prefixes, -ID:
+suffixes, 'and', punctuation and odd whitespace).
+"""
+
+import random
+import re
+import string
+
+from utils.vendor_names import normalize_vendor, vendor_key
+
+_PUNCT = re.escape(string.punctuation)
+
+
+def old_fin(name):
+    # fin_parser.derive_vendor
+    if not isinstance(name, str):
+        return ""
+    name = name.upper().strip()
+    name = re.sub(r"^(M[\s\.\/]*S[\s\.]*)", "", name)
+    name = re.sub(rf"[{_PUNCT}]", "", name)
+    return name.replace(" ", "")
+
+
+def old_mdb(name):
+    # mdb_parser.normalize_vendor_name
+    s = str(name).strip()
+    s = re.sub(r'^M[\s./\\-]*S[\s./\\-]*', '', s, flags=re.IGNORECASE)
+    s = s.replace(".", "").replace(" ", "").replace("-", "")
+    return s.upper()
+
+
+def old_mtb(vendor):
+    # The cleaning step of mtb_parser.extract_bank_vendor
+    vendor = re.sub(r"\bM[\.\s/\\]*S\b", "", vendor, flags=re.IGNORECASE)
+    vendor = vendor.replace(".", "").replace(" ", "")
+    return vendor.upper().strip()
+
+
+def old_tally(val):
+    # The default branch of tally_parser.extract_vendor_updated, on the first line
+    val = re.sub(r'^(adv(?:ance)?|ap)[\s\-]*', '', val, flags=re.IGNORECASE)
+    val = re.sub(r'^(m[\s\-\/]*s)[\s\-]*', '', val, flags=re.IGNORECASE)
+    val = re.split(r'-ID:', val, flags=re.IGNORECASE)[0]
+    val = re.sub(r'\band\b', '', val, flags=re.IGNORECASE)
+    val = re.sub(f'[{_PUNCT}\\s]+', '', val)
+    return val.upper()
+
+
+PIECES = ['M/S', 'm/s', 'M.S.', 'M S', 'm\\s', 'Ms', 'M-S', 'ms.', 'Advance', 'adv-', 'AP ', 'ap',
+          '-ID:', '-id:', ' and ', 'AND', 'band', 'Acme', 'TRADERS', 'Ltd.', 'co', '&', '-', '.', '/',
+          ',', '(', ')', '_', ' ', '  ', '\t', '\xa0', 'é', '7', '42']
+
+
+def fuzzed_names(rng, count):
+    for _ in range(count):
+        yield ''.join(rng.choice(PIECES) for _ in range(rng.randint(0, 7)))
+
+
+def test_rules_match_the_old_normalizers():
+    rng = random.Random(24)
+    old = {'fin': old_fin, 'mdb': old_mdb, 'mtb': old_mtb, 'tally': old_tally}
+    for source, fn in old.items():
+        for name in fuzzed_names(rng, 50000):
+            assert normalize_vendor(name, source) == fn(name), (source, name)
+
+
+def test_fin_non_text_names():
+    for name in (None, float('nan'), 42):
+        assert normalize_vendor(name, 'fin') == old_fin(name) == ''
+
+
+def test_vendor_key_keeps_letters_and_digits():
+    keys = vendor_key(['tali&co', 'TALICO ', '-.-', None])
+    assert list(keys[:2]) == ['TALICO', 'TALICO']
+    assert keys[2:].isna().all()
@@ -0,0 +1,69 @@
+# utils/bf_watermarks.py
+
+import pandas as pd
+from sqlalchemy import text
+
+WATERMARK_TABLE = 'bf_watermark'
+
+
+def load_watermarks(engine, bank_code):
+    """acct_no -> (last_bank_id, last_fin_id) seen by the last bank-finance run for this bank."""
+    df = pd.read_sql(
+        text(f"SELECT acct_no, last_bank_id, last_fin_id FROM {WATERMARK_TABLE} WHERE bank_code=:bank_code"),
+        engine, params={"bank_code": bank_code}
+    )
+    return {
+        str(row.acct_no): (int(row.last_bank_id or 0), int(row.last_fin_id or 0))
+        for row in df.itertuples(index=False)
+    }
+
+
+def flag_new_rows(df, watermarks, id_col, slot):
+    """
+    True for rows uploaded after the last run of their account, i.e. whose id is above
+    the account's watermark (slot 0 = bank_id, 1 = fin_id). Unknown accounts are all new.
+    """
+    if df.empty or id_col not in df.columns or 'acct_no' not in df.columns:
+        return pd.Series(True, index=df.index)
+    marks = df['acct_no'].astype(str).map({acct: wm[slot] for acct, wm in watermarks.items()}).fillna(0)
+    return pd.to_numeric(df[id_col], errors='coerce').fillna(0) > marks
+
+
+def _max_by_account(df, col):
+    if df.empty or col not in df.columns or 'acct_no' not in df.columns:
+        return pd.Series(dtype=object)
+    return df.groupby(df['acct_no'].astype(str))[col].max()
+
+
+def _as_int(val):
+    return 0 if val is None or pd.isna(val) else int(val)
+
+
+def save_watermarks(conn, bank_code, bank_df, fin_df, run_tag):
+    """Advance each account's watermark to the highest bank_id / fin_id / input_date this run has seen."""
+    last_bank = _max_by_account(bank_df, 'bank_id')
+    last_fin = _max_by_account(fin_df, 'fin_id')
+    last_input = pd.concat([
+        _max_by_account(bank_df, 'input_date'), _max_by_account(fin_df, 'input_date')
+    ]).groupby(level=0).max()
+
+    for acct_no in sorted(set(last_bank.index) | set(last_fin.index)):
+        input_date = last_input.get(acct_no)
+        conn.execute(text(
+            f"INSERT INTO {WATERMARK_TABLE} "
+            "(bank_code, acct_no, last_bank_id, last_fin_id, last_input_date, last_run_tag, updated_at) "
+            "VALUES (:bank_code, :acct_no, :last_bank_id, :last_fin_id, :last_input_date, :run_tag, NOW()) "
+            "ON DUPLICATE KEY UPDATE "
+            "last_bank_id = GREATEST(last_bank_id, VALUES(last_bank_id)), "
+            "last_fin_id = GREATEST(last_fin_id, VALUES(last_fin_id)), "
+            "last_input_date = GREATEST(COALESCE(last_input_date, VALUES(last_input_date)), "
+            "COALESCE(VALUES(last_input_date), last_input_date)), "
+            "last_run_tag = VALUES(last_run_tag), updated_at = NOW()"
+        ), {
+            "bank_code": bank_code,
+            "acct_no": acct_no,
+            "last_bank_id": _as_int(last_bank.get(acct_no)),
+            "last_fin_id": _as_int(last_fin.get(acct_no)),
+            "last_input_date": None if pd.isna(input_date) else pd.Timestamp(input_date).to_pydatetime(),
+            "run_tag": run_tag,
+        })
@@ -0,0 +1,131 @@
+# utils/excel_reader.py
+
+"""
+Single-read Excel ingestion: a sheet is decoded once into a raw frame (no header, every
+cell a string), the header row is located on it, and the data frame is sliced from it
+instead of decoding the workbook a second time with read_excel(header=...).
+
+Every parser reads through this module, so the decoding backend is chosen in one place:
+"calamine" (python-calamine, much faster; optional) when installed, otherwise "openpyxl"
+(pandas' default engines: openpyxl for .xlsx, xlrd for .xls). Pass backend= to force one;
+parsers/reader_benchmark.py compares them on sample statements.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+
+import pandas as pd
+from openpyxl import load_workbook
+
+try:
+    import python_calamine  # optional: pip install python-calamine
+except ImportError:
+    python_calamine = None
+
+HEADER_SCAN_ROWS = 100  # header rows are looked for in this many leading rows only
+
+EXCEL_BACKENDS = ("calamine", "openpyxl")  # in order of preference
+
+
+def available_backends():
+    """The installed backends, preferred first."""
+    return [b for b in EXCEL_BACKENDS if b != "calamine" or python_calamine is not None]
+
+
+def resolve_backend(backend=None):
+    """`backend` itself, or the preferred installed backend when None."""
+    if backend is None:
+        return available_backends()[0]
+    if backend not in available_backends():
+        raise ValueError(f"Excel reader backend '{backend}' is not available.")
+    return backend
+
+
+def read_excel(input_file, backend=None, **kwargs):
+    """pd.read_excel through the chosen backend."""
+    engine = "calamine" if resolve_backend(backend) == "calamine" else None
+    return pd.read_excel(input_file, engine=engine, **kwargs)
+
+
+def read_raw_sheet(input_file, sheet_name=None, backend=None):
+    """One sheet (the first when sheet_name is None), header=None and dtype=str."""
+    return read_excel(input_file, backend, sheet_name=0 if sheet_name is None else sheet_name,
+                      header=None, dtype=str)
+
+
+def _calamine_value(value):
+    """A calamine cell as openpyxl returns it: None for empty cells, whole numbers as int,
+    dates as midnight datetimes."""
+    if isinstance(value, str) and value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if type(value) is date:
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+def iter_sheet_rows(file_path, sheet_name, backend=None):
+    """
+    Cell values of a sheet row by row, as tuples starting at A1 (openpyxl's
+    iter_rows(values_only=True) on a read-only workbook). Rows are produced lazily;
+    close the generator to release the workbook early.
+    """
+    if resolve_backend(backend) == "calamine":
+        sheet = python_calamine.CalamineWorkbook.from_path(file_path).get_sheet_by_name(sheet_name)
+        # iter_rows starts at the first sheet row but at the first used column; pad back to A1
+        lead = (None,) * (sheet.start or (0, 0))[1]
+        for row in sheet.iter_rows():
+            yield lead + tuple(_calamine_value(v) for v in row)
+        return
+
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name]
+        # Some writers store a bogus "A1" dimension; read rows at their natural width then
+        if not ws.max_column or (ws.max_row, ws.max_column) == (1, 1):
+            ws.reset_dimensions()
+        yield from ws.iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def find_header_row(raw, expected, lower=False, max_rows=HEADER_SCAN_ROWS):
+    """
+    Label of the first row among the first `max_rows` that contains every `expected`
+    label (cells stripped, and lower-cased when `lower`), or None.
+    """
+    labels = {label.lower() if lower else label for label in expected}
+    cells = raw.iloc[:max_rows].stack().astype(str).str.strip()
+    if lower:
+        cells = cells.str.lower()
+    found = cells[cells.isin(labels)]
+    counts = found.groupby(level=0).nunique()
+    rows = counts.index[counts == len(labels)]
+    return rows[0] if len(rows) else None
+
+
+def header_names(cells):
+    """Column names from a header row the way read_excel builds them: blanks become
+    'Unnamed: i' and repeats get '.1', '.2', ... suffixes."""
+    names = []
+    counts = defaultdict(int)
+    for i, cell in enumerate(cells):
+        name = f"Unnamed: {i}" if pd.isna(cell) or cell == '' else cell
+        count = counts[name]
+        while count > 0:
+            counts[name] = count + 1
+            name = f"{name}.{count}"
+            count = counts[name]
+        names.append(name)
+        counts[name] = count + 1
+    return names
+
+
+def frame_from_header(raw, header_row):
+    """The rows below `header_row` with it as the header, indexed from 0; the same frame
+    read_excel(header=header_row, dtype=str) returns for the sheet."""
+    pos = raw.index.get_loc(header_row)
+    df = raw.iloc[pos + 1:].reset_index(drop=True)
+    df.columns = header_names(raw.iloc[pos].tolist())
+    return df
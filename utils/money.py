@@ -0,0 +1,48 @@
+# utils/money.py
+
+"""
+Shared money representation: amounts are carried as int64 paisa (1/100 taka) so that
+equality, hashing and sums are exact. Parsers store a `<col>_paisa` column next to
+every amount column; matchers read it through paisa_of().
+"""
+
+import pandas as pd
+
+PAISA_SUFFIX = '_paisa'
+
+
+def paisa_col(col):
+    return f"{col}{PAISA_SUFFIX}"
+
+
+def to_paisa(values):
+    """Amounts (floats, numeric strings with thousands separators, Decimal) -> nullable Int64 paisa."""
+    values = pd.Series(values)
+    if values.dtype == object or pd.api.types.is_string_dtype(values):
+        values = values.astype(str).str.replace(',', '', regex=False).str.strip().where(values.notna())
+    amounts = pd.to_numeric(values, errors='coerce')
+    return (amounts * 100).round().astype('Int64')
+
+
+def add_paisa_columns(df, cols):
+    """Add `<col>_paisa` for each amount column present in df (parse-time)."""
+    for col in cols:
+        if col in df.columns:
+            df[paisa_col(col)] = to_paisa(df[col]).to_numpy()
+    return df
+
+
+def paisa_of(df, col):
+    """
+    Int64 paisa for an amount column: the stored `<col>_paisa` column where present,
+    falling back to converting `col` for rows uploaded before it existed.
+    """
+    stored = paisa_col(col)
+    if stored in df.columns:
+        values = pd.to_numeric(df[stored], errors='coerce').astype('Int64')
+        if values.isna().any() and col in df.columns:
+            values = values.fillna(to_paisa(df[col]))
+        return values
+    if col not in df.columns:
+        return pd.Series(pd.NA, index=df.index, dtype='Int64')
+    return to_paisa(df[col])
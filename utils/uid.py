@@ -0,0 +1,112 @@
+# utils/uid.py
+
+"""
+Row UIDs built on whole columns: <prefix>_<date hex>_<amount hex>_<row no.>, where the
+date is yyyymmdd read as an integer. Parsers differ in hex case, amount rounding and the
+placeholder for missing parts; every variant reproduces the per-row code it replaced,
+so UIDs already stored stay valid.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _map_unique(values, fn):
+    """fn applied once per distinct non-null value; NaN where values are null."""
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    mapped = np.array([fn(u) for u in uniques] + [np.nan], dtype=object)
+    return mapped[codes]
+
+
+def _to_timestamp(value):
+    try:
+        return pd.to_datetime(value, errors="coerce")
+    except Exception:
+        return pd.NaT
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except Exception:
+        return np.nan
+
+
+def yyyymmdd(values):
+    """
+    Dates -> (int64 yyyymmdd, valid mask). Values are parsed as pd.to_datetime(value,
+    errors='coerce') would one by one; the parsers' own 'YYYY-MM-DD' strings take a
+    single vectorized pass.
+    """
+    values = pd.Series(values).reset_index(drop=True)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        dates = values
+    else:
+        dates = pd.to_datetime(values, format="%Y-%m-%d", errors="coerce")
+        retry = dates.isna() & values.notna()
+        if retry.any():
+            dates = dates.astype(object)
+            dates[retry] = _map_unique(values[retry], _to_timestamp)
+            dates = pd.to_datetime(dates, errors="coerce")
+    valid = dates.notna().to_numpy()
+    ints = np.zeros(len(dates), dtype="int64")
+    ints[valid] = (dates[valid].dt.year * 10000 + dates[valid].dt.month * 100 + dates[valid].dt.day).to_numpy()
+    return ints, valid
+
+
+def whole_amounts(values, rounding="round"):
+    """
+    Amounts -> (int64, valid mask): rounded half-to-even like round(), or truncated toward
+    zero like int() with rounding="trunc". Non-numeric, NaN and infinite values are invalid.
+    """
+    values = pd.Series(values).reset_index(drop=True)
+    if pd.api.types.is_numeric_dtype(values):
+        nums = values.to_numpy(dtype="float64", na_value=np.nan)
+    else:
+        nums = _map_unique(values, _to_float).astype("float64")
+    valid = np.isfinite(nums)
+    whole = np.rint(nums) if rounding == "round" else np.trunc(nums)
+    ints = np.zeros(len(nums), dtype="int64")
+    ints[valid] = whole[valid].astype("int64")
+    return ints, valid
+
+
+def hex_strings(ints, valid, upper=False, missing="0", hex_slice=False):
+    """
+    Hex text of the valid ints, `missing` elsewhere, formatted once per distinct value.
+    hex_slice reproduces hex(n)[2:] (negatives come out as 'x…').
+    """
+    out = np.full(len(ints), missing, dtype=object)
+    if valid.any():
+        uniques, inverse = np.unique(ints[valid], return_inverse=True)
+        if hex_slice:
+            texts = [hex(int(u))[2:] for u in uniques]
+        else:
+            texts = [format(int(u), "X" if upper else "x") for u in uniques]
+        out[valid] = np.array(texts, dtype=object)[inverse]
+    return out
+
+
+def date_hex(values, upper=False, missing="0"):
+    """yyyymmdd of each date in hex; `missing` where the date does not parse."""
+    ints, valid = yyyymmdd(values)
+    return hex_strings(ints, valid, upper, missing)
+
+
+def amount_hex(values, rounding="round", upper=False, missing="0", hex_slice=False):
+    """Whole-number amounts in hex (see whole_amounts); `missing` where not a number."""
+    ints, valid = whole_amounts(values, rounding)
+    return hex_strings(ints, valid, upper, missing, hex_slice)
+
+
+def row_numbers(numbers):
+    """Row numbers zero-padded to six digits."""
+    return pd.Series(np.asarray(numbers)).astype(str).str.zfill(6).to_numpy(dtype=object)
+
+
+def build_uids(prefix, *parts):
+    """'<prefix>_<part>_<part>…' per row from equal-length arrays of text."""
+    uids = pd.Series(np.asarray(parts[0], dtype=object))
+    for part in parts[1:]:
+        uids = uids + "_" + pd.Series(np.asarray(part, dtype=object))
+    return (prefix + "_" + uids).tolist()
@@ -0,0 +1,100 @@
+# utils/vendor_aliases.py
+
+"""
+Vendor alias registry: bank vendor name -> finance vendor name, per bank, kept in the
+vendor_alias table. Every write bumps vendor_alias_version; each process keeps the
+compiled {bank_code: {alias: canonical}} lookup until it sees a newer version.
+"""
+
+import threading
+import pandas as pd
+from sqlalchemy import text
+
+ALIAS_TABLE = 'vendor_alias'
+VERSION_TABLE = 'vendor_alias_version'
+
+_cache = {'version': None, 'maps': {}}
+_lock = threading.Lock()
+
+
+def normalize_vendor(val):
+    return str(val).strip().upper()
+
+
+def current_version(conn):
+    version = conn.execute(text(f"SELECT version FROM {VERSION_TABLE} WHERE id = 1")).scalar()
+    return int(version or 0)
+
+
+def bump_version(conn):
+    """Call inside the transaction that changed vendor_alias so other processes reload."""
+    conn.execute(text(
+        f"INSERT INTO {VERSION_TABLE} (id, version, updated_at) VALUES (1, 1, NOW()) "
+        "ON DUPLICATE KEY UPDATE version = version + 1, updated_at = NOW()"
+    ))
+
+
+def _compile(rows):
+    maps = {}
+    for row in rows.itertuples(index=False):
+        maps.setdefault(row.bank_code, {})[normalize_vendor(row.bank_vendor)] = normalize_vendor(row.fin_vendor)
+    return maps
+
+
+def get_alias_map(engine, bank_code):
+    """Alias lookup for one bank, reloaded from the database only when the version counter moved."""
+    with engine.connect() as conn:
+        version = current_version(conn)
+        if version != _cache['version']:
+            rows = pd.read_sql(text(f"SELECT bank_code, bank_vendor, fin_vendor FROM {ALIAS_TABLE}"), conn)
+            with _lock:
+                _cache['maps'] = _compile(rows)
+                _cache['version'] = version
+    return _cache['maps'].get(bank_code, {})
+
+
+def list_aliases(engine, bank_code=None):
+    query = f"SELECT alias_id, bank_code, bank_vendor, fin_vendor, updated_at FROM {ALIAS_TABLE}"
+    params = {}
+    if bank_code:
+        query += " WHERE bank_code = :bank_code"
+        params['bank_code'] = bank_code
+    return pd.read_sql(text(query + " ORDER BY bank_code, bank_vendor"), engine, params=params)
+
+
+def upsert_alias(engine, bank_code, bank_vendor, fin_vendor):
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"INSERT INTO {ALIAS_TABLE} (bank_code, bank_vendor, fin_vendor, updated_at) "
+            "VALUES (:bank_code, :bank_vendor, :fin_vendor, NOW()) "
+            "ON DUPLICATE KEY UPDATE fin_vendor = VALUES(fin_vendor), updated_at = NOW()"
+        ), {
+            'bank_code': bank_code,
+            'bank_vendor': normalize_vendor(bank_vendor),
+            'fin_vendor': normalize_vendor(fin_vendor),
+        })
+        bump_version(conn)
+
+
+def update_alias(engine, alias_id, bank_vendor, fin_vendor):
+    with engine.begin() as conn:
+        updated = conn.execute(text(
+            f"UPDATE {ALIAS_TABLE} SET bank_vendor = :bank_vendor, fin_vendor = :fin_vendor, updated_at = NOW() "
+            "WHERE alias_id = :alias_id"
+        ), {
+            'alias_id': alias_id,
+            'bank_vendor': normalize_vendor(bank_vendor),
+            'fin_vendor': normalize_vendor(fin_vendor),
+        }).rowcount
+        if updated:
+            bump_version(conn)
+    return updated
+
+
+def delete_alias(engine, alias_id):
+    with engine.begin() as conn:
+        deleted = conn.execute(text(f"DELETE FROM {ALIAS_TABLE} WHERE alias_id = :alias_id"),
+                               {'alias_id': alias_id}).rowcount
+        if deleted:
+            bump_version(conn)
+    return deleted
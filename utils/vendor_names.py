@@ -0,0 +1,111 @@
+# utils/vendor_names.py
+
+"""
+Vendor name normalization shared by the parsers. Each source keeps its own rules,
+declared in VENDOR_RULES, so the bank_ven / fin_ven / tally_ven values written at upload
+stay as they were. normalize_vendor() applies one rule set to a name and is LRU-cached
+(vendors repeat month after month); normalize_series() does a whole column, normalizing
+each distinct value once.
+
+vendor_key() is the source-independent form, letters and digits only. bank_fin_match
+uses it for its alias key when config['alias_letters_digits'] is set.
+"""
+
+import re
+import string
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+VENDOR_CACHE_SIZE = 65536  # distinct (name, source) pairs remembered by normalize_vendor
+
+_PUNCTUATION = re.escape(string.punctuation)
+
+# Per-source rules, applied in this order:
+#   upper_first  upper-case before the other steps (otherwise after them)
+#   strip        strip surrounding whitespace
+#   prefix       leading pattern removed ahead of the M/S one
+#   ms           M/S pattern removed
+#   cut          everything from the first match on is dropped
+#   drop         patterns removed, in order
+#   strip_last   strip again at the very end
+VENDOR_RULES = {
+    # Finance 'Receiver Name'
+    "fin": {
+        "upper_first": True,
+        "strip": True,
+        "ms": re.compile(r"^(M[\s\.\/]*S[\s\.]*)"),
+        "drop": [re.compile(f"[{_PUNCTUATION} ]")],
+    },
+    # Midland Bank narrations: only dots, spaces and dashes go
+    "mdb": {
+        "strip": True,
+        "ms": re.compile(r'^M[\s./\\-]*S[\s./\\-]*', re.IGNORECASE),
+        "drop": [re.compile(r'[. -]')],
+    },
+    # Mutual Trust Bank narrations: M/S as a word anywhere in the name
+    "mtb": {
+        "ms": re.compile(r"\bM[\.\s/\\]*S\b", re.IGNORECASE),
+        "drop": [re.compile(r'[. ]')],
+        "strip_last": True,
+    },
+    # Tally ledger first line: 'Advance'/'AP' prefix, '-ID:' suffix, the word 'and'
+    "tally": {
+        "prefix": re.compile(r'^(adv(?:ance)?|ap)[\s\-]*', re.IGNORECASE),
+        "ms": re.compile(r'^(m[\s\-\/]*s)[\s\-]*', re.IGNORECASE),
+        "cut": re.compile(r'-ID:', re.IGNORECASE),
+        "drop": [re.compile(r'\band\b', re.IGNORECASE), re.compile(f'[{_PUNCTUATION}\\s]+')],
+    },
+}
+
+_NON_WORD = re.compile(r'[\W_]+')
+
+
+@lru_cache(maxsize=VENDOR_CACHE_SIZE)
+def normalize_vendor(name, source):
+    """One vendor name under VENDOR_RULES[source]; '' for anything but text."""
+    if not isinstance(name, str):
+        return ""
+    rule = VENDOR_RULES[source]
+    if rule.get("upper_first"):
+        name = name.upper()
+    if rule.get("strip"):
+        name = name.strip()
+    for step in ("prefix", "ms"):
+        if step in rule:
+            name = rule[step].sub('', name)
+    if "cut" in rule:
+        name = rule["cut"].split(name, maxsplit=1)[0]
+    for pattern in rule.get("drop", []):
+        name = pattern.sub('', name)
+    if not rule.get("upper_first"):
+        name = name.upper()
+    if rule.get("strip_last"):
+        name = name.strip()
+    return name
+
+
+def map_distinct(values, fn, missing=""):
+    """fn applied once per distinct non-null value and mapped back to every row; `missing` for nulls."""
+    values = pd.Series(values)
+    codes, uniques = pd.factorize(values.astype(object))
+    mapped = np.array([fn(value) for value in uniques] + [missing], dtype=object)
+    return pd.Series(mapped[codes], index=values.index)
+
+
+def normalize_series(values, source):
+    """normalize_vendor() over a column, each distinct name normalized once."""
+    return map_distinct(values, lambda name: normalize_vendor(name, source))
+
+
+@lru_cache(maxsize=VENDOR_CACHE_SIZE)
+def _vendor_key(name):
+    key = _NON_WORD.sub('', str(name).upper())
+    return key or None
+
+
+def vendor_key(values):
+    """Upper-cased vendor names with everything but letters and digits removed, so
+    names normalized under different sources compare equal; None when nothing is left."""
+    return map_distinct(values, _vendor_key, missing=None).astype(object)